@@ -0,0 +1,100 @@
+# Parse the dimensional limits written as text in the regulation JSON
+"""
+zoning_districts.json and use_classifications.json state limits the way the
+Reglamento prints them ("800 m²", "2 pisos", "40%", "15 units/acre",
+"1 por 30 m²"). These helpers turn them into numbers in fixed units:
+areas in m², heights in floors, coverage in percent, densities in units per
+hectare and distances in meters.
+"""
+
+import math
+import re
+from typing import Optional, Tuple
+
+SQUARE_METERS_PER = {
+    "m²": 1.0, "m2": 1.0,
+    "p²": 0.09290304, "p2": 0.09290304, "ft²": 0.09290304, "ft2": 0.09290304, "pies²": 0.09290304,
+    "cuerda": 3930.395, "cuerdas": 3930.395,
+    "acre": 4046.8564224, "acres": 4046.8564224,
+    "ha": 10000.0, "hectarea": 10000.0, "hectareas": 10000.0
+}
+METERS_PER = {"m": 1.0, "metros": 1.0, "p": 0.3048, "pies": 0.3048, "ft": 0.3048}
+
+NUMBER = r"\d[\d,]*(?:\.\d+)?"
+QUANTITY_PATTERN = re.compile(rf"({NUMBER})\s*([^\s\d/()]*)")
+DENSITY_PATTERN = re.compile(rf"({NUMBER})\s*(?:units?|unidades|viviendas)\s*/\s*(\w+)", re.I)
+RATIO_PATTERN = re.compile(
+    rf"({NUMBER})\s*(?:por|per)\s*({NUMBER})\s*(m²|m2|p²|asientos|seats|units?|unidades)", re.I
+)
+
+# "Sin límite" and friends: the limit exists and is infinite
+UNLIMITED_PATTERN = re.compile(r"sin\s+l[ií]mite|no\s+limit|unlimited", re.I)
+
+
+def _number(text: str) -> float:
+    return float(text.replace(",", ""))
+
+
+def _quantity(text: Optional[str]) -> Optional[Tuple[float, str]]:
+    if not text:
+        return None
+    match = QUANTITY_PATTERN.search(str(text))
+    if not match:
+        return None
+    return _number(match.group(1)), match.group(2).lower()
+
+
+def parse_area_m2(text: Optional[str]) -> float:
+    """ "800 m²" -> 800.0, "1 cuerda" -> 3930.395; NaN if absent"""
+    quantity = _quantity(text)
+    if quantity is None:
+        return math.nan
+    value, unit = quantity
+    return value * SQUARE_METERS_PER.get(unit, 1.0)
+
+
+def parse_length_m(text: Optional[str]) -> float:
+    """ "50 m from residential" -> 50.0; NaN if absent"""
+    quantity = _quantity(text)
+    if quantity is None:
+        return math.nan
+    value, unit = quantity
+    return value * METERS_PER.get(unit, 1.0)
+
+
+def parse_floors(text: Optional[str]) -> float:
+    """ "2 pisos" -> 2.0; "Sin límite" -> inf; NaN if absent"""
+    if text and UNLIMITED_PATTERN.search(str(text)):
+        return math.inf
+    quantity = _quantity(text)
+    return quantity[0] if quantity else math.nan
+
+
+def parse_percent(text: Optional[str]) -> float:
+    """ "40%" -> 40.0; NaN if absent"""
+    if text and UNLIMITED_PATTERN.search(str(text)):
+        return math.inf
+    quantity = _quantity(text)
+    return quantity[0] if quantity else math.nan
+
+
+def parse_density_per_ha(text: Optional[str]) -> float:
+    """ "15 units/acre" -> 37.07 units per hectare; NaN if absent"""
+    match = DENSITY_PATTERN.search(text or "")
+    if not match:
+        return math.nan
+    per_m2 = SQUARE_METERS_PER.get(match.group(2).lower(), math.nan)
+    return _number(match.group(1)) / per_m2 * SQUARE_METERS_PER["ha"]
+
+
+def parse_ratio(text: Optional[str]) -> Optional[Tuple[float, float, str]]:
+    """ "1 por 30 m²" -> (1.0, 30.0, "m2"); "1 per 10 seats" -> (1.0, 10.0, "seats") """
+    match = RATIO_PATTERN.search(text or "")
+    if not match:
+        return None
+    basis = match.group(3).lower()
+    per = _number(match.group(2))
+    if basis == "p²":
+        per, basis = per * SQUARE_METERS_PER["p²"], "m2"
+    basis = {"m²": "m2", "asientos": "seats", "unit": "units", "unidades": "units"}.get(basis, basis)
+    return _number(match.group(1)), per, basis
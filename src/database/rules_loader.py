@@ -1,20 +1,271 @@
 # Load regulatory data
 import json
+import logging
+import math
+import re
+import threading
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from src.database.regulation_units import (
+    parse_area_m2, parse_density_per_ha, parse_floors, parse_length_m, parse_percent
+)
+from src.database.rules_snapshot import RulesSnapshot, read_snapshot, source_fingerprint, write_snapshot
+from src.database.text_index import TextIndex, normalize_use_name, tokenize
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = Path(__file__).parent.parent.parent / "data"
+DEFAULT_SNAPSHOT_PATH = DATA_DIR / "regulations" / "rules.snapshot"
+
+# Bump when the indexes stored in the snapshot change shape
+INDEX_VERSION = 5
+
+# A usos entry standing for another district's whole list
+USO_REFERENCE_PATTERN = re.compile(r"todos\s+los\s+usos\s+(?:de|del)\s+(.+)", re.I)
+
+# Numeric district column -> (zoning_districts.json field, parser); NaN when
+# a district does not state the limit, inf when it states "Sin límite"
+DISTRICT_COLUMNS = {
+    "min_lot_m2": ("min_lot_size", parse_area_m2),
+    "min_frontage_m": ("min_frontage", parse_length_m),
+    "max_floors": ("max_height", parse_floors),
+    "max_coverage_pct": ("max_coverage", parse_percent),
+    "max_density_per_ha": ("max_density", parse_density_per_ha),
+    "buffer_m": ("buffer_zone", parse_length_m)
+}
+
+# Attribute -> file under data/, in the order they are loaded
+SOURCE_FILES = {
+    "municipalities": "municipalities.json",
+    "zoning_districts": "regulations/zoning_districts.json",
+    "use_types": "regulations/use_classifications.json",
+    "tomo6_rules": "regulations/tomo6_rules.json",
+    "uso_types": "regulations/uso_types_comprehensive.json"
+}
 
 class RulesDatabase:
     """Load and manage regulatory data"""
     
     def __init__(self):
-        self.data_dir = Path(__file__).parent.parent.parent / "data"
+        self.data_dir = DATA_DIR
         self.regulations_dir = self.data_dir / "regulations"
         
         # Load all data
-        self.municipalities = self._load_json("municipalities.json")
-        self.zoning_districts = self._load_json("regulations/zoning_districts.json")
-        self.use_types = self._load_json("regulations/use_classifications.json")
-        self.tomo6_rules = self._load_json("regulations/tomo6_rules.json")
+        for attribute, filename in SOURCE_FILES.items():
+            setattr(self, attribute, self._load_json(filename))
+        
+        self._build_indexes()
+    
+    @classmethod
+    def from_snapshot(cls, snapshot: RulesSnapshot) -> "RulesDatabase":
+        """Instance over a compiled snapshot, without parsing the JSON sources"""
+        db = cls.__new__(cls)
+        db.data_dir = DATA_DIR
+        db.regulations_dir = db.data_dir / "regulations"
+        for attribute in SOURCE_FILES:
+            setattr(db, attribute, snapshot.documents[attribute])
+        db._snapshot = snapshot
+        db._build_indexes(snapshot.index, snapshot.arrays)
+        return db
+    
+    @property
+    def version(self) -> str:
+        """Version of the Tomo 6 rules this instance was loaded from"""
+        return self.get_tomo6_rules().get("version")
+    
+    def write_snapshot(self, path: Path = DEFAULT_SNAPSHOT_PATH, sources: Optional[Dict] = None):
+        """Compile this instance's documents and indexes into a snapshot file"""
+        stems, text_arrays = self.text_index.to_arrays()
+        write_snapshot(
+            path,
+            rules_version=self.version,
+            sources=sources or source_fingerprint(self.source_paths()),
+            documents={attribute: getattr(self, attribute) for attribute in SOURCE_FILES},
+            index={
+                "index_version": INDEX_VERSION,
+                "zone_codes": self.zone_codes,
+                "use_codes": self.use_codes,
+                "uso_names": self.uso_names,
+                "uso_keys": [normalize_use_name(name) for name in self.uso_names],
+                "uso_tokens": {key: sorted(tokens) for key, tokens in self._uso_tokens.items()},
+                "uso_district_codes": self.uso_district_codes,
+                "district_codes": self.district_codes,
+                # The use type documents point back into use_types
+                "text_documents": [
+                    {key: value for key, value in document.items() if key != "use"}
+                    for document in self.text_index.documents
+                ],
+                "text_stems": stems
+            },
+            arrays={
+                "compatibility": self.compatibility,
+                "uso_districts": self._uso_mask_words(),
+                **{f"district_{name}": column for name, column in self.district_columns.items()},
+                **{f"text_{name}": array for name, array in text_arrays.items()}
+            }
+        )
+    
+    @staticmethod
+    def source_paths() -> List[Path]:
+        return [DATA_DIR / filename for filename in SOURCE_FILES.values()]
+    
+    def _build_indexes(self, index: Optional[Dict] = None, arrays: Optional[Dict] = None):
+        """
+        Dict indexes by code, a dense use x zone compatibility matrix and the
+        specific-use -> district bitsets, built once so lookups and
+        compatibility checks are O(1). A snapshot supplies the code axes and
+        arrays precomputed.
+        """
+        self._districts_by_code = {d["code"]: d for d in self.get_zoning_districts()}
+        self._uses_by_code = {u["code"]: u for u in self.get_use_types()}
+        
+        self._build_compatibility(index, arrays)
+        self._build_district_columns(index, arrays)
+        self._build_uso_districts(index, arrays)
+        self.text_index = self._build_text_index(index, arrays)
+    
+    def _build_compatibility(self, index: Optional[Dict], arrays: Optional[Dict]):
+        if index is not None and arrays is not None:
+            self.zone_codes = index["zone_codes"]
+            self.use_codes = index["use_codes"]
+            self.zone_index = {code: i for i, code in enumerate(self.zone_codes)}
+            self.use_index = {code: i for i, code in enumerate(self.use_codes)}
+            self.compatibility = arrays["compatibility"]
+            return
+        
+        # Zone axis: every district, plus zones only named in compatible_zones
+        self.zone_codes = list(self._districts_by_code)
+        for use in self.get_use_types():
+            for zone in use.get("compatible_zones", []):
+                if zone not in self._districts_by_code and zone not in self.zone_codes:
+                    self.zone_codes.append(zone)
+        self.use_codes = list(self._uses_by_code)
+        self.zone_index = {code: i for i, code in enumerate(self.zone_codes)}
+        self.use_index = {code: i for i, code in enumerate(self.use_codes)}
+        
+        # compatibility[use, zone] is True when the use is allowed in the zone
+        self.compatibility = np.zeros((len(self.use_codes), len(self.zone_codes)), dtype=bool)
+        for use in self.get_use_types():
+            row = self.use_index[use["code"]]
+            for zone in use.get("compatible_zones", []):
+                self.compatibility[row, self.zone_index[zone]] = True
+    
+    def _build_district_columns(self, index: Optional[Dict], arrays: Optional[Dict]):
+        """Dimensional limits parsed once into float columns over district_codes"""
+        if index is not None and arrays is not None:
+            self.district_codes = index["district_codes"]
+            self.district_columns = {name: arrays[f"district_{name}"] for name in DISTRICT_COLUMNS}
+        else:
+            self.district_codes = list(self._districts_by_code)
+            self.district_columns = {
+                name: np.array(
+                    [parse(district.get(field)) for district in self.get_zoning_districts()],
+                    dtype=np.float64
+                )
+                for name, (field, parse) in DISTRICT_COLUMNS.items()
+            }
+        self.district_index = {code: i for i, code in enumerate(self.district_codes)}
+        # Compatibility matrix column of each district
+        self._district_zone_columns = np.array([self.zone_index[code] for code in self.district_codes], dtype=np.intp)
+    
+    def _build_uso_districts(self, index: Optional[Dict], arrays: Optional[Dict]):
+        """
+        Bitset per specific use (bit i = allowed in uso_district_codes[i])
+        from the per-district usos lists in uso_types_comprehensive.json
+        """
+        if index is not None and arrays is not None:
+            self.uso_district_codes = index["uso_district_codes"]
+            self.uso_names = index["uso_names"]
+            keys = index["uso_keys"]
+            masks = [
+                sum(int(word) << (64 * i) for i, word in enumerate(words))
+                for words in arrays["uso_districts"].tolist()
+            ]
+        else:
+            self.uso_district_codes = list(self.uso_types["distritos"])
+            self.uso_names = []
+            masks = []
+            positions = {}
+            for bit, code in enumerate(self.uso_district_codes):
+                for uso in self._expanded_usos(code):
+                    if uso not in positions:
+                        positions[uso] = len(self.uso_names)
+                        self.uso_names.append(uso)
+                        masks.append(0)
+                    masks[positions[uso]] |= 1 << bit
+            keys = [normalize_use_name(name) for name in self.uso_names]
+        
+        self.uso_district_bit = {code: 1 << i for i, code in enumerate(self.uso_district_codes)}
+        self._uso_masks: Dict[str, int] = {}
+        self._uso_display: Dict[str, str] = {}
+        for name, key, mask in zip(self.uso_names, keys, masks):
+            self._uso_masks[key] = self._uso_masks.get(key, 0) | mask
+            self._uso_display.setdefault(key, name)
+        if index is not None:
+            self._uso_tokens = {key: frozenset(tokens) for key, tokens in index["uso_tokens"].items()}
+        else:
+            self._uso_tokens = {key: frozenset(tokenize(name)) for key, name in self._uso_display.items()}
+    
+    def _expanded_usos(self, code: str, seen: Optional[set] = None) -> List[str]:
+        """
+        A district's usos with "Todos los usos de C-L y C-I" entries replaced
+        by the referenced districts' usos
+        """
+        seen = (seen or set()) | {code}
+        usos = []
+        for uso in self.uso_types["distritos"].get(code, {}).get("usos", []):
+            reference = USO_REFERENCE_PATTERN.match(uso)
+            if not reference:
+                usos.append(uso)
+                continue
+            for referenced in re.split(r"\s*,\s*|\s+y\s+", reference.group(1).strip()):
+                if referenced in self.uso_types["distritos"] and referenced not in seen:
+                    usos.extend(self._expanded_usos(referenced, seen))
+                elif referenced not in seen:
+                    logger.warning(f"Uso reference to unknown district {referenced!r} in {code}")
+        return usos
+    
+    def _uso_mask_words(self) -> np.ndarray:
+        """Bitsets as rows of uint64 words, for the snapshot"""
+        n_words = max(1, -(-len(self.uso_district_codes) // 64))
+        words = np.zeros((len(self.uso_names), n_words), dtype=np.uint64)
+        for row, name in enumerate(self.uso_names):
+            mask = self._uso_masks[normalize_use_name(name)]
+            for i in range(n_words):
+                words[row, i] = (mask >> (64 * i)) & 0xFFFFFFFFFFFFFFFF
+        return words
+    
+    def _build_text_index(self, index: Optional[Dict] = None, arrays: Optional[Dict] = None) -> TextIndex:
+        """
+        Search index over the coarse use types (names and descriptions) and
+        the specific usos listed per district in uso_types_comprehensive.json
+        """
+        if index is not None and arrays is not None:
+            documents = [
+                {**document, "use": self._uses_by_code[document["code"]]} if document["kind"] == "use_type" else document
+                for document in index["text_documents"]
+            ]
+            return TextIndex.from_arrays(
+                documents, index["text_stems"],
+                arrays["text_offsets"], arrays["text_doc_ids"], arrays["text_weights"]
+            )
+        
+        text_index = TextIndex()
+        for use in self.get_use_types():
+            text_index.add(
+                {"kind": "use_type", "code": use["code"], "name": use["name_es"], "use": use},
+                {use["name_es"]: 3.0, use["name_en"]: 3.0, use.get("description_es", ""): 1.0}
+            )
+        
+        for key, uso in self._uso_display.items():
+            text_index.add(
+                {"kind": "uso", "name": uso, "districts": self._mask_districts(self._uso_masks[key])},
+                {uso: 3.0}
+            )
+        return text_index
     
     def _load_json(self, filename: str) -> Dict:
         """Load JSON file from data directory"""
@@ -32,10 +283,7 @@ class RulesDatabase:
     
     def get_zoning_district(self, code: str) -> Dict:
         """Get specific zoning district by code"""
-        for district in self.zoning_districts["zoning_districts"]:
-            if district["code"] == code:
-                return district
-        return None
+        return self._districts_by_code.get(code)
     
     def get_use_types(self) -> List[Dict]:
         """Get all use types"""
@@ -43,20 +291,306 @@ class RulesDatabase:
     
     def get_use_type(self, code: str) -> Dict:
         """Get specific use type by code"""
-        for use in self.use_types["use_types"]:
-            if use["code"] == code:
-                return use
-        return None
+        return self._uses_by_code.get(code)
     
     def get_use_by_name(self, name: str) -> Dict:
-        """Search use by name (Spanish or English)"""
-        name_lower = name.lower()
-        for use in self.use_types["use_types"]:
-            if (name_lower in use["name_es"].lower() or 
-                name_lower in use["name_en"].lower()):
-                return use
-        return None
+        """Search use by name (Spanish or English); best-ranked use type"""
+        matches = self.text_index.search(name, limit=1, kind="use_type")
+        return matches[0]["document"]["use"] if matches else None
+    
+    def search_uses(self, query: str, limit: int = 10) -> List[Dict]:
+        """
+        Ranked use search, accent- and typo-tolerant, for validation and
+        interactive search
+        
+        Returns:
+            [{"document": {"kind": "use_type", "code", "name", "use"} or
+                          {"kind": "uso", "name", "districts"},
+              "score": float}, ...]
+        """
+        return self.text_index.search(query, limit=limit)
+    
+    def is_compatible(self, use_code: str, zone_code: str) -> bool:
+        """Whether a use is allowed in a zoning district"""
+        row = self.use_index.get(use_code)
+        column = self.zone_index.get(zone_code)
+        if row is None or column is None:
+            return False
+        return bool(self.compatibility[row, column])
+    
+    def zones_for_use(self, use_code: str) -> List[str]:
+        """Every zoning district where a use is allowed"""
+        row = self.use_index.get(use_code)
+        if row is None:
+            return []
+        return [self.zone_codes[i] for i in np.flatnonzero(self.compatibility[row])]
+    
+    def uses_for_zone(self, zone_code: str) -> List[str]:
+        """Every use allowed in a zoning district"""
+        column = self.zone_index.get(zone_code)
+        if column is None:
+            return []
+        return [self.use_codes[i] for i in np.flatnonzero(self.compatibility[:, column])]
+    
+    def district_limits(self, zone_code: str) -> Dict[str, float]:
+        """Numeric limits of one district ({} if unknown); NaN = not stated"""
+        row = self.district_index.get(zone_code)
+        if row is None:
+            return {}
+        return {name: float(column[row]) for name, column in self.district_columns.items()}
+    
+    def envelope_sweep(
+        self,
+        lot_area_m2: float,
+        frontage_m: Optional[float] = None,
+        floors: Optional[float] = None,
+        footprint_m2: Optional[float] = None,
+        use_code: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        What-if feasibility of one lot across every district in one pass
+        
+        A district that does not state one of the limits the sweep relies on
+        (minimum lot, maximum floors, maximum coverage, and minimum frontage
+        when one is given) cannot be confirmed; unless a stated limit already
+        rules it out it is returned with status "unknown", never "compliant".
+        
+        Args:
+            lot_area_m2: Lot area
+            frontage_m: Lot frontage, checked where a district states a minimum
+            floors: Desired number of floors
+            footprint_m2: Desired building footprint
+            use_code: Only districts where this use is compatible
+        
+        Returns:
+            Districts not ruled out, with their maximum buildable envelope:
+            [{"code", "name", "status", "unknown_limits", "max_footprint_m2",
+              "max_floors", "max_floor_area_m2", "max_units"}, ...];
+            status is "compliant" or "unknown" (unknown_limits lists the
+            unstated columns). Envelope values are None when unlimited
+            ("Sin límite", no density limit) or not stated.
+        """
+        columns = self.district_columns
+        consulted = ["min_lot_m2", "max_floors", "max_coverage_pct"]
+        if frontage_m is not None:
+            consulted.append("min_frontage_m")
+        unstated = np.stack([np.isnan(columns[column]) for column in consulted])
+        
+        max_floors = columns["max_floors"]
+        max_footprint = lot_area_m2 * np.minimum(columns["max_coverage_pct"], 100.0) / 100.0
+        # Comparisons against unstated limits (NaN) are False: they rule
+        # nothing out, and the district is reported as unknown instead
+        ruled_out = lot_area_m2 < columns["min_lot_m2"]
+        if frontage_m is not None:
+            ruled_out |= frontage_m < columns["min_frontage_m"]
+        if floors is not None:
+            ruled_out |= floors > max_floors
+        if footprint_m2 is not None:
+            ruled_out |= footprint_m2 > max_footprint
+        candidates = ~ruled_out
+        if use_code is not None:
+            row = self.use_index.get(use_code)
+            if row is None:
+                return []
+            candidates &= self.compatibility[row, self._district_zone_columns]
+        
+        with np.errstate(invalid="ignore"):
+            max_floor_area = max_footprint * max_floors
+        max_units = np.floor(lot_area_m2 / 10000.0 * columns["max_density_per_ha"])
+        
+        def finite(value: float) -> Optional[float]:
+            return None if math.isnan(value) or math.isinf(value) else float(value)
+        
+        results = []
+        for i in np.flatnonzero(candidates):
+            unknown_limits = [column for column, missing in zip(consulted, unstated[:, i]) if missing]
+            results.append({
+                "code": self.district_codes[i],
+                "name": self._districts_by_code[self.district_codes[i]]["name_es"],
+                "status": "unknown" if unknown_limits else "compliant",
+                "unknown_limits": unknown_limits,
+                "max_footprint_m2": finite(round(max_footprint[i], 2)),
+                "max_floors": finite(max_floors[i]),
+                "max_floor_area_m2": finite(round(max_floor_area[i], 2)),
+                "max_units": finite(max_units[i])
+            })
+        return results
+    
+    def find_uso(self, text: str) -> Optional[str]:
+        """
+        Specific use named by a text: exact (accent/case-insensitive) name, or
+        the most specific use all of whose words appear in the text
+        ("Vivienda unifamiliar principal" -> "Vivienda unifamiliar")
+        """
+        usos = self.matching_usos(text)
+        return usos[0] if usos else None
+    
+    def matching_usos(self, text: str) -> List[str]:
+        """
+        Every specific use a text names: the exact name, or else each use all
+        of whose words appear in the text, most specific first
+        ("Oficina profesional de abogados" -> "Oficinas profesionales", "Oficinas")
+        """
+        key = normalize_use_name(text)
+        if key in self._uso_display:
+            return [self._uso_display[key]]
+        words = set(tokenize(text))
+        matches = [key for key, tokens in self._uso_tokens.items() if tokens and tokens <= words]
+        matches.sort(key=lambda key: len(self._uso_tokens[key]), reverse=True)
+        return [self._uso_display[key] for key in matches]
+    
+    def uso_districts_mask(self, name: str) -> int:
+        """Bitset of districts allowing a specific use (0 if unknown)"""
+        uso = self.find_uso(name)
+        return self._uso_masks[normalize_use_name(uso)] if uso else 0
+    
+    def districts_for_uso(self, name: str) -> List[str]:
+        """Districts where a specific use ("Alojamiento corto plazo") is allowed"""
+        return self._mask_districts(self.uso_districts_mask(name))
+    
+    def districts_for_usos(self, names: List[str]) -> List[str]:
+        """Districts where every one of several specific uses is allowed"""
+        mask = -1
+        for name in names:
+            mask &= self.uso_districts_mask(name)
+        return self._mask_districts(mask) if names else []
+    
+    def is_uso_allowed(self, name: str, zone_code: str) -> Optional[bool]:
+        """Whether a specific use is allowed in a district; None if the use is unknown"""
+        mask = self.uso_districts_mask(name)
+        if not mask:
+            return None
+        return bool(mask & self.uso_district_bit.get(zone_code, 0))
+    
+    def usos_for_zone(self, zone_code: str) -> List[str]:
+        """Every specific use allowed in a district"""
+        bit = self.uso_district_bit.get(zone_code, 0)
+        return [self._uso_display[key] for key, mask in self._uso_masks.items() if mask & bit]
+    
+    def _mask_districts(self, mask: int) -> List[str]:
+        return [code for code, bit in self.uso_district_bit.items() if mask & bit]
     
     def get_tomo6_rules(self) -> Dict:
         """Get Tomo 6 validation rules"""
         return self.tomo6_rules["tomo6_rules"]
+
+
+
+def load_rules_database(snapshot_path: Path = DEFAULT_SNAPSHOT_PATH) -> RulesDatabase:
+    """
+    RulesDatabase from the compiled snapshot, recompiling it first when it is
+    missing or older than the JSON sources
+    """
+    sources = source_fingerprint(RulesDatabase.source_paths())
+    try:
+        snapshot = read_snapshot(snapshot_path)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Unreadable rules snapshot {snapshot_path}: {e}")
+        snapshot = None
+    
+    if (snapshot is None or snapshot.sources != sources
+            or snapshot.index.get("index_version") != INDEX_VERSION):
+        db = RulesDatabase()
+        try:
+            db.write_snapshot(snapshot_path, sources)
+            snapshot = read_snapshot(snapshot_path)
+        except OSError as e:
+            # Read-only deployments still work, just without the snapshot
+            logger.warning(f"Could not write rules snapshot {snapshot_path}: {e}")
+            return db
+    
+    return RulesDatabase.from_snapshot(snapshot)
+
+
+class RulesWatcher:
+    """
+    Polls tomo6_rules.json and swaps in a recompiled RulesDatabase when its
+    "version" changes; edits that keep the version are picked up at the next
+    start through the snapshot's source fingerprint
+    """
+    
+    def __init__(self, snapshot_path: Path = DEFAULT_SNAPSHOT_PATH, poll_interval: float = 5.0):
+        self.snapshot_path = snapshot_path
+        self.poll_interval = poll_interval
+        self.rules_path = DATA_DIR / SOURCE_FILES["tomo6_rules"]
+        self._mtime = self._current_mtime()
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="rules-watcher", daemon=True)
+            self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+    
+    def check(self) -> bool:
+        """One poll; True if a new rules version was swapped in"""
+        mtime = self._current_mtime()
+        if mtime == self._mtime:
+            return False
+        self._mtime = mtime
+        
+        try:
+            with open(self.rules_path, "r", encoding="utf-8") as f:
+                version = json.load(f)["tomo6_rules"].get("version")
+        except (OSError, ValueError, KeyError) as e:
+            # Half-written file; the next poll sees the finished one
+            logger.warning(f"Skipping unreadable {self.rules_path}: {e}")
+            self._mtime = None
+            return False
+        
+        current = _shared_database
+        if current is not None and version == current.version:
+            return False
+        
+        _set_shared_database(load_rules_database(self.snapshot_path))
+        logger.info(f"Rules reloaded: Tomo 6 version {version}")
+        return True
+    
+    def _current_mtime(self) -> Optional[int]:
+        try:
+            return self.rules_path.stat().st_mtime_ns
+        except OSError:
+            return None
+    
+    def _run(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"Rules reload failed: {e}")
+
+
+_shared_database: Optional[RulesDatabase] = None
+_shared_lock = threading.Lock()
+_watcher: Optional[RulesWatcher] = None
+
+
+def _set_shared_database(db: RulesDatabase):
+    global _shared_database
+    with _shared_lock:
+        _shared_database = db
+
+
+def get_rules_database(watch: bool = True) -> RulesDatabase:
+    """
+    Process-wide RulesDatabase over the mmap'd snapshot. Callers should ask
+    for it per request rather than keep it, so a hot-reloaded rules version
+    is picked up.
+    """
+    global _shared_database, _watcher
+    with _shared_lock:
+        if _shared_database is None:
+            _shared_database = load_rules_database()
+        if watch and _watcher is None:
+            _watcher = RulesWatcher()
+            _watcher.start()
+        return _shared_database
+
+
+if __name__ == "__main__":
+    db = RulesDatabase()
+    db.write_snapshot()
+    print(f"Compiled Tomo 6 version {db.version} into {DEFAULT_SNAPSHOT_PATH}")
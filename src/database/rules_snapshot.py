@@ -0,0 +1,151 @@
+# Compiled rules snapshot: binary file format
+"""
+One file holding the regulation JSON documents plus RulesDatabase's
+prebuilt indexes, loaded with mmap so processes share the array pages.
+
+Layout:
+    8 bytes   magic b"PYXRULES"
+    4 bytes   format version (little-endian uint32)
+    8 bytes   header length (little-endian uint64)
+    header    UTF-8 JSON: rules version, source fingerprint, documents,
+              index metadata and {name: {dtype, shape, offset}} per array
+    arrays    raw little-endian array data, each aligned to 64 bytes
+"""
+
+import json
+import mmap
+import os
+import struct
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+MAGIC = b"PYXRULES"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+PREAMBLE = struct.Struct("<8sIQ")
+HEADER_KEYS = ("rules_version", "sources", "documents", "index", "arrays")
+
+
+def source_fingerprint(paths: List[Path]) -> Dict[str, List[int]]:
+    """(mtime_ns, size) of each source file; any edit changes it"""
+    fingerprint = {}
+    for path in paths:
+        stat = Path(path).stat()
+        fingerprint[Path(path).name] = [stat.st_mtime_ns, stat.st_size]
+    return fingerprint
+
+
+def _aligned(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def write_snapshot(
+    path: Path,
+    rules_version: str,
+    sources: Dict,
+    documents: Dict[str, Dict],
+    index: Dict,
+    arrays: Dict[str, np.ndarray]
+):
+    """
+    Write a snapshot atomically (temporary file + rename), so readers and
+    concurrent writers never see a partial file
+    """
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+
+    # Array offsets are relative to the first aligned byte after the header
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        offset = _aligned(offset)
+        layout[name] = {"dtype": array.dtype.newbyteorder("<").str, "shape": list(array.shape), "offset": offset}
+        offset += array.nbytes
+
+    header = json.dumps({
+        "rules_version": rules_version,
+        "built_at": datetime.now().isoformat(),
+        "sources": sources,
+        "documents": documents,
+        "index": index,
+        "arrays": layout
+    }, ensure_ascii=False).encode("utf-8")
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header)))
+        f.write(header)
+        data_start = _aligned(PREAMBLE.size + len(header))
+        for name, array in arrays.items():
+            f.write(b"\0" * (data_start + layout[name]["offset"] - f.tell()))
+            f.write(array.astype(layout[name]["dtype"], copy=False).tobytes())
+    os.replace(tmp_path, path)
+
+
+class RulesSnapshot:
+    """A mapped snapshot file; arrays are read-only views over the mapping"""
+
+    def __init__(self, header: Dict, arrays: Dict[str, np.ndarray], mapping: mmap.mmap):
+        self.header = header
+        self.arrays = arrays
+        self._mapping = mapping
+
+    @property
+    def rules_version(self) -> str:
+        return self.header["rules_version"]
+
+    @property
+    def sources(self) -> Dict:
+        return self.header["sources"]
+
+    @property
+    def documents(self) -> Dict[str, Dict]:
+        return self.header["documents"]
+
+    @property
+    def index(self) -> Dict:
+        return self.header["index"]
+
+
+def read_snapshot(path: Path) -> Optional[RulesSnapshot]:
+    """
+    Map a snapshot file; None if it is missing or not a snapshot of this
+    format. Raises ValueError for a truncated or malformed one.
+    """
+    path = Path(path)
+    if not path.exists():
+        return None
+
+    with open(path, "rb") as f:
+        try:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return None
+
+    if len(mapping) < PREAMBLE.size:
+        return None
+    magic, format_version, header_length = PREAMBLE.unpack_from(mapping, 0)
+    if magic != MAGIC or format_version != FORMAT_VERSION:
+        return None
+
+    header = json.loads(mapping[PREAMBLE.size:PREAMBLE.size + header_length].decode("utf-8"))
+    missing = [key for key in HEADER_KEYS if not isinstance(header, dict) or key not in header]
+    if missing:
+        raise ValueError(f"Malformed snapshot header, missing {', '.join(missing)}")
+
+    data_start = _aligned(PREAMBLE.size + header_length)
+    arrays = {}
+    try:
+        for name, spec in header["arrays"].items():
+            dtype = np.dtype(spec["dtype"])
+            count = int(np.prod(spec["shape"], dtype=np.int64))
+            arrays[name] = np.frombuffer(
+                mapping, dtype=dtype, count=count, offset=data_start + spec["offset"]
+            ).reshape(spec["shape"])
+    except (KeyError, TypeError, AttributeError) as e:
+        raise ValueError(f"Malformed snapshot array spec: {e!r}") from e
+    return RulesSnapshot(header, arrays, mapping)
@@ -0,0 +1,191 @@
+# Ranked text search over use names
+"""
+Inverted index for finding uses by name. Text is accent-folded, stop words
+are dropped and each word is reduced with a light Spanish stemmer, so
+"Panaderías", "panaderia" and "PANADERÍA" land on the same posting list.
+Query words with no exact stem fall back to the stems they prefix ("rest"
+while typing) and to the closest stems by trigram similarity, which absorbs
+typos ("restaurnte").
+"""
+
+import math
+import re
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from src.utils.address_normalizer import fold_accents
+
+STOP_WORDS = {
+    "a", "al", "con", "de", "del", "el", "en", "la", "las", "lo", "los", "o", "para", "por",
+    "sin", "su", "un", "una", "y", "and", "for", "of", "or", "the"
+}
+
+# Longest first; each is only stripped when a stem of 3+ letters remains
+SUFFIXES = ("amientos", "imientos", "amiento", "imiento", "es", "s", "a", "o", "e")
+
+# Minimum Dice similarity for a vocabulary stem to stand in for a query word
+FUZZY_THRESHOLD = 0.7
+FUZZY_CANDIDATES = 3
+
+# Shortest query word expanded to the stems it prefixes, and their weight
+PREFIX_MIN_LENGTH = 3
+PREFIX_SIMILARITY = 0.5
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def stem_es(word: str) -> str:
+    """Light Spanish stemmer: plural and gender endings, -miento nouns"""
+    for suffix in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)]
+            # "panaderias" -> "panaderia" -> "panaderi"
+            if suffix in ("es", "s") and len(word) > 3 and word[-1] in "aoe":
+                word = word[:-1]
+            return word
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """Folded, stemmed content words of a text"""
+    return [
+        stem_es(word) for word in WORD_PATTERN.findall(fold_accents(text))
+        if word not in STOP_WORDS
+    ]
+
+
+def normalize_use_name(name: str) -> str:
+    """Lookup key for a use name: "Micro Casas (tiny houses)" -> "micro casas tiny houses" """
+    return " ".join(WORD_PATTERN.findall(fold_accents(name)))
+
+
+def _trigrams(term: str) -> Set[str]:
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TextIndex:
+    """
+    Field-weighted inverted index over arbitrary documents
+
+    Each document is added with {field text: weight}; a stem scores the
+    highest weight among the fields it appears in, times its idf.
+    """
+
+    def __init__(self):
+        self.documents: List[Dict] = []
+        self._postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        # Built on the first fuzzy lookup when loaded from arrays
+        self._stems_by_trigram: Optional[Dict[str, Set[str]]] = defaultdict(set)
+    
+    @classmethod
+    def from_arrays(
+        cls,
+        documents: List[Dict],
+        stems: List[str],
+        offsets: np.ndarray,
+        doc_ids: np.ndarray,
+        weights: np.ndarray
+    ) -> "TextIndex":
+        """Index over posting lists stored by to_arrays()"""
+        index = cls()
+        index.documents = documents
+        doc_ids, weights = doc_ids.tolist(), weights.tolist()
+        bounds = offsets.tolist()
+        for i, stem in enumerate(stems):
+            start, end = bounds[i], bounds[i + 1]
+            index._postings[stem] = dict(zip(doc_ids[start:end], weights[start:end]))
+        index._stems_by_trigram = None
+        return index
+    
+    def to_arrays(self) -> Tuple[List[str], Dict[str, np.ndarray]]:
+        """
+        Stem vocabulary and posting lists in CSR form: the postings of
+        stems[i] are doc_ids/weights[offsets[i]:offsets[i + 1]]
+        """
+        stems = list(self._postings)
+        lengths = [len(self._postings[stem]) for stem in stems]
+        offsets = np.zeros(len(stems) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        doc_ids = np.fromiter(
+            (doc_id for stem in stems for doc_id in self._postings[stem]), dtype=np.int32, count=int(offsets[-1])
+        )
+        weights = np.fromiter(
+            (weight for stem in stems for weight in self._postings[stem].values()), dtype=np.float64, count=int(offsets[-1])
+        )
+        return stems, {"offsets": offsets, "doc_ids": doc_ids, "weights": weights}
+    
+    def add(self, document: Dict, fields: Dict[str, float]):
+        """Index a document under the weighted texts that describe it"""
+        doc_id = len(self.documents)
+        self.documents.append(document)
+        for text, weight in fields.items():
+            for stem in tokenize(text or ""):
+                postings = self._postings[stem]
+                if weight > postings.get(doc_id, 0.0):
+                    if not postings and self._stems_by_trigram is not None:
+                        for gram in _trigrams(stem):
+                            self._stems_by_trigram[gram].add(stem)
+                    postings[doc_id] = weight
+    
+    def search(self, query: str, limit: int = 10, kind: Optional[str] = None) -> List[Dict]:
+        """
+        Documents matching a query, best first
+
+        Args:
+            query: Free text in Spanish or English
+            limit: Maximum number of results
+            kind: Only documents whose "kind" equals this
+
+        Returns:
+            [{"document": {...}, "score": float}, ...]
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        scores: Dict[int, float] = defaultdict(float)
+        matched: Dict[int, int] = defaultdict(int)
+        for term in terms:
+            for stem, similarity in self._expand(term):
+                idf = math.log(1 + len(self.documents) / len(self._postings[stem]))
+                for doc_id, weight in self._postings[stem].items():
+                    scores[doc_id] += idf * weight * similarity
+                    matched[doc_id] += 1
+
+        # Documents covering more of the query rank above single-word hits
+        results = [
+            {"document": self.documents[doc_id], "score": score * min(matched[doc_id], len(terms)) / len(terms)}
+            for doc_id, score in scores.items()
+            if kind is None or self.documents[doc_id].get("kind") == kind
+        ]
+        results.sort(key=lambda result: result["score"], reverse=True)
+        return results[:limit]
+
+    def _expand(self, term: str) -> List[tuple]:
+        """(stem, similarity) pairs a query term matches"""
+        if term in self._postings:
+            return [(term, 1.0)]
+
+        if self._stems_by_trigram is None:
+            stems_by_trigram = defaultdict(set)
+            for stem in self._postings:
+                for gram in _trigrams(stem):
+                    stems_by_trigram[gram].add(stem)
+            self._stems_by_trigram = stems_by_trigram
+        
+        grams = _trigrams(term)
+        shared: Dict[str, int] = defaultdict(int)
+        for gram in grams:
+            for stem in self._stems_by_trigram.get(gram, ()):
+                shared[stem] += 1
+        candidates = {}
+        for stem, count in shared.items():
+            similarity = 2 * count / (len(grams) + len(_trigrams(stem)))
+            if similarity >= FUZZY_THRESHOLD:
+                candidates[stem] = similarity
+            elif len(term) >= PREFIX_MIN_LENGTH and stem.startswith(term):
+                candidates[stem] = PREFIX_SIMILARITY
+        return sorted(candidates.items(), key=lambda c: c[1], reverse=True)[:FUZZY_CANDIDATES]
@@ -4,40 +4,636 @@ Queries zoning (Calificación), parcels (CRIM), and overlay zones
 """
 
 import requests
-import math
-from typing import Dict, Optional, Tuple
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextvars import copy_context
+from typing import Callable, Dict, List, Optional, Tuple
 import os
+import re
 
-class ArcGISPRClient:
-    """Client for Puerto Rico GIS services (MIPR and CRIM)"""
+import numpy as np
+
+from src.services.layer_catalog import DEFAULT_CATALOG_PATH, get_layer_catalog, get_schema_resolver
+from src.services.lookup_cache import LookupCache, ParcelIndex, get_default_cache, get_default_parcel_index
+from src.services.municipality_index import PR_BOUNDS, MunicipalityIndex
+from src.services.offline_zoning import OfflineZoningIndex, get_default_offline_zoning
+from src.services.resilience import (
+    CircuitOpenError, DeadlineExceededError, ResiliencePolicy, deadline_scope, get_default_policy,
+    remaining_time
+)
+from src.utils.geo_projection import (
+    grid_cells, lat_lng_to_web_mercator, points_to_web_mercator, web_mercator_to_lat_lng
+)
+from src.utils.geometry import distance_to_rings, interior_point, point_in_rings, rings_bbox
+
+
+class ArcGISPRBase:
+    """
+    Endpoints, query building and response parsing shared by the sync
+    (requests) and async (httpx) GIS clients. Holds no connection state.
+    """
     
     # Service endpoints
     CALIFICACION_URL = "https://sige.pr.gov/server/rest/services/MIPR/Calificacion/MapServer/0/query"
     REGLAMENTARIO_URL = "https://sige.pr.gov/server/rest/services/MIPR/Reglamentario/MapServer"
     CRIM_PARCELAS_URL = "https://sigejp.pr.gov/server/rest/services/crim/crim_parcelas/MapServer/0/query"
     
-    # Known overlay layer IDs in Reglamentario MapServer
+    # Where the discovered Reglamentario layer catalog is persisted (None: memory only)
+    LAYER_CATALOG_PATH = DEFAULT_CATALOG_PATH
+    
+    # Known overlay layer IDs in Reglamentario MapServer. The rest are
+    # discovered from the service metadata (see layer_catalog); these are
+    # the fallback when that metadata cannot be read.
     OVERLAY_LAYERS = {
-        "zona_historica": None,  # Will be discovered dynamically
+        "zona_historica": None,
         "zona_costanera": None,
         "area_inundacion": None,
         "fema": 32  # Known layer ID for FEMA flood maps
     }
     
-    def __init__(self, timeout: int = 15):
-        self.timeout = timeout
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Pyxten/1.0',
-            'Accept': 'application/json'
-        })
+    HEADERS = {
+        'User-Agent': 'Pyxten/1.0',
+        'Accept': 'application/json'
+    }
+    
+    # Attribute names seen for each value, in order of preference
+    # (matched case-insensitively)
+    ZONING_FIELDS = {
+        "district_code": ("CALIFICACION", "Calificacion", "DISTRITO", "Distrito", "CODIGO", "Codigo", "COD_CALIF"),
+        "district_name": ("DESCRIPCION", "Descripcion", "NOMBRE", "Nombre", "DESC_CALIF")
+    }
+    PARCEL_FIELDS = {
+        "catastro": ("NUM_CATASTRO", "CATASTRO", "Catastro", "NUMERO", "NUM_CAT", "FINCA"),
+        "municipality": ("MUNICIPIO", "Municipio", "MUN"),
+        "barrio": ("BARRIO", "Barrio")
+    }
+    OVERLAY_FIELDS = {
+        "details": ("NOMBRE", "NAME", "DESCRIPCION", "TIPO", "ZONA", "FLD_ZONE", "ZONE_SUBTY", "SFHA_TF")
+    }
+    
+    # Keep the full attribute dict of each feature in "raw_data"
+    keep_raw_data = False
+    
+    # Generalization tolerance (meters) for parcel polygons fetched for the
+    # parcel index; 1 m keeps point-in-parcel tests exact enough for a lot
+    PARCEL_GEOMETRY_OFFSET = 1.0
+    
+    # validate_location's HTTP attempts give up this many seconds (at most a
+    # quarter of the deadline) before its final wait, so a layer cut off by
+    # the deadline is always reported as missing the deadline
+    DEADLINE_GRACE = 0.2
+    
+    # Local answers, set by _init_local_lookups
+    cache: Optional[LookupCache] = None
+    parcels: Optional[ParcelIndex] = None
+    offline_zoning: Optional[OfflineZoningIndex] = None
+    
+    def _init_local_lookups(
+        self,
+        cache: Optional[LookupCache],
+        use_cache: bool,
+        offline_zoning: Optional[OfflineZoningIndex],
+        use_offline_zoning: bool,
+        parcel_index: Optional[ParcelIndex]
+    ):
+        """Lookup cache, parcel index and Calificación snapshot (see the client __init__ args)"""
+        # An empty ParcelIndex is falsy, so "or" would swap it for the default
+        if use_cache:
+            self.cache = cache if cache is not None else get_default_cache()
+            self.parcels = parcel_index if parcel_index is not None else get_default_parcel_index()
+        if use_offline_zoning:
+            self.offline_zoning = offline_zoning if offline_zoning is not None else get_default_offline_zoning()
+    
+    def _lookup_budget(self, deadline: float) -> float:
+        """deadline_scope for validate_location's lookups, ending DEADLINE_GRACE early"""
+        return deadline - min(self.DEADLINE_GRACE, deadline / 4)
     
     def _lat_lng_to_web_mercator(self, lat: float, lng: float) -> Tuple[float, float]:
         """Convert WGS84 (lat/lng) to Web Mercator (EPSG:3857)"""
-        x = lng * 20037508.34 / 180
-        y = math.log(math.tan((90 + lat) * math.pi / 360)) / (math.pi / 180)
-        y = y * 20037508.34 / 180
-        return (x, y)
+        return lat_lng_to_web_mercator(lat, lng)
+    
+    def _point_query_params(self, x: float, y: float, out_fields: str = "*") -> Dict:
+        """Query parameters for a 10 m intersect search around a Web Mercator point"""
+        return {
+            "geometry": f"{x},{y}",
+            "geometryType": "esriGeometryPoint",
+            "inSR": "3857",
+            "spatialRel": "esriSpatialRelIntersects",
+            "distance": 10,
+            "units": "esriSRUnit_Meter",
+            "outFields": out_fields,
+            "returnGeometry": "false",
+            "f": "json"
+        }
+    
+    def _out_fields(self, query_url: str, fields: Dict[str, Tuple[str, ...]]) -> str:
+        """
+        Projected outFields for a layer, resolved from its schema (blocking,
+        cached); every field when keep_raw_data asks for full attributes
+        """
+        if self.keep_raw_data:
+            return "*"
+        candidates = [name for names in fields.values() for name in names]
+        return get_schema_resolver().out_fields(query_url, candidates)
+    
+    @staticmethod
+    def _first_attribute(attrs: Dict, names: Tuple[str, ...]):
+        """First non-empty attribute among candidate names, ignoring case"""
+        by_upper = {key.upper(): value for key, value in attrs.items()}
+        for name in names:
+            value = by_upper.get(name.upper())
+            if value:
+                return value
+        return None
+    
+    def _overlay_query_url(self, layer_id: int) -> str:
+        return f"{self.REGLAMENTARIO_URL}/{layer_id}/query"
+    
+    def _overlay_layer_list(self) -> List[Tuple[str, int, str]]:
+        """(overlay type, layer ID, layer name) for every known overlay layer"""
+        fallback = {
+            "area_inundacion": [{"id": self.OVERLAY_LAYERS["fema"], "name": "FEMA Flood Zone"}]
+        }
+        
+        catalog = get_layer_catalog(self.REGLAMENTARIO_URL, fallback, self.LAYER_CATALOG_PATH)
+        return [
+            (overlay_type, layer["id"], layer["name"])
+            for overlay_type, layers in catalog.overlay_layers().items()
+            for layer in layers
+        ]
+    
+    @staticmethod
+    def _collect_overlays(
+        layers: List[Tuple[str, int, str]],
+        results: Dict[str, Dict]
+    ) -> Dict:
+        """
+        Build the get_overlay_zones result from per-layer query results keyed
+        by layer ID; layers without a result did not answer in time.
+        """
+        overlays_found = []
+        errors = []
+        
+        for overlay_type, layer_id, layer_name in layers:
+            layer_result = results.get(str(layer_id))
+            if layer_result is None:
+                errors.append(f"{layer_name} query timed out")
+            elif "found" not in layer_result:
+                errors.append(f"{layer_name} query failed: {layer_result.get('error')}")
+            elif layer_result["found"]:
+                overlays_found.append({
+                    "type": overlay_type,
+                    "name": layer_name,
+                    "details": layer_result.get("attributes", {})
+                })
+        
+        return {
+            "success": len(errors) == 0,
+            "overlays": overlays_found,
+            "error": "; ".join(errors) if errors else None
+        }
+    
+    # ------------------------------------------------------------------
+    # Zoning (MIPR Calificación)
+    # ------------------------------------------------------------------
+    
+    @staticmethod
+    def _zoning_result(
+        success: bool,
+        district_code: Optional[str] = None,
+        district_name: Optional[str] = None,
+        raw_data: Optional[Dict] = None,
+        error: Optional[str] = None,
+        source: str = "MIPR Calificacion"
+    ) -> Dict:
+        return {
+            "success": success,
+            "district_code": district_code,
+            "district_name": district_name,
+            "source": source,
+            "raw_data": raw_data,
+            "error": error
+        }
+    
+    def _parse_zoning_response(self, data: Dict) -> Dict:
+        """Turn a Calificación query response into a get_zoning_district result"""
+        if "error" in data:
+            return self._zoning_result(
+                False,
+                raw_data=data,
+                error=data["error"].get("message", "Unknown API error")
+            )
+        
+        features = data.get("features", [])
+        
+        if not features:
+            return self._zoning_result(
+                False,
+                raw_data=data,
+                error="No zoning data found at this location"
+            )
+        
+        # Extract attributes from first feature
+        return self._zoning_from_attributes(features[0].get("attributes", {}))
+    
+    def _zoning_from_attributes(self, attrs: Dict) -> Dict:
+        """Build a successful zoning result from one Calificación feature"""
+        
+        return self._zoning_result(
+            True,
+            district_code=self._first_attribute(attrs, self.ZONING_FIELDS["district_code"]),
+            district_name=self._first_attribute(attrs, self.ZONING_FIELDS["district_name"]),
+            raw_data=attrs if self.keep_raw_data else None
+        )
+    
+    # ------------------------------------------------------------------
+    # Parcels (CRIM)
+    # ------------------------------------------------------------------
+    
+    @staticmethod
+    def _parcel_result(
+        success: bool,
+        catastro: Optional[str] = None,
+        municipality: Optional[str] = None,
+        barrio: Optional[str] = None,
+        raw_data: Optional[Dict] = None,
+        error: Optional[str] = None
+    ) -> Dict:
+        return {
+            "success": success,
+            "catastro": catastro,
+            "municipality": municipality,
+            "barrio": barrio,
+            "raw_data": raw_data,
+            "error": error
+        }
+    
+    def _parse_parcel_response(self, data: Dict) -> Dict:
+        """Turn a CRIM parcels query response into a get_parcel_info result"""
+        if "error" in data:
+            return self._parcel_result(
+                False,
+                raw_data=data,
+                error=data["error"].get("message", "Unknown API error")
+            )
+        
+        features = data.get("features", [])
+        
+        if not features:
+            return self._parcel_result(
+                False,
+                raw_data=data,
+                error="No parcel data found at this location"
+            )
+        
+        return self._parcel_from_attributes(features[0].get("attributes", {}))
+    
+    def _parcel_from_attributes(self, attrs: Dict) -> Dict:
+        """Build a successful parcel result from one CRIM feature"""
+        
+        return self._parcel_result(
+            True,
+            catastro=self._first_attribute(attrs, self.PARCEL_FIELDS["catastro"]),
+            municipality=self._first_attribute(attrs, self.PARCEL_FIELDS["municipality"]),
+            barrio=self._first_attribute(attrs, self.PARCEL_FIELDS["barrio"]),
+            raw_data=attrs if self.keep_raw_data else None
+        )
+    
+    # ------------------------------------------------------------------
+    # Overlays (MIPR Reglamentario)
+    # ------------------------------------------------------------------
+    
+    @staticmethod
+    def _parse_overlay_response(data: Dict) -> Dict:
+        """Reduce an overlay layer query response to found/attributes"""
+        features = data.get("features", [])
+        
+        if features:
+            return {
+                "found": True,
+                "attributes": features[0].get("attributes", {})
+            }
+        
+        return {"found": False, "attributes": {}}
+    
+    # ------------------------------------------------------------------
+    # Local answers: Calificación snapshot, lookup cache, parcel index
+    # ------------------------------------------------------------------
+    
+    def _local_zoning(self, x: float, y: float) -> Optional[Dict]:
+        """
+        Zoning result from the local snapshot, or None when there is none
+        or it has no polygon at the point. Answers in well under a
+        millisecond and keeps working when sige.pr.gov is down.
+        """
+        if self.offline_zoning is None:
+            return None
+        local = self.offline_zoning.lookup(x, y)
+        if local is None:
+            return None
+        return self._zoning_result(
+            True,
+            district_code=local["district_code"],
+            district_name=local["district_name"],
+            source="MIPR Calificacion (local snapshot)"
+        )
+    
+    @staticmethod
+    def _parcel_key(catastro: str) -> str:
+        return f"parcel:{catastro}"
+    
+    def _parcel_cache_hit(self, layer: str, x: float, y: float) -> Tuple[Optional[Dict], Optional[str], str]:
+        """
+        (cached result of the recently seen parcel containing the point or
+        None, that parcel's catastro or None, the point's grid cell key)
+        """
+        catastro = self.parcels.locate(x, y) if self.parcels is not None else None
+        if catastro is not None:
+            hit = self.cache.get(layer, self._parcel_key(catastro))
+            if hit is not None:
+                return hit, catastro, None
+        return None, catastro, self.cache.cell_key(x, y)
+    
+    def _settle_cached(self, layer: str, key: str, catastro: Optional[str], value: Dict) -> Dict:
+        """
+        Share a good grid-cell result with the point's parcel; for a failed
+        one (service down, circuit open) serve an expired entry if any
+        """
+        if value.get("success", True) and not value.get("error"):
+            if catastro is not None:
+                self.cache.set(layer, self._parcel_key(catastro), value)
+            return value
+        return self.cache.get(layer, key, allow_stale=True) or value
+    
+    def _share_with_parcel(self, x: float, y: float, layers: List[str]):
+        """
+        Copy this point's cached lookups to the parcel it falls in, once the
+        parcel polygon is known (the parcel query runs alongside the others,
+        so on a first visit their results are only keyed by grid cell).
+        """
+        if self.cache is None or self.parcels is None:
+            return
+        catastro = self.parcels.locate(x, y)
+        if catastro is None:
+            return
+        
+        key = self.cache.cell_key(x, y)
+        for layer in layers:
+            value = self.cache.get(layer, key)
+            if value is not None:
+                self.cache.set(layer, self._parcel_key(catastro), value)
+    
+    def _parcel_point_params(self, x: float, y: float, out_fields: str) -> Dict:
+        """Parcel point query; with a parcel index the outlines come back too"""
+        params = self._point_query_params(x, y, out_fields)
+        if self.parcels is not None:
+            # A simplified outline lets later points in the same lot
+            # be matched locally
+            params.update({
+                "returnGeometry": "true",
+                "maxAllowableOffset": self.PARCEL_GEOMETRY_OFFSET,
+                "outSR": "3857"
+            })
+        return params
+    
+    def _parse_parcel_at(self, x: float, y: float, data: Dict) -> Dict:
+        """
+        get_parcel_info result for a _parcel_point_params response; the
+        parcel containing the point joins the parcel index
+        """
+        if self.parcels is None or "error" in data:
+            return self._parse_parcel_response(data)
+        
+        # The 10 m search also returns neighbouring lots; prefer the one
+        # that actually contains the point
+        features = data.get("features", [])
+        containing = [
+            feature for feature in features
+            if (feature.get("geometry") or {}).get("rings")
+            and point_in_rings(x, y, feature["geometry"]["rings"])
+        ]
+        result = self._parse_parcel_response({"features": containing or features})
+        if containing and result["catastro"]:
+            self.parcels.add(result["catastro"], containing[0]["geometry"]["rings"])
+        return result
+    
+    # ------------------------------------------------------------------
+    # Combined location result
+    # ------------------------------------------------------------------
+    
+    @staticmethod
+    def _outside_pr_location(lat: float, lng: float) -> Optional[Dict]:
+        """validate_location result for coordinates outside Puerto Rico, else None"""
+        # Bad geocodes never reach the GIS services
+        if MunicipalityIndex.in_puerto_rico(lat, lng):
+            return None
+        return {
+            "success": False,
+            "zoning": None,
+            "catastro": None,
+            "overlays": [],
+            "warnings": [],
+            "errors": [f"Coordinates ({lat}, {lng}) are outside Puerto Rico"]
+        }
+    
+    def _merge_location_results(self, results: Dict[str, Dict], deadline: float) -> Dict:
+        """
+        Combine zoning/parcel/overlay lookup results into the
+        validate_location shape. Missing entries are lookups that did not
+        answer before the deadline.
+        """
+        result = {
+            "success": False,
+            "zoning": None,
+            "catastro": None,
+            "overlays": [],
+            "warnings": [],
+            "errors": []
+        }
+        
+        deadline_error = {
+            "success": False,
+            "error": f"No response within {deadline}s deadline"
+        }
+        
+        # Get zoning district
+        zoning_result = results.get("zoning", deadline_error)
+        if zoning_result["success"]:
+            result["zoning"] = {
+                "code": zoning_result["district_code"],
+                "name": zoning_result["district_name"],
+                "source": zoning_result["source"]
+            }
+        else:
+            result["warnings"].append(f"Zoning lookup failed: {zoning_result['error']}")
+        
+        # Get parcel/catastro info
+        parcel_result = results.get("parcel", deadline_error)
+        if parcel_result["success"]:
+            result["catastro"] = {
+                "number": parcel_result["catastro"],
+                "municipality": parcel_result["municipality"],
+                "barrio": parcel_result["barrio"]
+            }
+        else:
+            result["warnings"].append(f"Catastro lookup failed: {parcel_result['error']}")
+        
+        # Get overlay zones
+        overlay_result = results.get("overlays", deadline_error)
+        result["overlays"] = overlay_result.get("overlays", [])
+        if overlay_result.get("error"):
+            result["warnings"].append(f"Overlay lookup partial: {overlay_result['error']}")
+        
+        # Consider success if we got at least zoning OR catastro
+        result["success"] = (result["zoning"] is not None or result["catastro"] is not None)
+        
+        return result
+
+
+class ArcGISPRClient(ArcGISPRBase):
+    """Client for Puerto Rico GIS services (MIPR and CRIM)"""
+    
+    # Worker threads used to fan out independent layer queries
+    MAX_WORKERS = 8
+    
+    def __init__(
+        self,
+        timeout: int = 15,
+        max_workers: int = MAX_WORKERS,
+        cache: Optional[LookupCache] = None,
+        use_cache: bool = True,
+        offline_zoning: Optional[OfflineZoningIndex] = None,
+        use_offline_zoning: bool = True,
+        keep_raw_data: bool = False,
+        resilience: Optional[ResiliencePolicy] = None,
+        parcel_index: Optional[ParcelIndex] = None
+    ):
+        """
+        Args:
+            timeout: Per-request timeout in seconds
+            max_workers: Threads used for concurrent layer queries
+            cache: Lookup cache to use; defaults to the shared process-wide
+                cache (memory LRU + SQLite)
+            use_cache: Set to False to always query the live services
+            offline_zoning: Local Calificación snapshot used to answer zoning
+                lookups; defaults to the synced snapshot when one exists
+            use_offline_zoning: Set to False to ignore the local snapshot
+            keep_raw_data: Keep each feature's attributes in "raw_data"
+                (off by default to keep results small in session state)
+            resilience: Retry/hedging/circuit-breaker policy; defaults to the
+                process-wide policy so breakers see all traffic to a host
+            parcel_index: Recently seen parcel polygons used to cache lookups
+                per parcel; defaults to the shared index (only with a cache)
+        """
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.keep_raw_data = keep_raw_data
+        self.resilience = resilience or get_default_policy()
+        self._init_local_lookups(cache, use_cache, offline_zoning, use_offline_zoning, parcel_index)
+        self.session = requests.Session()
+        self.session.headers.update(self.HEADERS)
+        self._executors = {}
+        self._executor_lock = threading.Lock()
+    
+    def _get_executor(self, pool: str = "lookups") -> ThreadPoolExecutor:
+        """
+        Lazily create a named thread pool. Overlay layer queries get their
+        own pool because they are fanned out from inside a "lookups" task.
+        """
+        with self._executor_lock:
+            if pool not in self._executors:
+                self._executors[pool] = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix=f"arcgis-pr-{pool}"
+                )
+            return self._executors[pool]
+    
+    def _fan_out(
+        self,
+        calls: Dict[str, Callable[[], Dict]],
+        deadline: Optional[float],
+        pool: str = "lookups"
+    ) -> Tuple[Dict[str, Dict], List[str]]:
+        """
+        Run independent lookups concurrently under a single overall deadline
+        
+        Returns:
+            (results by name for the calls that finished, names still pending)
+            Pending calls are left to finish in the background, within the
+            caller's deadline_scope; their results are discarded. Calls cut
+            short by the deadline_scope count as pending.
+        """
+        executor = self._get_executor(pool)
+        futures = {executor.submit(copy_context().run, fn): name for name, fn in calls.items()}
+        done, pending = wait(futures, timeout=deadline)
+        
+        results = {}
+        for future in done:
+            try:
+                results[futures[future]] = future.result()
+            except DeadlineExceededError:
+                pending.add(future)
+            except Exception as e:
+                results[futures[future]] = {
+                    "success": False,
+                    "error": f"Unexpected error: {str(e)}"
+                }
+        
+        for future in pending:
+            future.cancel()
+        
+        return results, [futures[future] for future in pending]
+    
+    def close(self):
+        """Release the HTTP session and worker threads"""
+        with self._executor_lock:
+            for executor in self._executors.values():
+                executor.shutdown(wait=False, cancel_futures=True)
+            self._executors = {}
+        self.session.close()
+    
+    def _get_json(self, url: str, params: Dict) -> Dict:
+        def request(timeout: float):
+            response = self.session.get(url, params=params, timeout=timeout)
+            response.raise_for_status()
+            return response.json()
+        
+        return self.resilience.call(url, request, self.timeout)
+    
+    def _post_json(self, url: str, data: Dict) -> Dict:
+        """Form-encoded POST, for queries too large for a query string"""
+        def request(timeout: float):
+            response = self.session.post(url, data=data, timeout=timeout)
+            response.raise_for_status()
+            return response.json()
+        
+        return self.resilience.call(url, request, self.timeout)
+    
+    def _cached(self, layer: str, x: float, y: float, fetch: Callable[[], Dict]) -> Dict:
+        """
+        Answer from the lookup cache when possible; only successful lookups
+        are stored. A point inside a recently seen parcel reuses that
+        parcel's results, otherwise the grid cell's. When the live lookup
+        fails (service down, circuit open) an expired cache entry is served
+        rather than nothing.
+        """
+        if self.cache is None:
+            return fetch()
+        
+        hit, catastro, key = self._parcel_cache_hit(layer, x, y)
+        if hit is not None:
+            return hit
+        
+        try:
+            value = self.cache.get_or_fetch(layer, key, fetch)
+        except Exception:
+            stale = self.cache.get(layer, key, allow_stale=True)
+            if stale is None:
+                raise
+            return stale
+        
+        return self._settle_cached(layer, key, catastro, value)
     
     def get_zoning_district(self, lat: float, lng: float) -> Dict:
         """
@@ -59,107 +655,30 @@ class ArcGISPRClient:
         """
         x, y = self._lat_lng_to_web_mercator(lat, lng)
         
-        params = {
-            "geometry": f"{x},{y}",
-            "geometryType": "esriGeometryPoint",
-            "inSR": "3857",
-            "spatialRel": "esriSpatialRelIntersects",
-            "distance": 10,
-            "units": "esriSRUnit_Meter",
-            "outFields": "*",
-            "returnGeometry": "false",
-            "f": "json"
-        }
+        # Fall back to the live layer if the local snapshot misses
+        local = self._local_zoning(x, y)
+        if local is not None:
+            return local
         
+        return self._cached("zoning", x, y, lambda: self._fetch_zoning_district(x, y))
+    
+    def _fetch_zoning_district(self, x: float, y: float) -> Dict:
+        """Live Calificación query for a Web Mercator point"""
         try:
-            response = self.session.get(
-                self.CALIFICACION_URL,
-                params=params,
-                timeout=self.timeout
-            )
-            response.raise_for_status()
-            data = response.json()
-            
-            if "error" in data:
-                return {
-                    "success": False,
-                    "district_code": None,
-                    "district_name": None,
-                    "source": "MIPR Calificacion",
-                    "raw_data": data,
-                    "error": data["error"].get("message", "Unknown API error")
-                }
-            
-            features = data.get("features", [])
-            
-            if not features:
-                return {
-                    "success": False,
-                    "district_code": None,
-                    "district_name": None,
-                    "source": "MIPR Calificacion",
-                    "raw_data": data,
-                    "error": "No zoning data found at this location"
-                }
-            
-            # Extract attributes from first feature
-            attrs = features[0].get("attributes", {})
-            
-            # Common field names in MIPR Calificación layer
-            district_code = (
-                attrs.get("CALIFICACION") or 
-                attrs.get("Calificacion") or
-                attrs.get("DISTRITO") or
-                attrs.get("Distrito") or
-                attrs.get("CODIGO") or
-                attrs.get("Codigo") or
-                attrs.get("COD_CALIF")
-            )
-            
-            district_name = (
-                attrs.get("DESCRIPCION") or
-                attrs.get("Descripcion") or
-                attrs.get("NOMBRE") or
-                attrs.get("Nombre") or
-                attrs.get("DESC_CALIF")
-            )
-            
-            return {
-                "success": True,
-                "district_code": district_code,
-                "district_name": district_name,
-                "source": "MIPR Calificacion",
-                "raw_data": attrs,
-                "error": None
-            }
-            
+            params = self._point_query_params(x, y, self._out_fields(self.CALIFICACION_URL, self.ZONING_FIELDS))
+            data = self._get_json(self.CALIFICACION_URL, params)
+            return self._parse_zoning_response(data)
+        
+        except CircuitOpenError as e:
+            return self._zoning_result(False, error=f"MIPR service unavailable: {str(e)}")
+        except DeadlineExceededError:
+            raise
         except requests.exceptions.Timeout:
-            return {
-                "success": False,
-                "district_code": None,
-                "district_name": None,
-                "source": "MIPR Calificacion",
-                "raw_data": None,
-                "error": "Timeout connecting to MIPR service"
-            }
+            return self._zoning_result(False, error="Timeout connecting to MIPR service")
         except requests.exceptions.RequestException as e:
-            return {
-                "success": False,
-                "district_code": None,
-                "district_name": None,
-                "source": "MIPR Calificacion",
-                "raw_data": None,
-                "error": f"Connection error: {str(e)}"
-            }
+            return self._zoning_result(False, error=f"Connection error: {str(e)}")
         except Exception as e:
-            return {
-                "success": False,
-                "district_code": None,
-                "district_name": None,
-                "source": "MIPR Calificacion",
-                "raw_data": None,
-                "error": f"Unexpected error: {str(e)}"
-            }
+            return self._zoning_result(False, error=f"Unexpected error: {str(e)}")
     
     def get_parcel_info(self, lat: float, lng: float) -> Dict:
         """
@@ -180,109 +699,25 @@ class ArcGISPRClient:
             }
         """
         x, y = self._lat_lng_to_web_mercator(lat, lng)
-        
-        params = {
-            "geometry": f"{x},{y}",
-            "geometryType": "esriGeometryPoint",
-            "inSR": "3857",
-            "spatialRel": "esriSpatialRelIntersects",
-            "distance": 10,
-            "units": "esriSRUnit_Meter",
-            "outFields": "*",
-            "returnGeometry": "false",
-            "f": "json"
-        }
-        
+        return self._cached("parcel", x, y, lambda: self._fetch_parcel_info(x, y))
+    
+    def _fetch_parcel_info(self, x: float, y: float) -> Dict:
+        """Live CRIM parcels query for a Web Mercator point"""
         try:
-            response = self.session.get(
-                self.CRIM_PARCELAS_URL,
-                params=params,
-                timeout=self.timeout
-            )
-            response.raise_for_status()
-            data = response.json()
-            
-            if "error" in data:
-                return {
-                    "success": False,
-                    "catastro": None,
-                    "municipality": None,
-                    "barrio": None,
-                    "raw_data": data,
-                    "error": data["error"].get("message", "Unknown API error")
-                }
-            
-            features = data.get("features", [])
-            
-            if not features:
-                return {
-                    "success": False,
-                    "catastro": None,
-                    "municipality": None,
-                    "barrio": None,
-                    "raw_data": data,
-                    "error": "No parcel data found at this location"
-                }
-            
-            attrs = features[0].get("attributes", {})
-            
-            # Common field names in CRIM parcels layer
-            catastro = (
-                attrs.get("NUM_CATASTRO") or
-                attrs.get("CATASTRO") or
-                attrs.get("Catastro") or
-                attrs.get("NUMERO") or
-                attrs.get("NUM_CAT") or
-                attrs.get("FINCA")
-            )
-            
-            municipality = (
-                attrs.get("MUNICIPIO") or
-                attrs.get("Municipio") or
-                attrs.get("MUN")
-            )
-            
-            barrio = (
-                attrs.get("BARRIO") or
-                attrs.get("Barrio")
-            )
-            
-            return {
-                "success": True,
-                "catastro": catastro,
-                "municipality": municipality,
-                "barrio": barrio,
-                "raw_data": attrs,
-                "error": None
-            }
-            
+            params = self._parcel_point_params(x, y, self._out_fields(self.CRIM_PARCELAS_URL, self.PARCEL_FIELDS))
+            data = self._get_json(self.CRIM_PARCELAS_URL, params)
+            return self._parse_parcel_at(x, y, data)
+        
+        except CircuitOpenError as e:
+            return self._parcel_result(False, error=f"CRIM service unavailable: {str(e)}")
+        except DeadlineExceededError:
+            raise
         except requests.exceptions.Timeout:
-            return {
-                "success": False,
-                "catastro": None,
-                "municipality": None,
-                "barrio": None,
-                "raw_data": None,
-                "error": "Timeout connecting to CRIM service"
-            }
+            return self._parcel_result(False, error="Timeout connecting to CRIM service")
         except requests.exceptions.RequestException as e:
-            return {
-                "success": False,
-                "catastro": None,
-                "municipality": None,
-                "barrio": None,
-                "raw_data": None,
-                "error": f"Connection error: {str(e)}"
-            }
+            return self._parcel_result(False, error=f"Connection error: {str(e)}")
         except Exception as e:
-            return {
-                "success": False,
-                "catastro": None,
-                "municipality": None,
-                "barrio": None,
-                "raw_data": None,
-                "error": f"Unexpected error: {str(e)}"
-            }
+            return self._parcel_result(False, error=f"Unexpected error: {str(e)}")
     
     def get_overlay_zones(self, lat: float, lng: float) -> Dict:
         """
@@ -299,101 +734,362 @@ class ArcGISPRClient:
             }
         """
         x, y = self._lat_lng_to_web_mercator(lat, lng)
-        overlays_found = []
-        errors = []
+        layers = self._overlay_layer_list()
         
-        # Query FEMA flood layer (known ID: 32)
-        try:
-            fema_result = self._query_overlay_layer(x, y, 32, "FEMA Flood Zone")
-            if fema_result.get("found"):
-                overlays_found.append({
-                    "type": "area_inundacion",
-                    "name": "FEMA Flood Zone",
-                    "details": fema_result.get("attributes", {})
-                })
-        except Exception as e:
-            errors.append(f"FEMA query failed: {str(e)}")
+        def query(layer_id: int, name: str) -> Dict:
+            try:
+                return self._query_overlay_layer(x, y, layer_id, name)
+            except DeadlineExceededError:
+                raise
+            except requests.exceptions.Timeout:
+                return {"error": "timeout"}
+            except Exception as e:
+                return {"error": str(e)}
         
-        return {
-            "success": len(errors) == 0,
-            "overlays": overlays_found,
-            "error": "; ".join(errors) if errors else None
+        # Every known overlay layer is queried at once
+        calls = {
+            str(layer_id): (lambda layer_id=layer_id, name=name: query(layer_id, name))
+            for _, layer_id, name in layers
         }
+        # Inside validate_location the overall deadline is what is left
+        results, _ = self._fan_out(calls, remaining_time(self.timeout), pool="overlays")
+        
+        return self._collect_overlays(layers, results)
     
     def _query_overlay_layer(self, x: float, y: float, layer_id: int, layer_name: str) -> Dict:
         """Query a specific overlay layer"""
-        url = f"{self.REGLAMENTARIO_URL}/{layer_id}/query"
+        def fetch():
+            url = self._overlay_query_url(layer_id)
+            params = self._point_query_params(x, y, self._out_fields(url, self.OVERLAY_FIELDS))
+            data = self._get_json(url, params)
+            return self._parse_overlay_response(data)
         
-        params = {
-            "geometry": f"{x},{y}",
-            "geometryType": "esriGeometryPoint",
-            "inSR": "3857",
-            "spatialRel": "esriSpatialRelIntersects",
-            "distance": 10,
-            "units": "esriSRUnit_Meter",
-            "outFields": "*",
-            "returnGeometry": "false",
-            "f": "json"
+        return self._cached(f"overlay:{layer_id}", x, y, fetch)
+    
+    def validate_location(
+        self,
+        lat: float,
+        lng: float,
+        concurrent: bool = True,
+        deadline: Optional[float] = None
+    ) -> Dict:
+        """
+        Complete location validation - gets zoning, catastro, and overlays
+        
+        Args:
+            lat: Latitude (WGS84)
+            lng: Longitude (WGS84)
+            concurrent: Query all layers at once instead of one after another
+            deadline: Overall time budget in seconds for the concurrent mode
+                (defaults to the per-request timeout). Layers that have not
+                answered by then are reported as warnings.
+        
+        Returns combined result with all available data
+        """
+        if deadline is None:
+            deadline = self.timeout
+        
+        outside = self._outside_pr_location(lat, lng)
+        if outside is not None:
+            return outside
+        
+        lookups = {
+            "zoning": lambda: self.get_zoning_district(lat, lng),
+            "parcel": lambda: self.get_parcel_info(lat, lng),
+            "overlays": lambda: self.get_overlay_zones(lat, lng)
         }
         
-        response = self.session.get(url, params=params, timeout=self.timeout)
-        response.raise_for_status()
-        data = response.json()
+        if concurrent:
+            # Retries and hedges give up at the deadline too, instead of
+            # running on after their results are discarded
+            with deadline_scope(self._lookup_budget(deadline)):
+                results, _ = self._fan_out(lookups, deadline)
+        else:
+            results = {name: fn() for name, fn in lookups.items()}
         
-        features = data.get("features", [])
+        if results.get("parcel", {}).get("success"):
+            x, y = self._lat_lng_to_web_mercator(lat, lng)
+            layers = ["zoning", "parcel"] + [f"overlay:{layer_id}" for _, layer_id, _ in self._overlay_layer_list()]
+            self._share_with_parcel(x, y, layers)
         
-        if features:
+        return self._merge_location_results(results, deadline)
+    
+    def lookup_by_catastro(self, catastro: str, deadline: Optional[float] = None) -> Dict:
+        """
+        Complete location validation from a número de catastro, skipping
+        geocoding entirely
+        
+        The CRIM parcel is fetched by attribute (cached by catastro), a point
+        inside it is used for the zoning and overlay lookups, and its outline
+        joins the parcel index so those lookups are cached against the lot.
+        
+        Args:
+            catastro: CRIM catastro number, e.g. "063-077-283-12"
+            deadline: Overall time budget for the layer lookups
+        
+        Returns:
+            validate_location result plus
+            "coordinates": {"lat": float, "lng": float} (None if not found)
+        """
+        catastro = self._normalize_catastro(catastro)
+        
+        if self.cache is None:
+            parcel = self._fetch_parcel_by_catastro(catastro)
+        else:
+            parcel = self.cache.get_or_fetch(
+                "catastro", catastro, lambda: self._fetch_parcel_by_catastro(catastro)
+            )
+        
+        if not parcel["success"]:
             return {
-                "found": True,
-                "attributes": features[0].get("attributes", {})
+                "success": False,
+                "zoning": None,
+                "catastro": None,
+                "overlays": [],
+                "warnings": [],
+                "errors": [parcel["error"]],
+                "coordinates": None
             }
         
-        return {"found": False, "attributes": {}}
+        rings = parcel.pop("rings")
+        if self.parcels is not None:
+            self.parcels.add(parcel["catastro"], rings)
+            self.cache.set("parcel", self._parcel_key(parcel["catastro"]), parcel)
+        
+        x, y = interior_point(rings)
+        lat, lng = web_mercator_to_lat_lng(x, y)
+        result = self.validate_location(lat, lng, deadline=deadline)
+        result["coordinates"] = {"lat": lat, "lng": lng}
+        return result
     
-    def validate_location(self, lat: float, lng: float) -> Dict:
+    @staticmethod
+    def _normalize_catastro(catastro: str) -> str:
+        """Trim and uppercase; 11 bare digits get CRIM's 3-3-3-2 dashes"""
+        catastro = re.sub(r"\s+", "", catastro or "").upper()
+        if re.fullmatch(r"\d{11}", catastro):
+            catastro = f"{catastro[:3]}-{catastro[3:6]}-{catastro[6:9]}-{catastro[9:]}"
+        return catastro
+    
+    def _catastro_field(self) -> str:
+        """Name of the catastro attribute in the CRIM layer"""
+        fields = self._out_fields(self.CRIM_PARCELAS_URL, {"catastro": self.PARCEL_FIELDS["catastro"]})
+        return self.PARCEL_FIELDS["catastro"][0] if fields == "*" else fields.split(",")[0]
+    
+    def _fetch_parcel_by_catastro(self, catastro: str) -> Dict:
+        """CRIM attribute query; the result carries the parcel outline in "rings" """
+        try:
+            escaped = catastro.replace("'", "''")
+            data = self._get_json(self.CRIM_PARCELAS_URL, {
+                "where": f"{self._catastro_field()} = '{escaped}'",
+                "outFields": self._out_fields(self.CRIM_PARCELAS_URL, self.PARCEL_FIELDS),
+                "returnGeometry": "true",
+                "maxAllowableOffset": self.PARCEL_GEOMETRY_OFFSET,
+                "outSR": "3857",
+                "f": "json"
+            })
+            
+            if "error" in data:
+                return self._parcel_result(False, error=data["error"].get("message", "Unknown API error"))
+            
+            for feature in data.get("features", []):
+                rings = (feature.get("geometry") or {}).get("rings")
+                if rings:
+                    result = self._parcel_from_attributes(feature.get("attributes", {}))
+                    result["rings"] = rings
+                    return result
+            
+            return self._parcel_result(False, error=f"Catastro {catastro} not found in CRIM")
+        
+        except CircuitOpenError as e:
+            return self._parcel_result(False, error=f"CRIM service unavailable: {str(e)}")
+        except requests.exceptions.Timeout:
+            return self._parcel_result(False, error="Timeout connecting to CRIM service")
+        except requests.exceptions.RequestException as e:
+            return self._parcel_result(False, error=f"Connection error: {str(e)}")
+        except Exception as e:
+            return self._parcel_result(False, error=f"Unexpected error: {str(e)}")
+    
+    # Points per multipoint query in query_points_bulk; keeps the POST body
+    # and the returned feature set comfortably below server limits
+    BULK_BATCH_SIZE = 100
+    
+    def query_points_bulk(
+        self,
+        points: List[Tuple[float, float]],
+        layer: str,
+        batch_size: int = BULK_BATCH_SIZE
+    ) -> List[Dict]:
         """
-        Complete location validation - gets zoning, catastro, and overlays
+        Look up many points on one layer with a few multipoint queries
         
-        Returns combined result with all available data
+        Points are grouped spatially into batches, each batch is sent as a
+        single esriGeometryMultipoint query (batches run concurrently), and
+        the returned polygons are matched back to the input points locally.
+        Cached points are answered without a request.
+        
+        Args:
+            points: [(lat, lng), ...] in WGS84
+            layer: "zoning", "parcel" or "overlay:<layer_id>"
+            batch_size: Points per request
+        
+        Returns:
+            One result per input point, in input order, shaped like
+            get_zoning_district / get_parcel_info / _query_overlay_layer
         """
-        result = {
-            "success": False,
-            "zoning": None,
-            "catastro": None,
-            "overlays": [],
-            "warnings": [],
-            "errors": []
+        url, from_attributes, failure, not_found = self._bulk_layer_spec(layer)
+        fields = {"zoning": self.ZONING_FIELDS, "parcel": self.PARCEL_FIELDS}.get(layer, self.OVERLAY_FIELDS)
+        out_fields = self._out_fields(url, fields)
+        projected = points_to_web_mercator(points)
+        coords = [tuple(xy) for xy in projected.tolist()]
+        cell_keys = self.cache.cell_keys(projected[:, 0], projected[:, 1]) if self.cache is not None else None
+        results: List[Optional[Dict]] = [None] * len(points)
+        
+        min_lat, min_lng, max_lat, max_lng = PR_BOUNDS
+        lat_lng = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        outside = ~(
+            (lat_lng[:, 0] >= min_lat) & (lat_lng[:, 0] <= max_lat) &
+            (lat_lng[:, 1] >= min_lng) & (lat_lng[:, 1] <= max_lng)
+        )
+        for i in np.flatnonzero(outside).tolist():
+            results[i] = failure("Coordinates are outside Puerto Rico")
+        
+        for i, (x, y) in enumerate(coords):
+            if results[i] is not None:
+                continue
+            if layer == "zoning":
+                results[i] = self._local_zoning(x, y)
+                if results[i] is not None:
+                    continue
+            if self.cache is not None:
+                results[i] = self.cache.get(layer, cell_keys[i])
+        
+        # Sort misses along 1 km rows so each batch covers a compact area
+        pending = np.flatnonzero([result is None for result in results])
+        _, rows = grid_cells(projected[pending, 0], projected[pending, 1], 1000)
+        pending = pending[np.lexsort((projected[pending, 0], rows))].tolist()
+        batches = [pending[start:start + batch_size] for start in range(0, len(pending), batch_size)]
+        
+        calls = {
+            str(n): (lambda batch=batch: self._query_batch(
+                url, batch, coords, out_fields, from_attributes, failure, not_found
+            ))
+            for n, batch in enumerate(batches)
         }
+        batch_results, _ = self._fan_out(calls, None)
         
-        # Get zoning district
-        zoning_result = self.get_zoning_district(lat, lng)
-        if zoning_result["success"]:
-            result["zoning"] = {
-                "code": zoning_result["district_code"],
-                "name": zoning_result["district_name"],
-                "source": zoning_result["source"]
-            }
-        else:
-            result["warnings"].append(f"Zoning lookup failed: {zoning_result['error']}")
+        for matched in batch_results.values():
+            for i, result in matched.items():
+                results[i] = result
+                if self.cache is not None and result.get("success", True) and not result.get("error"):
+                    self.cache.set(layer, cell_keys[i], result)
         
-        # Get parcel/catastro info
-        parcel_result = self.get_parcel_info(lat, lng)
-        if parcel_result["success"]:
-            result["catastro"] = {
-                "number": parcel_result["catastro"],
-                "municipality": parcel_result["municipality"],
-                "barrio": parcel_result["barrio"]
-            }
-        else:
-            result["warnings"].append(f"Catastro lookup failed: {parcel_result['error']}")
+        return [result or failure("Bulk query failed") for result in results]
+    
+    def _bulk_layer_spec(self, layer: str) -> Tuple:
+        """
+        (query URL, attributes -> result, error message -> result,
+        no-feature result) for a bulk layer name
+        """
+        if layer == "zoning":
+            return (
+                self.CALIFICACION_URL,
+                self._zoning_from_attributes,
+                lambda error: self._zoning_result(False, error=error),
+                self._zoning_result(False, error="No zoning data found at this location")
+            )
+        if layer == "parcel":
+            return (
+                self.CRIM_PARCELAS_URL,
+                self._parcel_from_attributes,
+                lambda error: self._parcel_result(False, error=error),
+                self._parcel_result(False, error="No parcel data found at this location")
+            )
+        if layer.startswith("overlay:"):
+            return (
+                self._overlay_query_url(int(layer.split(":", 1)[1])),
+                lambda attrs: {"found": True, "attributes": attrs},
+                lambda error: {"found": False, "attributes": {}, "error": error},
+                {"found": False, "attributes": {}}
+            )
+        raise ValueError(f"Unknown layer '{layer}' (expected zoning, parcel or overlay:<id>)")
+    
+    def _query_batch(
+        self,
+        url: str,
+        batch: List[int],
+        coords: List[Tuple[float, float]],
+        out_fields: str,
+        from_attributes: Callable[[Dict], Dict],
+        failure: Callable[[str], Dict],
+        not_found: Dict,
+        search_distance: float = 10.0
+    ) -> Dict[int, Dict]:
+        """
+        Run one multipoint query and assign each point the polygon that
+        contains it, or the nearest one within the search distance. Batches
+        the server truncates (exceededTransferLimit) are split and retried.
+        """
+        geometry = {
+            "points": [list(coords[i]) for i in batch],
+            "spatialReference": {"wkid": 3857}
+        }
+        params = {
+            "geometry": json.dumps(geometry, separators=(",", ":")),
+            "geometryType": "esriGeometryMultipoint",
+            "inSR": "3857",
+            "spatialRel": "esriSpatialRelIntersects",
+            "distance": search_distance,
+            "units": "esriSRUnit_Meter",
+            "outFields": out_fields,
+            "returnGeometry": "true",
+            "maxAllowableOffset": 1,
+            "outSR": "3857",
+            "f": "json"
+        }
         
-        # Get overlay zones
-        overlay_result = self.get_overlay_zones(lat, lng)
-        result["overlays"] = overlay_result.get("overlays", [])
-        if overlay_result.get("error"):
-            result["warnings"].append(f"Overlay lookup partial: {overlay_result['error']}")
+        try:
+            data = self._post_json(url, params)
+        except requests.exceptions.Timeout:
+            return {i: failure("Timeout connecting to GIS service") for i in batch}
+        except requests.exceptions.RequestException as e:
+            return {i: failure(f"Connection error: {str(e)}") for i in batch}
+        except Exception as e:
+            return {i: failure(f"Unexpected error: {str(e)}") for i in batch}
         
-        # Consider success if we got at least zoning OR catastro
-        result["success"] = (result["zoning"] is not None or result["catastro"] is not None)
+        if "error" in data:
+            return {i: failure(data["error"].get("message", "Unknown API error")) for i in batch}
+        
+        if data.get("exceededTransferLimit") and len(batch) > 1:
+            half = len(batch) // 2
+            matched = self._query_batch(
+                url, batch[:half], coords, out_fields, from_attributes, failure, not_found, search_distance
+            )
+            matched.update(self._query_batch(
+                url, batch[half:], coords, out_fields, from_attributes, failure, not_found, search_distance
+            ))
+            return matched
+        
+        polygons = []
+        for feature in data.get("features", []):
+            rings = (feature.get("geometry") or {}).get("rings")
+            if rings:
+                polygons.append((rings_bbox(rings), rings, feature.get("attributes", {})))
+        
+        matched = {}
+        for i in batch:
+            x, y = coords[i]
+            best_attrs, best_distance = None, search_distance
+            for (minx, miny, maxx, maxy), rings, attrs in polygons:
+                if not (minx - search_distance <= x <= maxx + search_distance and
+                        miny - search_distance <= y <= maxy + search_distance):
+                    continue
+                if point_in_rings(x, y, rings):
+                    best_attrs = attrs
+                    break
+                distance = distance_to_rings(x, y, rings)
+                if distance <= best_distance:
+                    best_attrs, best_distance = attrs, distance
+            
+            matched[i] = from_attributes(best_attrs) if best_attrs is not None else dict(not_found)
         
-        return result
\ No newline at end of file
+        return matched
@@ -0,0 +1,264 @@
+"""
+Async ArcGIS PR Client - Non-blocking variant of ArcGISPRClient
+Keeps many MIPR/CRIM lookups in flight over one pooled httpx.AsyncClient
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Dict, Optional
+
+import httpx
+
+from src.services.arcgis_pr_client import ArcGISPRBase
+from src.services.lookup_cache import LookupCache, ParcelIndex
+from src.services.offline_zoning import OfflineZoningIndex
+from src.services.resilience import (
+    CircuitOpenError, DeadlineExceededError, ResiliencePolicy, deadline_scope, get_default_policy
+)
+
+# HTTP/2 needs the optional "h2" package (pip install httpx[http2])
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class AsyncArcGISPRClient(ArcGISPRBase):
+    """
+    Async client for Puerto Rico GIS services (MIPR and CRIM)
+    
+    Same public methods and return shapes as ArcGISPRClient, as coroutines,
+    backed by the same local answers (Puerto Rico bounds check, Calificación
+    snapshot, lookup cache and parcel index). All calls share one keep-alive
+    connection pool, so a single worker can screen a whole portfolio
+    without one OS thread per request:
+        
+        async with AsyncArcGISPRClient() as client:
+            results = await asyncio.gather(
+                *(client.validate_location(lat, lng) for lat, lng in points)
+            )
+    """
+    
+    def __init__(
+        self,
+        timeout: int = 15,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        http2: bool = False,
+        keep_raw_data: bool = False,
+        resilience: Optional[ResiliencePolicy] = None,
+        cache: Optional[LookupCache] = None,
+        use_cache: bool = True,
+        offline_zoning: Optional[OfflineZoningIndex] = None,
+        use_offline_zoning: bool = True,
+        parcel_index: Optional[ParcelIndex] = None
+    ):
+        """
+        Args:
+            max_connections: Pool size shared by every request
+            max_keepalive_connections: Idle connections kept open
+            http2: Use HTTP/2 when the "h2" package is installed
+        
+        The other arguments are ArcGISPRClient's. The snapshot and parcel
+        index are in memory and read on the event loop; the lookup cache's
+        SQLite tier can block on disk, so cache reads and writes run in
+        worker threads.
+        """
+        self.timeout = timeout
+        self.keep_raw_data = keep_raw_data
+        self.resilience = resilience or get_default_policy()
+        self._init_local_lookups(cache, use_cache, offline_zoning, use_offline_zoning, parcel_index)
+        self.http2 = http2 and HTTP2_AVAILABLE
+        
+        # Requests beyond max_connections wait for a free connection instead
+        # of failing, so no pool timeout; each request still gets `timeout`.
+        self.client = httpx.AsyncClient(
+            headers=self.HEADERS,
+            timeout=httpx.Timeout(timeout, pool=None),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections
+            ),
+            http2=self.http2
+        )
+    
+    async def __aenter__(self) -> "AsyncArcGISPRClient":
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+    
+    async def aclose(self):
+        """Close pooled connections"""
+        await self.client.aclose()
+    
+    async def _get_json(self, url: str, params: Dict) -> Dict:
+        async def request(timeout: float):
+            response = await self.client.get(url, params=params, timeout=httpx.Timeout(timeout, pool=None))
+            response.raise_for_status()
+            return response.json()
+        
+        return await self.resilience.acall(url, request, self.timeout)
+    
+    async def _cached(self, layer: str, x: float, y: float, fetch: Callable[[], Awaitable[Dict]]) -> Dict:
+        """Async equivalent of ArcGISPRClient._cached"""
+        if self.cache is None:
+            return await fetch()
+        
+        hit, catastro, key = await asyncio.to_thread(self._parcel_cache_hit, layer, x, y)
+        if hit is not None:
+            return hit
+        
+        value = await asyncio.to_thread(self.cache.get, layer, key)
+        if value is None:
+            try:
+                value = await fetch()
+            except Exception:
+                stale = await asyncio.to_thread(self.cache.get, layer, key, True)
+                if stale is None:
+                    raise
+                return stale
+            if value.get("success", True):
+                await asyncio.to_thread(self.cache.set, layer, key, value)
+        
+        return await asyncio.to_thread(self._settle_cached, layer, key, catastro, value)
+    
+    async def get_zoning_district(self, lat: float, lng: float) -> Dict:
+        """Async equivalent of ArcGISPRClient.get_zoning_district"""
+        x, y = self._lat_lng_to_web_mercator(lat, lng)
+        
+        local = self._local_zoning(x, y)
+        if local is not None:
+            return local
+        
+        return await self._cached("zoning", x, y, lambda: self._fetch_zoning_district(x, y))
+    
+    async def _fetch_zoning_district(self, x: float, y: float) -> Dict:
+        """Live Calificación query for a Web Mercator point"""
+        try:
+            out_fields = await asyncio.to_thread(self._out_fields, self.CALIFICACION_URL, self.ZONING_FIELDS)
+            data = await self._get_json(self.CALIFICACION_URL, self._point_query_params(x, y, out_fields))
+            return self._parse_zoning_response(data)
+        
+        except CircuitOpenError as e:
+            return self._zoning_result(False, error=f"MIPR service unavailable: {str(e)}")
+        except DeadlineExceededError:
+            raise
+        except httpx.TimeoutException:
+            return self._zoning_result(False, error="Timeout connecting to MIPR service")
+        except httpx.HTTPError as e:
+            return self._zoning_result(False, error=f"Connection error: {str(e)}")
+        except Exception as e:
+            return self._zoning_result(False, error=f"Unexpected error: {str(e)}")
+    
+    async def get_parcel_info(self, lat: float, lng: float) -> Dict:
+        """Async equivalent of ArcGISPRClient.get_parcel_info"""
+        x, y = self._lat_lng_to_web_mercator(lat, lng)
+        return await self._cached("parcel", x, y, lambda: self._fetch_parcel_info(x, y))
+    
+    async def _fetch_parcel_info(self, x: float, y: float) -> Dict:
+        """Live CRIM parcels query for a Web Mercator point"""
+        try:
+            out_fields = await asyncio.to_thread(self._out_fields, self.CRIM_PARCELAS_URL, self.PARCEL_FIELDS)
+            data = await self._get_json(self.CRIM_PARCELAS_URL, self._parcel_point_params(x, y, out_fields))
+            return self._parse_parcel_at(x, y, data)
+        
+        except CircuitOpenError as e:
+            return self._parcel_result(False, error=f"CRIM service unavailable: {str(e)}")
+        except DeadlineExceededError:
+            raise
+        except httpx.TimeoutException:
+            return self._parcel_result(False, error="Timeout connecting to CRIM service")
+        except httpx.HTTPError as e:
+            return self._parcel_result(False, error=f"Connection error: {str(e)}")
+        except Exception as e:
+            return self._parcel_result(False, error=f"Unexpected error: {str(e)}")
+    
+    async def get_overlay_zones(self, lat: float, lng: float) -> Dict:
+        """Async equivalent of ArcGISPRClient.get_overlay_zones"""
+        x, y = self._lat_lng_to_web_mercator(lat, lng)
+        # The layer catalog may read service metadata over blocking HTTP
+        layers = await asyncio.to_thread(self._overlay_layer_list)
+        
+        # Every known overlay layer is queried at once
+        responses = await asyncio.gather(
+            *(self._query_overlay_layer(x, y, layer_id, name) for _, layer_id, name in layers),
+            return_exceptions=True
+        )
+        
+        results = {}
+        for (_, layer_id, _), response in zip(layers, responses):
+            if isinstance(response, DeadlineExceededError):
+                # Did not answer in time, like a layer still pending
+                continue
+            if isinstance(response, httpx.TimeoutException):
+                results[str(layer_id)] = {"error": "timeout"}
+            elif isinstance(response, Exception):
+                results[str(layer_id)] = {"error": str(response)}
+            else:
+                results[str(layer_id)] = response
+        
+        return self._collect_overlays(layers, results)
+    
+    async def _query_overlay_layer(self, x: float, y: float, layer_id: int, layer_name: str) -> Dict:
+        """Query a specific overlay layer"""
+        async def fetch():
+            url = self._overlay_query_url(layer_id)
+            out_fields = await asyncio.to_thread(self._out_fields, url, self.OVERLAY_FIELDS)
+            data = await self._get_json(url, self._point_query_params(x, y, out_fields))
+            return self._parse_overlay_response(data)
+        
+        return await self._cached(f"overlay:{layer_id}", x, y, fetch)
+    
+    async def validate_location(
+        self,
+        lat: float,
+        lng: float,
+        concurrent: bool = True,
+        deadline: Optional[float] = None
+    ) -> Dict:
+        """
+        Async equivalent of ArcGISPRClient.validate_location
+        
+        All layers are queried at once; layers that have not answered within
+        `deadline` seconds (default: the request timeout) are cancelled and
+        reported as warnings. `concurrent` is accepted for drop-in use in
+        place of ArcGISPRClient and ignored.
+        """
+        if deadline is None:
+            deadline = self.timeout
+        
+        outside = self._outside_pr_location(lat, lng)
+        if outside is not None:
+            return outside
+        
+        # Tasks copy the context, so every attempt they make sees the deadline
+        with deadline_scope(self._lookup_budget(deadline)):
+            tasks = {
+                "zoning": asyncio.ensure_future(self.get_zoning_district(lat, lng)),
+                "parcel": asyncio.ensure_future(self.get_parcel_info(lat, lng)),
+                "overlays": asyncio.ensure_future(self.get_overlay_zones(lat, lng))
+            }
+        
+        done, pending = await asyncio.wait(tasks.values(), timeout=deadline)
+        for task in pending:
+            task.cancel()
+        
+        results = {}
+        for name, task in tasks.items():
+            if task not in done:
+                continue
+            try:
+                results[name] = task.result()
+            except DeadlineExceededError:
+                continue
+            except Exception as e:
+                results[name] = {"success": False, "error": f"Unexpected error: {str(e)}"}
+        
+        if results.get("parcel", {}).get("success"):
+            x, y = self._lat_lng_to_web_mercator(lat, lng)
+            overlay_layers = await asyncio.to_thread(self._overlay_layer_list)
+            layers = ["zoning", "parcel"] + [f"overlay:{layer_id}" for _, layer_id, _ in overlay_layers]
+            await asyncio.to_thread(self._share_with_parcel, x, y, layers)
+        
+        return self._merge_location_results(results, deadline)
@@ -0,0 +1,275 @@
+"""
+Gazetteer - Offline approximate geocoding for Puerto Rico
+Centroids of municipios, barrios and urbanizaciones in a trigram index, used
+when Google Geocoding is unavailable (no API key, timeout, quota) and as an
+instant first guess. Every answer is flagged as low confidence.
+
+The bundled data/gazetteer.json holds the pueblo of each municipio; barrios
+and urbanizaciones are added with:
+
+    python -m src.services.gazetteer build [--urbanizaciones urbs.csv]
+"""
+
+import argparse
+import csv
+import json
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+import requests
+
+from src.services.layer_catalog import fetch_service_metadata
+from src.utils.address_normalizer import fold_accents, normalize_address, normalize_municipality
+
+DEFAULT_GAZETTEER_PATH = Path(__file__).parent.parent.parent / "data" / "gazetteer.json"
+
+TIGERWEB_URL = "https://tigerweb.geo.census.gov/arcgis/rest/services/TIGERweb"
+
+# More specific places win when several match the same address
+TYPE_RANK = {"urbanizacion": 3, "barrio": 2, "municipio": 1}
+
+# Words that describe a place rather than name it
+GENERIC_TOKENS = {
+    "calle", "urb", "barrio", "barriada", "carr", "ave", "res", "cond", "ext", "sector",
+    "parcelas", "km", "int", "de", "del", "la", "las", "los", "el", "y"
+}
+
+
+def _phrase(text: str) -> List[str]:
+    """Name-bearing words of an address or place name"""
+    return [
+        token for token in normalize_address(text).split()
+        if token not in GENERIC_TOKENS and not token[0].isdigit()
+    ]
+
+
+def _trigrams(words: List[str]) -> Set[str]:
+    grams = set()
+    for word in words:
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class Gazetteer:
+    """Fuzzy place-name lookups over the local gazetteer file"""
+
+    # Share of a place name's trigrams that must appear in an address
+    MATCH_THRESHOLD = 0.75
+
+    def __init__(self, path: Path = DEFAULT_GAZETTEER_PATH):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        self.version = data.get("version")
+        self.places: List[Dict] = data["places"]
+
+        self._trigrams: List[Set[str]] = []
+        self._index: Dict[str, List[int]] = {}
+        self._municipios: Dict[str, int] = {}
+        self._place_municipios = [normalize_municipality(place["municipality"]) for place in self.places]
+        for place_id, place in enumerate(self.places):
+            grams = _trigrams(_phrase(place["name"]))
+            self._trigrams.append(grams)
+            for gram in grams:
+                self._index.setdefault(gram, []).append(place_id)
+            if place["type"] == "municipio":
+                self._municipios[normalize_municipality(place["name"])] = place_id
+
+    def search(self, text: str, municipality: Optional[str] = None, limit: int = 5) -> List[Dict]:
+        """
+        Places whose name resembles `text`, best first (for interactive search)
+
+        Returns:
+            [{"place": {...}, "score": float}, ...] with score = Dice
+            similarity of the trigram sets
+        """
+        query = _trigrams(_phrase(text))
+        ranked = [
+            {"place": self.places[place_id], "score": 2 * shared / (len(query) + len(self._trigrams[place_id]))}
+            for place_id, shared in self._shared_trigrams(query, municipality).items()
+        ]
+        ranked.sort(key=lambda match: match["score"], reverse=True)
+        return ranked[:limit]
+
+    def locate(self, address: str, municipality: str) -> Dict:
+        """
+        Approximate coordinates for an address: the most specific known place
+        (urbanización > barrio > municipio) named in it, or the municipio's
+        pueblo.
+
+        Returns:
+            {
+                "found": bool,
+                "latitude": float, "longitude": float,
+                "matched_name": str, "match_type": str, "score": float,
+                "low_confidence": True,
+                "confidence": "APPROXIMATE",
+                "source": "Gazetteer local"
+            }
+        """
+        query = _trigrams(_phrase(address))
+        best_id, best_key = None, None
+        for place_id, shared in self._shared_trigrams(query, municipality).items():
+            place = self.places[place_id]
+            # Containment: how much of the place name appears in the address
+            score = shared / len(self._trigrams[place_id])
+            if score < self.MATCH_THRESHOLD:
+                continue
+            key = (TYPE_RANK.get(place["type"], 0), score)
+            if best_key is None or key > best_key:
+                best_id, best_key = place_id, key
+
+        if best_id is None:
+            best_id = self._municipios.get(normalize_municipality(municipality))
+            if best_id is None:
+                return {"found": False, "low_confidence": True, "error": f"Municipio '{municipality}' no encontrado"}
+            score = 0.0
+        else:
+            score = best_key[1]
+
+        place = self.places[best_id]
+        return {
+            "found": True,
+            "latitude": place["lat"],
+            "longitude": place["lng"],
+            "matched_name": place["name"],
+            "match_type": place["type"],
+            "score": score,
+            "low_confidence": True,
+            "confidence": "APPROXIMATE",
+            "source": "Gazetteer local"
+        }
+
+    def _shared_trigrams(self, query: Set[str], municipality: Optional[str]) -> Counter:
+        """Trigrams each candidate place shares with the query"""
+        wanted = normalize_municipality(municipality) if municipality else None
+        shared = Counter()
+        for gram in query:
+            for place_id in self._index.get(gram, ()):
+                shared[place_id] += 1
+        if wanted:
+            shared = Counter({
+                place_id: count for place_id, count in shared.items()
+                if self._place_municipios[place_id] == wanted
+            })
+        return shared
+
+
+_default_gazetteer = None
+_default_gazetteer_lock = threading.Lock()
+
+
+def get_gazetteer() -> Gazetteer:
+    """Process-wide gazetteer over the bundled file"""
+    global _default_gazetteer
+    with _default_gazetteer_lock:
+        if _default_gazetteer is None:
+            _default_gazetteer = Gazetteer()
+        return _default_gazetteer
+
+
+def _query_all(url: str, params: Dict, timeout: int) -> List[Dict]:
+    """Page through an ArcGIS layer query with resultOffset"""
+    features = []
+    while True:
+        response = requests.get(url, params={**params, "resultOffset": len(features), "f": "json"}, timeout=timeout)
+        response.raise_for_status()
+        data = response.json()
+        if "error" in data:
+            raise RuntimeError(data["error"].get("message", "Unknown API error"))
+        features.extend(data.get("features", []))
+        if not data.get("exceededTransferLimit"):
+            return features
+
+
+def fetch_barrios(timeout: int = 60) -> List[Dict]:
+    """Barrio internal points from the TIGERweb county subdivisions of PR"""
+    counties = _query_all(f"{TIGERWEB_URL}/State_County/MapServer/1/query", {
+        "where": "STATE='72'", "outFields": "COUNTY,BASENAME", "returnGeometry": "false"
+    }, timeout)
+    municipio_by_county = {f["attributes"]["COUNTY"]: f["attributes"]["BASENAME"] for f in counties}
+
+    service = f"{TIGERWEB_URL}/Places_CouSub_ConCity_SubMCD/MapServer"
+    layer_id = next(
+        layer["id"] for layer in fetch_service_metadata(service, timeout)["layers"]
+        if fold_accents(layer["name"]).startswith("county subdivisions") and not layer.get("subLayerIds")
+    )
+    subdivisions = _query_all(f"{service}/{layer_id}/query", {
+        "where": "STATE='72'", "outFields": "BASENAME,COUNTY,INTPTLAT,INTPTLON", "returnGeometry": "false"
+    }, timeout)
+
+    return [
+        {
+            "name": attrs["BASENAME"],
+            "type": "barrio",
+            "municipality": municipio_by_county[attrs["COUNTY"]],
+            "lat": round(float(attrs["INTPTLAT"]), 5),
+            "lng": round(float(attrs["INTPTLON"]), 5)
+        }
+        for attrs in (feature["attributes"] for feature in subdivisions)
+        if attrs["COUNTY"] in municipio_by_county
+    ]
+
+
+def read_urbanizaciones(csv_path: Path) -> List[Dict]:
+    """Urbanización centroids from a CSV with name,municipality,lat,lng columns"""
+    with open(csv_path, "r", encoding="utf-8") as f:
+        return [
+            {
+                "name": row["name"].strip(),
+                "type": "urbanizacion",
+                "municipality": row["municipality"].strip(),
+                "lat": float(row["lat"]),
+                "lng": float(row["lng"])
+            }
+            for row in csv.DictReader(f)
+        ]
+
+
+def build_gazetteer(
+    path: Path = DEFAULT_GAZETTEER_PATH,
+    urbanizaciones_csv: Optional[Path] = None,
+    timeout: int = 60
+) -> int:
+    """
+    Add TIGERweb barrios (and optionally urbanizaciones from a CSV) to the
+    gazetteer file, replacing earlier entries with the same type, name and
+    municipio
+
+    Returns:
+        Number of places in the file
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    new_places = fetch_barrios(timeout)
+    if urbanizaciones_csv:
+        new_places += read_urbanizaciones(urbanizaciones_csv)
+
+    def key(place):
+        return (place["type"], fold_accents(place["name"]), normalize_municipality(place["municipality"]))
+
+    places = {key(place): place for place in data["places"]}
+    places.update({key(place): place for place in new_places})
+    data["places"] = sorted(places.values(), key=lambda p: (TYPE_RANK.get(p["type"], 0), p["municipality"], p["name"]))
+    data["version"] = str(int(data.get("version", "0")) + 1)
+
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    return len(data["places"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extend the offline gazetteer")
+    parser.add_argument("command", choices=["build"])
+    parser.add_argument("--path", default=str(DEFAULT_GAZETTEER_PATH))
+    parser.add_argument("--urbanizaciones", default=None, help="CSV with name,municipality,lat,lng")
+    args = parser.parse_args()
+
+    count = build_gazetteer(
+        path=Path(args.path),
+        urbanizaciones_csv=Path(args.urbanizaciones) if args.urbanizaciones else None
+    )
+    print(f"Gazetteer now has {count} places ({args.path})")
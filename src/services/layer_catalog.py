@@ -0,0 +1,315 @@
+"""
+Layer Catalog - ArcGIS service metadata for the MIPR/CRIM layers
+Discovers overlay layer IDs in the Reglamentario service and resolves each
+layer's actual field names, reading the metadata once instead of on every
+lookup.
+"""
+
+import json
+import logging
+import threading
+import time
+import unicodedata
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import requests
+
+from src.services.resilience import CircuitOpenError, ResiliencePolicy, get_default_policy, remaining_time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATALOG_PATH = Path(__file__).parent.parent.parent / "data" / "cache" / "reglamentario_layers.json"
+
+
+def _fold(text: str) -> str:
+    """Lowercase and strip accents so "Histórica" matches "historica" """
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def fetch_service_metadata(url: str, timeout: int = 15) -> Dict:
+    """GET the ?f=json metadata of a MapServer or one of its layers"""
+    response = requests.get(
+        url,
+        params={"f": "json"},
+        headers={"User-Agent": "Pyxten/1.0", "Accept": "application/json"},
+        timeout=timeout
+    )
+    response.raise_for_status()
+    metadata = response.json()
+    if "error" in metadata:
+        raise ValueError(metadata["error"].get("message", "Unknown API error"))
+    return metadata
+
+
+class ReglamentarioLayerCatalog:
+    """Overlay type -> Reglamentario layer IDs, discovered from service metadata"""
+    
+    # Accent-folded substrings of a layer name that identify each overlay type
+    OVERLAY_PATTERNS = {
+        "zona_historica": ("historic",),
+        "zona_costanera": ("costa", "maritimo"),
+        "area_inundacion": ("inundac", "fema", "flood")
+    }
+    
+    def __init__(
+        self,
+        service_url: str,
+        fallback: Optional[Dict[str, List[Dict]]] = None,
+        path: Optional[Path] = DEFAULT_CATALOG_PATH,
+        ttl: float = 7 * 24 * 3600,
+        retry_after: float = 300,
+        timeout: int = 15,
+        resilience: Optional[ResiliencePolicy] = None
+    ):
+        """
+        Args:
+            service_url: MapServer root (e.g. ArcGISPRClient.REGLAMENTARIO_URL)
+            fallback: Mapping to use when the catalog was never loaded and
+                the service metadata is unavailable
+            path: JSON file the discovered mapping is persisted to
+            ttl: Seconds before the metadata is read again
+            retry_after: Seconds before a failed metadata read is retried
+            timeout: Metadata request timeout in seconds
+            resilience: Retry/circuit-breaker policy for the metadata read;
+                defaults to the process-wide policy
+        """
+        self.service_url = service_url
+        self.fallback = fallback or {}
+        self.path = Path(path) if path else None
+        self.ttl = ttl
+        self.retry_after = retry_after
+        self.timeout = timeout
+        self.resilience = resilience or get_default_policy()
+        
+        self._layers = None
+        self._expires = 0.0
+        self._inflight: Optional[Future] = None
+        self._lock = threading.Lock()
+    
+    def overlay_layers(self) -> Dict[str, List[Dict]]:
+        """
+        Returns:
+            {"area_inundacion": [{"id": 32, "name": "..."}, ...], ...}
+            Only overlay types with at least one known layer are included.
+        
+        One caller reads the metadata, outside the lock and within its
+        deadline_scope. While it does, other callers keep the previous
+        mapping, or wait for the read up to their own deadline and use the
+        fallback if it has not finished.
+        """
+        with self._lock:
+            if self._layers is not None and time.time() < self._expires:
+                return self._layers
+            future = self._inflight
+            owner = future is None
+            if owner:
+                future = self._inflight = Future()
+            elif self._layers is not None:
+                return self._layers
+        
+        if not owner:
+            try:
+                return future.result(timeout=remaining_time(self.timeout))
+            except FutureTimeoutError:
+                return self.fallback
+        
+        layers, expires, discovered_at = self._layers, time.time() + self.retry_after, None
+        try:
+            stored = self._read_file()
+            if stored and time.time() - stored["discovered_at"] < self.ttl:
+                layers, expires = stored["layers"], stored["discovered_at"] + self.ttl
+            else:
+                try:
+                    layers = self._discover()
+                    discovered_at = time.time()
+                    expires = discovered_at + self.ttl
+                except (requests.exceptions.RequestException, CircuitOpenError, ValueError, KeyError):
+                    # Keep serving the last known mapping; retry shortly
+                    if stored:
+                        layers = stored["layers"]
+        finally:
+            with self._lock:
+                self._layers = layers if layers is not None else self.fallback
+                self._expires = expires
+                self._inflight = None
+                layers = self._layers
+            future.set_result(layers)
+        
+        if discovered_at is not None:
+            self._write_file(layers, discovered_at)
+        return layers
+    
+    def _discover(self) -> Dict[str, List[Dict]]:
+        """Fetch MapServer metadata and classify its feature layers by name"""
+        metadata = self.resilience.call(
+            self.service_url,
+            lambda timeout: fetch_service_metadata(self.service_url, timeout),
+            remaining_time(self.timeout)
+        )
+        
+        layers = {}
+        for layer in metadata.get("layers", []):
+            # Group layers hold no features of their own
+            if layer.get("subLayerIds"):
+                continue
+            name = _fold(layer.get("name", ""))
+            for overlay_type, patterns in self.OVERLAY_PATTERNS.items():
+                if any(pattern in name for pattern in patterns):
+                    layers.setdefault(overlay_type, []).append({
+                        "id": layer["id"],
+                        "name": layer.get("name")
+                    })
+                    break
+        
+        # Known IDs cover overlay types the layer names did not reveal
+        for overlay_type, known_layers in self.fallback.items():
+            layers.setdefault(overlay_type, known_layers)
+        
+        return layers
+    
+    def _read_file(self) -> Optional[Dict]:
+        if self.path is None or not self.path.exists():
+            return None
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if stored.get("service_url") != self.service_url:
+            return None
+        return stored
+    
+    def _write_file(self, layers: Dict[str, List[Dict]], discovered_at: float):
+        if self.path is None:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump({
+                    "service_url": self.service_url,
+                    "discovered_at": discovered_at,
+                    "layers": layers
+                }, f, indent=2, ensure_ascii=False)
+        except OSError as e:
+            # A read-only data/cache only costs the rediscovery after a restart
+            logger.warning(f"Could not write layer catalog {self.path}: {e}")
+
+
+_catalogs: Dict[str, ReglamentarioLayerCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_layer_catalog(
+    service_url: str,
+    fallback: Optional[Dict[str, List[Dict]]] = None,
+    path: Optional[Path] = DEFAULT_CATALOG_PATH
+) -> ReglamentarioLayerCatalog:
+    """Process-wide catalog per service URL (path is used when it is first created)"""
+    with _catalogs_lock:
+        if service_url not in _catalogs:
+            _catalogs[service_url] = ReglamentarioLayerCatalog(service_url, fallback=fallback, path=path)
+        return _catalogs[service_url]
+
+
+class LayerSchemaResolver:
+    """
+    Works out which attribute fields a query actually needs
+    
+    Each layer's field list is fetched once; the fields matching the
+    candidate names the client parses (case-insensitively) become the
+    query's outFields, instead of "*".
+    """
+    
+    def __init__(
+        self,
+        ttl: float = 24 * 3600,
+        retry_after: float = 300,
+        timeout: int = 15,
+        resilience: Optional[ResiliencePolicy] = None
+    ):
+        """
+        Args:
+            ttl: Seconds a resolved field list is reused
+            retry_after: Seconds to keep using "*" after a failed metadata read
+            timeout: Metadata request timeout in seconds
+            resilience: Retry/circuit-breaker policy for the metadata reads;
+                defaults to the process-wide policy
+        """
+        self.ttl = ttl
+        self.retry_after = retry_after
+        self.timeout = timeout
+        self.resilience = resilience or get_default_policy()
+        self._fields = {}
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+    
+    def out_fields(self, query_url: str, candidates: Sequence[str]) -> str:
+        """
+        outFields value for a layer query URL (ending in /query)
+        
+        Returns "*" when the schema is unavailable or none of the
+        candidates exist, so queries never lose data they would have had.
+        """
+        layer_fields = self._layer_fields(query_url)
+        if not layer_fields:
+            return "*"
+        
+        by_upper = {field.upper(): field for field in layer_fields}
+        selected = []
+        for name in candidates:
+            field = by_upper.get(name.upper())
+            if field and field not in selected:
+                selected.append(field)
+        
+        return ",".join(selected) if selected else "*"
+    
+    def _layer_fields(self, query_url: str) -> Optional[List[str]]:
+        """
+        Field names of a layer; concurrent cold lookups of the same layer
+        share one metadata read, and other layers are never held up by it
+        """
+        layer_url = query_url[:-len("/query")] if query_url.endswith("/query") else query_url
+        
+        with self._lock:
+            entry = self._fields.get(layer_url)
+            if entry is not None and time.time() < entry[0]:
+                return entry[1]
+            future = self._inflight.get(layer_url)
+            owner = future is None
+            if owner:
+                future = self._inflight[layer_url] = Future()
+        
+        if not owner:
+            # Queries go out with "*" rather than wait past the caller's deadline
+            try:
+                return future.result(timeout=remaining_time(self.timeout))
+            except FutureTimeoutError:
+                return None
+        
+        fields, expires = None, time.time() + self.retry_after
+        try:
+            metadata = self.resilience.call(
+                layer_url, lambda timeout: fetch_service_metadata(layer_url, timeout), remaining_time(self.timeout)
+            )
+            fields = [field["name"] for field in metadata.get("fields") or []]
+            expires = time.time() + self.ttl
+        except (requests.exceptions.RequestException, CircuitOpenError, ValueError, KeyError):
+            pass
+        finally:
+            # Waiters are released (with "*") even if the read blew up
+            with self._lock:
+                self._fields[layer_url] = (expires, fields)
+                del self._inflight[layer_url]
+            future.set_result(fields)
+        return fields
+
+
+_schema_resolver = LayerSchemaResolver()
+
+
+def get_schema_resolver() -> LayerSchemaResolver:
+    """Process-wide schema resolver"""
+    return _schema_resolver
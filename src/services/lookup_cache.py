@@ -0,0 +1,350 @@
+"""
+Lookup Cache - Two-tier cache for MIPR/CRIM GIS lookups
+In-process LRU in front of a persistent SQLite store, keyed by layer and
+coordinates quantized to a Web Mercator grid cell
+"""
+
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from src.services.resilience import remaining_time
+from src.utils.geo_projection import grid_cells
+from src.utils.geometry import point_in_rings, rings_bbox
+
+DEFAULT_CACHE_PATH = Path(__file__).parent.parent.parent / "data" / "cache" / "gis_cache.sqlite3"
+
+
+class LookupCache:
+    """
+    Caches lookup results per layer with a per-layer TTL.
+    
+    Layers are free-form names ("zoning", "parcel", "overlay:32", ...); the
+    part before ":" selects the TTL. Values must be JSON-serializable dicts
+    and every read returns a fresh copy, so callers may mutate results.
+    """
+    
+    # Seconds an answer stays fresh, by layer family
+    DEFAULT_TTLS = {
+        "zoning": 7 * 24 * 3600,
+        "parcel": 30 * 24 * 3600,
+        "catastro": 30 * 24 * 3600,
+        "overlay": 7 * 24 * 3600,
+        # Google Maps Platform terms allow caching geocoded lat/lng for
+        # at most 30 consecutive days
+        "geocode": 30 * 24 * 3600
+    }
+    DEFAULT_TTL = 24 * 3600
+    
+    def __init__(
+        self,
+        db_path: Optional[Path] = DEFAULT_CACHE_PATH,
+        max_memory_entries: int = 10000,
+        ttls: Optional[Dict[str, float]] = None,
+        cell_size_m: float = 10.0
+    ):
+        """
+        Args:
+            db_path: SQLite file for the persistent tier, None for memory only
+            max_memory_entries: Size of the in-process LRU tier
+            ttls: Per-layer TTL overrides in seconds
+            cell_size_m: Grid cell size used to quantize coordinates; matches
+                the 10 m search distance of the point queries by default
+        """
+        self.max_memory_entries = max_memory_entries
+        self.ttls = {**self.DEFAULT_TTLS, **(ttls or {})}
+        self.cell_size_m = cell_size_m
+        
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._inflight: Dict[tuple, Future] = {}
+        
+        self._db = None
+        if db_path is not None:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(db_path), check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS lookups ("
+                "layer TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+                "stored_at REAL NOT NULL, PRIMARY KEY (layer, key))"
+            )
+            self._db.commit()
+    
+    def cell_key(self, x: float, y: float) -> str:
+        """Quantize a Web Mercator point to its grid cell key"""
+        return f"{math.floor(x / self.cell_size_m)}:{math.floor(y / self.cell_size_m)}"
+    
+    def cell_keys(self, xs, ys) -> List[str]:
+        """cell_key for arrays of Web Mercator coordinates, quantized in one pass"""
+        columns, rows = grid_cells(xs, ys, self.cell_size_m)
+        return [f"{column}:{row}" for column, row in zip(columns.tolist(), rows.tolist())]
+    
+    def ttl_for(self, layer: str) -> float:
+        return self.ttls.get(layer.split(":", 1)[0], self.DEFAULT_TTL)
+    
+    def get(self, layer: str, key: str, allow_stale: bool = False) -> Optional[Dict]:
+        """
+        Return the cached value or None on a miss.
+        
+        Args:
+            allow_stale: Also return entries past their TTL (used when the
+                upstream service is known to be down)
+        """
+        started = time.perf_counter()
+        ttl = self.ttl_for(layer)
+        now = time.time()
+        
+        with self._lock:
+            stats = self._layer_stats(layer)
+            entry = self._memory.get((layer, key))
+            tier = "memory_hits"
+            
+            if entry is None and self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, stored_at FROM lookups WHERE layer = ? AND key = ?",
+                    (layer, key)
+                ).fetchone()
+                if row is not None:
+                    entry = (row[1], row[0])
+                    tier = "disk_hits"
+                    self._remember(layer, key, entry)
+            
+            if entry is not None and (allow_stale or now - entry[0] <= ttl):
+                self._memory.move_to_end((layer, key))
+                stats[tier] += 1
+                if now - entry[0] > ttl:
+                    stats["stale_hits"] += 1
+                stats["hit_seconds"] += time.perf_counter() - started
+                return json.loads(entry[1])
+            
+            stats["misses"] += 1
+            return None
+    
+    def set(self, layer: str, key: str, value: Dict):
+        """Store a value in both tiers"""
+        entry = (time.time(), json.dumps(value))
+        
+        with self._lock:
+            self._remember(layer, key, entry)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO lookups (layer, key, value, stored_at) VALUES (?, ?, ?, ?)",
+                    (layer, key, entry[1], entry[0])
+                )
+                self._db.commit()
+    
+    def get_or_fetch(
+        self,
+        layer: str,
+        key: str,
+        fetch: Callable[[], Dict],
+        cacheable: Callable[[Dict], bool] = lambda value: value.get("success", True)
+    ) -> Dict:
+        """
+        Return the cached value, or call `fetch` and cache its result.
+        Only results accepted by `cacheable` are stored (failed lookups are
+        not), and exceptions from `fetch` propagate uncached.
+        
+        Concurrent misses on the same key share one `fetch`: the first
+        caller runs it and the others wait for its result, up to their own
+        deadline_scope, after which they fetch for themselves.
+        """
+        cached = self.get(layer, key)
+        if cached is not None:
+            return cached
+        
+        with self._lock:
+            future = self._inflight.get((layer, key))
+            owner = future is None
+            if owner:
+                future = self._inflight[(layer, key)] = Future()
+        
+        if not owner:
+            try:
+                return json.loads(future.result(timeout=remaining_time()))
+            except FutureTimeoutError:
+                return fetch()
+        
+        started = time.perf_counter()
+        try:
+            value = fetch()
+            elapsed = time.perf_counter() - started
+            if cacheable(value):
+                self.set(layer, key, value)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            # Waiters get their own copy, like every other read
+            future.set_result(json.dumps(value))
+        finally:
+            with self._lock:
+                del self._inflight[(layer, key)]
+        
+        with self._lock:
+            self._layer_stats(layer)["miss_seconds"] += elapsed
+        return value
+    
+    def stats(self) -> Dict[str, Dict]:
+        """
+        Hit/miss counters and average latency per layer
+        
+        Returns:
+            {
+                "zoning": {
+                    "memory_hits": int, "disk_hits": int, "stale_hits": int,
+                    "misses": int, "hit_rate": float,
+                    "avg_hit_ms": float, "avg_miss_ms": float
+                },
+                ...
+            }
+        """
+        with self._lock:
+            report = {}
+            for layer, stats in self._stats.items():
+                hits = stats["memory_hits"] + stats["disk_hits"]
+                lookups = hits + stats["misses"]
+                report[layer] = {
+                    "memory_hits": stats["memory_hits"],
+                    "disk_hits": stats["disk_hits"],
+                    "stale_hits": stats["stale_hits"],
+                    "misses": stats["misses"],
+                    "hit_rate": hits / lookups if lookups else 0.0,
+                    "avg_hit_ms": 1000 * stats["hit_seconds"] / hits if hits else 0.0,
+                    "avg_miss_ms": 1000 * stats["miss_seconds"] / stats["misses"] if stats["misses"] else 0.0
+                }
+            return report
+    
+    def clear(self, layer: Optional[str] = None):
+        """Drop cached entries, for one layer or all of them"""
+        with self._lock:
+            if layer is None:
+                self._memory.clear()
+            else:
+                for cached_key in [k for k in self._memory if k[0] == layer]:
+                    del self._memory[cached_key]
+            
+            if self._db is not None:
+                if layer is None:
+                    self._db.execute("DELETE FROM lookups")
+                else:
+                    self._db.execute("DELETE FROM lookups WHERE layer = ?", (layer,))
+                self._db.commit()
+    
+    def _remember(self, layer: str, key: str, entry):
+        """Insert into the LRU tier, evicting the oldest entries (lock held)"""
+        self._memory[(layer, key)] = entry
+        self._memory.move_to_end((layer, key))
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+    
+    def _layer_stats(self, layer: str) -> Dict:
+        """Counters for one layer (lock held)"""
+        if layer not in self._stats:
+            self._stats[layer] = {
+                "memory_hits": 0,
+                "disk_hits": 0,
+                "stale_hits": 0,
+                "misses": 0,
+                "hit_seconds": 0.0,
+                "miss_seconds": 0.0
+            }
+        return self._stats[layer]
+
+
+class ParcelIndex:
+    """
+    Recently seen CRIM parcel polygons, so a point can be mapped to its
+    parcel locally and lookups cached per parcel instead of per grid cell.
+    
+    Geocoders return slightly different rooftop points for the same lot;
+    any of them that falls inside a known parcel shares its cached results.
+    """
+    
+    def __init__(self, max_parcels: int = 5000, cell_size_m: float = 250.0):
+        """
+        Args:
+            max_parcels: Parcels kept, least recently used evicted first
+            cell_size_m: Size of the grid buckets used to find candidates
+        """
+        self.max_parcels = max_parcels
+        self.cell_size_m = cell_size_m
+        
+        self._parcels = OrderedDict()
+        self._grid = {}
+        self._lock = threading.Lock()
+    
+    def add(self, catastro: str, rings: List):
+        """Remember a parcel polygon (Web Mercator rings)"""
+        bbox = rings_bbox(rings)
+        with self._lock:
+            if catastro in self._parcels:
+                self._forget(catastro)
+            self._parcels[catastro] = (bbox, rings)
+            for cell in self._cells(bbox):
+                self._grid.setdefault(cell, set()).add(catastro)
+            while len(self._parcels) > self.max_parcels:
+                self._forget(next(iter(self._parcels)))
+    
+    def locate(self, x: float, y: float) -> Optional[str]:
+        """Catastro number of the known parcel containing the point, or None"""
+        cell = (math.floor(x / self.cell_size_m), math.floor(y / self.cell_size_m))
+        with self._lock:
+            for catastro in self._grid.get(cell, ()):
+                (minx, miny, maxx, maxy), rings = self._parcels[catastro]
+                if minx <= x <= maxx and miny <= y <= maxy and point_in_rings(x, y, rings):
+                    self._parcels.move_to_end(catastro)
+                    return catastro
+        return None
+    
+    def __len__(self) -> int:
+        return len(self._parcels)
+    
+    def _cells(self, bbox):
+        minx, miny, maxx, maxy = bbox
+        for column in range(math.floor(minx / self.cell_size_m), math.floor(maxx / self.cell_size_m) + 1):
+            for row in range(math.floor(miny / self.cell_size_m), math.floor(maxy / self.cell_size_m) + 1):
+                yield (column, row)
+    
+    def _forget(self, catastro: str):
+        """Drop a parcel and its grid entries (lock held)"""
+        bbox, _ = self._parcels.pop(catastro)
+        for cell in self._cells(bbox):
+            bucket = self._grid.get(cell)
+            if bucket is not None:
+                bucket.discard(catastro)
+                if not bucket:
+                    del self._grid[cell]
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+_default_parcel_index = ParcelIndex()
+
+
+def get_default_cache() -> LookupCache:
+    """
+    Process-wide cache shared by all clients. The SQLite file location can
+    be moved with PYXTEN_CACHE_PATH.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = LookupCache(
+                db_path=Path(os.getenv("PYXTEN_CACHE_PATH", str(DEFAULT_CACHE_PATH)))
+            )
+        return _default_cache
+
+
+def get_default_parcel_index() -> ParcelIndex:
+    """Process-wide parcel index shared by all clients"""
+    return _default_parcel_index
@@ -0,0 +1,237 @@
+"""
+Municipality Index - Local boundaries of the 78 municipios of Puerto Rico
+Answers "is this point in Puerto Rico" and "which municipio is it in"
+without a network call, so bad geocodes are caught before any GIS query.
+
+The boundaries are built once from the Census TIGERweb county-equivalent
+layer, simplified, and stored as flat NumPy arrays in an .npz file (not
+shipped in the repository; see "Local GIS data" in the README):
+
+    python -m src.services.municipality_index build
+"""
+
+import argparse
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import requests
+
+from src.utils.address_normalizer import fold_accents as _fold
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BOUNDARIES_PATH = Path(__file__).parent.parent.parent / "data" / "municipality_boundaries.npz"
+MUNICIPALITIES_PATH = Path(__file__).parent.parent.parent / "data" / "municipalities.json"
+
+TIGERWEB_COUNTIES_URL = (
+    "https://tigerweb.geo.census.gov/arcgis/rest/services/TIGERweb/State_County/MapServer/1/query"
+)
+
+# (min_lat, min_lng, max_lat, max_lng) around the main island, Vieques,
+# Culebra, Mona and Desecheo, with a small margin for coastal geocodes
+PR_BOUNDS = (17.80, -68.00, 18.60, -65.15)
+
+
+class MunicipalityIndex:
+    """
+    Point -> municipio lookups over the simplified boundary arrays
+
+    Without a boundary file only the Puerto Rico bounding box is known and
+    municipality checks fall back to comparing accent-folded names.
+    """
+
+    def __init__(self, path: Optional[Path] = DEFAULT_BOUNDARIES_PATH):
+        self.path = Path(path) if path else None
+        self.names: List[str] = []
+        self.available = False
+
+        if self.path is not None and not self.path.exists():
+            logger.warning(
+                f"Municipio boundary file {self.path} not found; municipio checks fall back to "
+                "name matching. Build it with: python -m src.services.municipality_index build"
+            )
+        elif self.path is not None:
+            try:
+                with np.load(self.path) as data:
+                    self.names = [str(name) for name in data["names"]]
+                    self._bboxes = data["bboxes"]
+                    self._ring_offsets = data["ring_offsets"]
+                    self._ring_owner = data["ring_owner"]
+                    self._vertices = data["vertices"].astype(np.float64)
+            except (OSError, ValueError, KeyError) as e:
+                logger.error(f"Unreadable municipio boundary file {self.path}: {e}")
+                self.names = []
+            else:
+                self._rings_by_owner = [
+                    np.flatnonzero(self._ring_owner == i) for i in range(len(self.names))
+                ]
+                self.available = True
+
+        self._folded = {_fold(name): name for name in self.names or self._known_names()}
+
+    @staticmethod
+    def _known_names() -> List[str]:
+        with open(MUNICIPALITIES_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)["municipalities"]
+
+    @staticmethod
+    def in_puerto_rico(lat: float, lng: float) -> bool:
+        """Cheap bounding-box check, true for every point in a municipio"""
+        min_lat, min_lng, max_lat, max_lng = PR_BOUNDS
+        return min_lat <= lat <= max_lat and min_lng <= lng <= max_lng
+
+    def municipality_at(self, lat: float, lng: float) -> Optional[str]:
+        """Municipio containing the point, or None (offshore or no boundaries)"""
+        if not self.available or not self.in_puerto_rico(lat, lng):
+            return None
+
+        bboxes = self._bboxes
+        candidates = np.flatnonzero(
+            (bboxes[:, 0] <= lng) & (lng <= bboxes[:, 2]) & (bboxes[:, 1] <= lat) & (lat <= bboxes[:, 3])
+        )
+        for owner in candidates:
+            if self._contains(owner, lng, lat):
+                return self.names[owner]
+        return None
+
+    def canonical_name(self, municipality: str) -> Optional[str]:
+        """ "bayamon" / "BAYAMÓN" -> "Bayamón", or None if not a municipio"""
+        return self._folded.get(" ".join(_fold(municipality).split()))
+
+    def matches(
+        self,
+        lat: float,
+        lng: float,
+        municipality: str,
+        formatted_address: Optional[str] = None
+    ) -> bool:
+        """
+        Whether a geocoded point belongs to the expected municipio
+
+        Uses the boundaries when available; otherwise whether the
+        accent-folded name appears in the geocoder's formatted address.
+        """
+        expected = _fold(municipality).strip()
+        if self.available:
+            found = self.municipality_at(lat, lng)
+            if found is not None:
+                return _fold(found) == expected
+        return bool(formatted_address) and expected in _fold(formatted_address)
+
+    def _contains(self, owner: int, x: float, y: float) -> bool:
+        """Even-odd test over all rings of one municipio"""
+        inside = False
+        for ring in self._rings_by_owner[owner]:
+            points = self._vertices[self._ring_offsets[ring]:self._ring_offsets[ring + 1]]
+            xi, yi = points[:, 0], points[:, 1]
+            xj, yj = np.roll(xi, 1), np.roll(yi, 1)
+            straddles = (yi > y) != (yj > y)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                crossing_x = (xj - xi) * (y - yi) / (yj - yi) + xi
+            if np.count_nonzero(straddles & (x < crossing_x)) % 2:
+                inside = not inside
+        return inside
+
+
+_default_index = None
+_default_index_lock = threading.Lock()
+
+
+def get_municipality_index() -> MunicipalityIndex:
+    """Process-wide index over the bundled boundary file"""
+    global _default_index
+    with _default_index_lock:
+        if _default_index is None:
+            _default_index = MunicipalityIndex()
+        return _default_index
+
+
+def build_municipality_boundaries(
+    path: Path = DEFAULT_BOUNDARIES_PATH,
+    tolerance: float = 0.0005,
+    timeout: int = 60,
+    progress: Optional[Callable[[str], None]] = None
+) -> int:
+    """
+    Download the PR county-equivalent polygons from TIGERweb and write the
+    compact boundary file
+
+    Args:
+        path: .npz file to write
+        tolerance: maxAllowableOffset in degrees (0.0005 ~ 50 m)
+        timeout: Request timeout in seconds
+        progress: Optional callback(municipio name)
+
+    Returns:
+        Number of municipios stored
+    """
+    response = requests.get(TIGERWEB_COUNTIES_URL, params={
+        "where": "STATE='72'",
+        "outFields": "BASENAME,NAME,GEOID",
+        "returnGeometry": "true",
+        "outSR": "4326",
+        "maxAllowableOffset": tolerance,
+        "geometryPrecision": 6,
+        "f": "json"
+    }, timeout=timeout)
+    response.raise_for_status()
+    data = response.json()
+    if "error" in data:
+        raise RuntimeError(data["error"].get("message", "Unknown API error"))
+
+    # Store the spelling used everywhere else in the app
+    known = {_fold(name): name for name in MunicipalityIndex._known_names()}
+    polygons: Dict[str, List] = {}
+    for feature in data.get("features", []):
+        attrs = feature.get("attributes", {})
+        name = known.get(_fold(attrs.get("BASENAME") or attrs.get("NAME", "").replace(" Municipio", "")))
+        rings = (feature.get("geometry") or {}).get("rings")
+        if name and rings:
+            polygons.setdefault(name, []).extend(rings)
+            if progress:
+                progress(name)
+
+    missing = sorted(set(known.values()) - set(polygons))
+    if missing:
+        raise RuntimeError(f"TIGERweb returned no boundary for: {', '.join(missing)}")
+
+    names = sorted(polygons)
+    bboxes, ring_offsets, ring_owner, vertices = [], [0], [], []
+    for owner, name in enumerate(names):
+        points = np.concatenate([np.asarray(ring, dtype=np.float64) for ring in polygons[name]])
+        bboxes.append([points[:, 0].min(), points[:, 1].min(), points[:, 0].max(), points[:, 1].max()])
+        for ring in polygons[name]:
+            vertices.append(np.asarray(ring, dtype=np.float32))
+            ring_offsets.append(ring_offsets[-1] + len(ring))
+            ring_owner.append(owner)
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez_compressed(
+        path,
+        names=np.array(names),
+        bboxes=np.array(bboxes, dtype=np.float64),
+        ring_offsets=np.array(ring_offsets, dtype=np.int64),
+        ring_owner=np.array(ring_owner, dtype=np.int32),
+        vertices=np.concatenate(vertices)
+    )
+    return len(names)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the local municipio boundary index")
+    parser.add_argument("command", choices=["build"])
+    parser.add_argument("--out", default=str(DEFAULT_BOUNDARIES_PATH))
+    parser.add_argument("--tolerance", type=float, default=0.0005)
+    args = parser.parse_args()
+
+    count = build_municipality_boundaries(
+        path=Path(args.out),
+        tolerance=args.tolerance,
+        progress=lambda name: print(f"  {name}", flush=True)
+    )
+    print(f"Stored {count} municipio boundaries in {args.out}")
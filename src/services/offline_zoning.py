@@ -0,0 +1,205 @@
+"""
+Offline Zoning - Local snapshot of the MIPR Calificación layer
+Syncs the zoning polygons once into SQLite with an R-tree index so district
+lookups are a local point-in-polygon test instead of a remote query.
+
+Usage:
+    python -m src.services.offline_zoning sync
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from src.utils.geometry import distance_to_rings, point_in_rings, rings_bbox
+
+DEFAULT_SNAPSHOT_PATH = Path(__file__).parent.parent.parent / "data" / "gis" / "calificacion_snapshot.sqlite3"
+
+
+class OfflineZoningIndex:
+    """
+    Read-only zoning lookups against a synced Calificación snapshot
+    
+    Mirrors the live query semantics: a point inside a polygon wins,
+    otherwise the nearest polygon within `search_distance` meters.
+    """
+    
+    def __init__(self, db_path: Path = DEFAULT_SNAPSHOT_PATH, search_distance: float = 10.0):
+        self.db_path = Path(db_path)
+        self.search_distance = search_distance
+        self._db = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False)
+        self._lock = threading.Lock()
+        self.metadata = dict(self._db.execute("SELECT key, value FROM meta").fetchall())
+    
+    def lookup(self, x: float, y: float) -> Optional[Dict]:
+        """
+        Zoning district at a Web Mercator point
+        
+        Returns:
+            {"district_code": str, "district_name": str or None} or None if
+            the snapshot has no polygon near the point
+        """
+        d = self.search_distance
+        with self._lock:
+            candidates = self._db.execute(
+                "SELECT z.code, z.name, z.rings FROM zones_rtree r "
+                "JOIN zones z ON z.id = r.id "
+                "WHERE r.minx <= ? AND r.maxx >= ? AND r.miny <= ? AND r.maxy >= ?",
+                (x + d, x - d, y + d, y - d)
+            ).fetchall()
+        
+        nearest = None
+        nearest_distance = d
+        for code, name, rings_json in candidates:
+            rings = json.loads(rings_json)
+            if point_in_rings(x, y, rings):
+                return {"district_code": code, "district_name": name}
+            distance = distance_to_rings(x, y, rings)
+            if distance <= nearest_distance:
+                nearest, nearest_distance = (code, name), distance
+        
+        if nearest is not None:
+            return {"district_code": nearest[0], "district_name": nearest[1]}
+        return None
+    
+    def close(self):
+        self._db.close()
+
+
+_default_index = None
+_default_index_lock = threading.Lock()
+
+
+def get_default_offline_zoning() -> Optional[OfflineZoningIndex]:
+    """
+    Shared index over the default snapshot (PYXTEN_ZONING_SNAPSHOT overrides
+    the path), or None while no snapshot has been synced.
+    """
+    global _default_index
+    with _default_index_lock:
+        if _default_index is None:
+            path = Path(os.getenv("PYXTEN_ZONING_SNAPSHOT", str(DEFAULT_SNAPSHOT_PATH)))
+            if path.exists():
+                _default_index = OfflineZoningIndex(path)
+        return _default_index
+
+
+def sync_calificacion_snapshot(
+    client=None,
+    db_path: Path = DEFAULT_SNAPSHOT_PATH,
+    chunk_size: int = 500,
+    progress: Optional[Callable[[int, int], None]] = None
+) -> int:
+    """
+    Page through the Calificación layer and write a fresh local snapshot
+    
+    Object IDs are fetched first and features are then requested in
+    `chunk_size` batches, which works regardless of the server's
+    maxRecordCount or pagination support. The snapshot is built in a
+    temporary file and swapped in atomically, so readers never see a
+    partial sync.
+    
+    Args:
+        client: ArcGISPRClient used for the HTTP calls (a new one by default)
+        db_path: Snapshot file to (re)write
+        chunk_size: Features per request
+        progress: Optional callback(features_done, features_total)
+    
+    Returns:
+        Number of zoning polygons stored
+    """
+    from src.services.arcgis_pr_client import ArcGISPRClient
+    
+    client = client or ArcGISPRClient(use_cache=False)
+    db_path = Path(db_path)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = db_path.with_suffix(".tmp")
+    if tmp_path.exists():
+        tmp_path.unlink()
+    
+    ids_response = client._post_json(client.CALIFICACION_URL, {
+        "where": "1=1",
+        "returnIdsOnly": "true",
+        "f": "json"
+    })
+    if "error" in ids_response:
+        raise RuntimeError(ids_response["error"].get("message", "Unknown API error"))
+    object_ids: List[int] = sorted(ids_response.get("objectIds") or [])
+    
+    db = sqlite3.connect(str(tmp_path))
+    try:
+        db.executescript(
+            "CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);"
+            "CREATE TABLE zones (id INTEGER PRIMARY KEY, code TEXT, name TEXT, rings TEXT NOT NULL);"
+            "CREATE VIRTUAL TABLE zones_rtree USING rtree(id, minx, maxx, miny, maxy);"
+        )
+        
+        out_fields = client._out_fields(client.CALIFICACION_URL, client.ZONING_FIELDS)
+        stored = 0
+        for start in range(0, len(object_ids), chunk_size):
+            chunk = object_ids[start:start + chunk_size]
+            data = client._post_json(client.CALIFICACION_URL, {
+                "objectIds": ",".join(str(oid) for oid in chunk),
+                "outFields": out_fields,
+                "returnGeometry": "true",
+                "outSR": "3857",
+                "f": "json"
+            })
+            if "error" in data:
+                raise RuntimeError(data["error"].get("message", "Unknown API error"))
+        
+            for feature in data.get("features", []):
+                rings = (feature.get("geometry") or {}).get("rings")
+                if not rings:
+                    continue
+                zoning = client._zoning_from_attributes(feature.get("attributes", {}))
+                minx, miny, maxx, maxy = rings_bbox(rings)
+                cursor = db.execute(
+                    "INSERT INTO zones (code, name, rings) VALUES (?, ?, ?)",
+                    (zoning["district_code"], zoning["district_name"], json.dumps(rings, separators=(",", ":")))
+                )
+                db.execute(
+                    "INSERT INTO zones_rtree (id, minx, maxx, miny, maxy) VALUES (?, ?, ?, ?, ?)",
+                    (cursor.lastrowid, minx, maxx, miny, maxy)
+                )
+                stored += 1
+        
+            db.commit()
+            if progress:
+                progress(min(start + chunk_size, len(object_ids)), len(object_ids))
+        
+        db.executemany("INSERT INTO meta (key, value) VALUES (?, ?)", [
+            ("source_url", client.CALIFICACION_URL),
+            ("synced_at", datetime.now().isoformat()),
+            ("feature_count", str(stored))
+        ])
+        db.commit()
+        db.close()
+        os.replace(tmp_path, db_path)
+    finally:
+        # Any failure (API error, timeout, interrupted sync) leaves no temp file
+        db.close()
+        if tmp_path.exists():
+            tmp_path.unlink()
+    
+    return stored
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the local Calificación snapshot")
+    parser.add_argument("command", choices=["sync"])
+    parser.add_argument("--db", default=str(DEFAULT_SNAPSHOT_PATH))
+    parser.add_argument("--chunk-size", type=int, default=500)
+    args = parser.parse_args()
+    
+    count = sync_calificacion_snapshot(
+        db_path=Path(args.db),
+        chunk_size=args.chunk_size,
+        progress=lambda done, total: print(f"  {done}/{total} features", flush=True)
+    )
+    print(f"Stored {count} zoning polygons in {args.db}")
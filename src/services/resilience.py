@@ -0,0 +1,426 @@
+"""
+Resilience - Retry, hedging and circuit-breaker policy for GIS calls
+Wraps every sige.pr.gov / sigejp.pr.gov request made by the ArcGIS clients
+"""
+
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Dict, Iterator, Optional, TypeVar
+from urllib.parse import urlparse
+
+import httpx
+import requests
+
+T = TypeVar("T")
+
+# Absolute time.monotonic() by which the current lookup must be answered
+_deadline: ContextVar[Optional[float]] = ContextVar("gis_deadline", default=None)
+
+
+@contextmanager
+def deadline_scope(seconds: float) -> Iterator[float]:
+    """
+    Calls made inside the block share one deadline `seconds` from now; a
+    nested scope can only shorten it. Worker threads see it when started
+    with contextvars.copy_context().
+    """
+    deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    if current is not None:
+        deadline = min(deadline, current)
+    token = _deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_time(default: Optional[float] = None) -> Optional[float]:
+    """Seconds left in the current deadline scope, capped at `default`"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return default
+    remaining = max(0.0, deadline - time.monotonic())
+    return remaining if default is None else min(default, remaining)
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling the service while its circuit breaker is open"""
+    
+    def __init__(self, host: str, retry_in: float):
+        super().__init__(f"{host} unavailable, retrying in {retry_in:.0f}s")
+        self.host = host
+        self.retry_in = retry_in
+
+
+class DeadlineExceededError(requests.exceptions.Timeout, httpx.TimeoutException):
+    """
+    No time left for another attempt; a timeout to both HTTP clients, so it
+    is handled wherever they already handle request timeouts
+    """
+
+
+class CircuitBreaker:
+    """
+    Classic closed -> open -> half-open breaker for one host
+    
+    After `failure_threshold` consecutive failures the circuit opens and
+    calls fail immediately for `reset_timeout` seconds; then a single trial
+    call is let through and its outcome closes or re-opens the circuit.
+    """
+    
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+    
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+    
+    def allow(self) -> Optional[float]:
+        """None if a call may proceed, else seconds until the next trial"""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return None
+            if state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return None
+            return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+    
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+    
+    def record_neutral(self):
+        """The call says nothing about the host's health (a bad request)"""
+        with self._lock:
+            self._trial_in_flight = False
+    
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_in_flight or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies for one host"""
+    
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+    
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+    
+    def percentile(self, p: float, min_samples: int = 20) -> Optional[float]:
+        with self._lock:
+            if len(self._samples) < min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+class TokenBucket:
+    """
+    Blocking token-bucket rate limiter, shared across threads
+    
+    Allows bursts of up to `capacity` calls and a sustained `rate` calls
+    per second; acquire() sleeps until a token is available.
+    """
+    
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self, tokens: float = 1.0):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait_for = (tokens - self._tokens) / self.rate
+            time.sleep(wait_for)
+
+
+def is_retryable(error: Exception) -> bool:
+    """Timeouts, connection failures, 429 and 5xx are worth another attempt"""
+    if isinstance(error, (requests.exceptions.Timeout, requests.exceptions.ConnectionError,
+                          httpx.TimeoutException, httpx.TransportError)):
+        return True
+    response = getattr(error, "response", None)
+    status = getattr(response, "status_code", None)
+    return status is not None and (status == 429 or status >= 500)
+
+
+def is_timeout(error: Exception) -> bool:
+    return isinstance(error, (requests.exceptions.Timeout, httpx.TimeoutException))
+
+
+class ResiliencePolicy:
+    """
+    Bounded retries with exponential backoff and full jitter, optional
+    hedged requests and a circuit breaker per host.
+    
+    One policy is meant to be shared by every client in the process so the
+    breakers see all traffic to a host.
+    """
+    
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 4.0,
+        hedge: bool = False,
+        hedge_percentile: float = 95,
+        hedge_after: Optional[float] = None,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0
+    ):
+        """
+        Args:
+            max_attempts: Attempts per call, including the first
+            base_delay: Backoff before the second attempt, doubled after each
+            max_delay: Upper bound of a single backoff
+            hedge: Send a duplicate request when the first one is slow. Off by
+                default, as it adds load to a host that is already slow;
+                opt in for idempotent reads.
+            hedge_percentile: Observed latency percentile that counts as slow
+            hedge_after: Fixed hedge delay in seconds, instead of the percentile
+            failure_threshold: Consecutive failures that open a host's circuit
+            reset_timeout: Seconds an open circuit fails fast before a trial call
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_after = hedge_after
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._latency: Dict[str, LatencyTracker] = {}
+        self._lock = threading.Lock()
+        self._hedge_executor = None
+    
+    def breaker(self, url: str) -> CircuitBreaker:
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._breakers:
+                self._breakers[host] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return self._breakers[host]
+    
+    def latency(self, url: str) -> LatencyTracker:
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._latency:
+                self._latency[host] = LatencyTracker()
+            return self._latency[host]
+    
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter delay before retry number `attempt` (1-based)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+    
+    def hedge_delay(self, url: str) -> Optional[float]:
+        if not self.hedge:
+            return None
+        if self.hedge_after is not None:
+            return self.hedge_after
+        return self.latency(url).percentile(self.hedge_percentile)
+    
+    def call(self, url: str, fn: Callable[[float], T], timeout: float) -> T:
+        """
+        Run a blocking request under the policy
+        
+        Args:
+            fn: Makes one attempt; receives that attempt's timeout in seconds
+            timeout: Per-attempt timeout. All attempts, backoffs and hedges
+                together stay within the enclosing deadline_scope, or within
+                `timeout` when there is none.
+        
+        Raises DeadlineExceededError when the deadline_scope runs out, be it
+        before an attempt or by cutting one short.
+        """
+        breaker = self.breaker(url)
+        deadline = _deadline.get()
+        scoped = deadline is not None
+        if not scoped:
+            deadline = time.monotonic() + timeout
+        
+        for attempt in range(1, self.max_attempts + 1):
+            attempt_timeout = min(timeout, deadline - time.monotonic())
+            if attempt_timeout <= 0:
+                raise DeadlineExceededError(f"No time left for {urlparse(url).netloc}")
+            retry_in = breaker.allow()
+            if retry_in is not None:
+                raise CircuitOpenError(urlparse(url).netloc, retry_in)
+            
+            started = time.perf_counter()
+            try:
+                result = self._hedged(url, fn, attempt_timeout, deadline)
+            except Exception as e:
+                if not is_retryable(e):
+                    # The service answered; a bad request is not an outage
+                    breaker.record_neutral()
+                    raise
+                if scoped and attempt_timeout < timeout and is_timeout(e):
+                    # Cut short by the caller's deadline, not the host's fault
+                    breaker.record_neutral()
+                    raise DeadlineExceededError(f"No response from {urlparse(url).netloc} before the deadline") from e
+                breaker.record_failure()
+                delay = self.backoff(attempt)
+                if attempt == self.max_attempts or time.monotonic() + delay >= deadline:
+                    raise
+                time.sleep(delay)
+                continue
+            
+            breaker.record_success()
+            self.latency(url).record(time.perf_counter() - started)
+            return result
+    
+    async def acall(self, url: str, fn: Callable[[float], Awaitable[T]], timeout: float) -> T:
+        """Run an async request under the policy; same contract as call()"""
+        breaker = self.breaker(url)
+        deadline = _deadline.get()
+        scoped = deadline is not None
+        if not scoped:
+            deadline = time.monotonic() + timeout
+        
+        for attempt in range(1, self.max_attempts + 1):
+            attempt_timeout = min(timeout, deadline - time.monotonic())
+            if attempt_timeout <= 0:
+                raise DeadlineExceededError(f"No time left for {urlparse(url).netloc}")
+            retry_in = breaker.allow()
+            if retry_in is not None:
+                raise CircuitOpenError(urlparse(url).netloc, retry_in)
+            
+            started = time.perf_counter()
+            try:
+                result = await self._ahedged(url, fn, attempt_timeout, deadline)
+            except Exception as e:
+                if not is_retryable(e):
+                    breaker.record_neutral()
+                    raise
+                if scoped and attempt_timeout < timeout and is_timeout(e):
+                    breaker.record_neutral()
+                    raise DeadlineExceededError(f"No response from {urlparse(url).netloc} before the deadline") from e
+                breaker.record_failure()
+                delay = self.backoff(attempt)
+                if attempt == self.max_attempts or time.monotonic() + delay >= deadline:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            
+            breaker.record_success()
+            self.latency(url).record(time.perf_counter() - started)
+            return result
+    
+    def _hedged(self, url: str, fn: Callable[[float], T], timeout: float, deadline: float) -> T:
+        """
+        Call fn; if it is still running after the hedge delay and there is
+        time left, race a duplicate with the remaining time
+        """
+        delay = self.hedge_delay(url)
+        if delay is None or delay >= timeout:
+            return fn(timeout)
+        
+        executor = self._get_hedge_executor()
+        primary = executor.submit(fn, timeout)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+        
+        remaining = min(timeout, deadline - time.monotonic())
+        if remaining <= 0:
+            return primary.result()
+        pending = {primary, executor.submit(fn, remaining)}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+        raise error
+    
+    async def _ahedged(self, url: str, fn: Callable[[float], Awaitable[T]], timeout: float, deadline: float) -> T:
+        delay = self.hedge_delay(url)
+        if delay is None or delay >= timeout:
+            return await fn(timeout)
+        
+        primary = asyncio.ensure_future(fn(timeout))
+        done, _ = await asyncio.wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+        
+        remaining = min(timeout, deadline - time.monotonic())
+        if remaining <= 0:
+            return await primary
+        pending = {primary, asyncio.ensure_future(fn(remaining))}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+        finally:
+            for task in pending:
+                task.cancel()
+        raise error
+    
+    def _get_hedge_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._hedge_executor is None:
+                self._hedge_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="gis-hedge")
+            return self._hedge_executor
+    
+    def status(self) -> Dict[str, Dict]:
+        """Breaker state and p95 latency per host, for diagnostics"""
+        with self._lock:
+            hosts = set(self._breakers) | set(self._latency)
+            breakers = dict(self._breakers)
+            latency = dict(self._latency)
+        return {
+            host: {
+                "circuit": breakers[host].state if host in breakers else "closed",
+                "consecutive_failures": breakers[host].failures if host in breakers else 0,
+                "p95_seconds": latency[host].percentile(95) if host in latency else None
+            }
+            for host in hosts
+        }
+
+
+_default_policy = ResiliencePolicy()
+
+
+def get_default_policy() -> ResiliencePolicy:
+    """Process-wide policy shared by all GIS clients"""
+    return _default_policy
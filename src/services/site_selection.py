@@ -0,0 +1,370 @@
+"""
+Site Selection - "Where in municipio M can I put use U?"
+Answers reverse zoning questions from a local parcel -> zoning table instead
+of one ArcGIS lookup per parcel. The table is SQLite with an index on
+(municipality, zoning_code), an R-tree over parcel locations for bounding
+box / radius filters and a parcel -> overlay table for excluding parcels in
+blocking overlay zones.
+
+The table is filled one municipio at a time from CRIM parcels, with zoning
+and overlays resolved in bulk:
+
+    python -m src.services.site_selection sync Bayamón
+"""
+
+import argparse
+import math
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.utils.address_normalizer import normalize_municipality
+from src.utils.geometry import interior_point
+from src.utils.geo_projection import web_mercator_to_lat_lng
+
+DEFAULT_SITE_TABLE_PATH = Path(__file__).parent.parent.parent / "data" / "gis" / "site_selection.sqlite3"
+
+# Overlay types that rule a parcel out unless the caller says otherwise
+BLOCKING_OVERLAYS = ("area_inundacion",)
+
+EARTH_RADIUS_M = 6371008.8
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);"
+    "CREATE TABLE IF NOT EXISTS parcels ("
+    "  id INTEGER PRIMARY KEY, catastro TEXT UNIQUE NOT NULL, municipality TEXT NOT NULL,"
+    "  municipality_name TEXT, zoning_code TEXT, lat REAL NOT NULL, lng REAL NOT NULL"
+    ");"
+    "CREATE INDEX IF NOT EXISTS parcels_municipality_zoning ON parcels (municipality, zoning_code);"
+    "CREATE TABLE IF NOT EXISTS parcel_overlays (parcel_id INTEGER NOT NULL, overlay TEXT NOT NULL,"
+    "  PRIMARY KEY (parcel_id, overlay)) WITHOUT ROWID;"
+    "CREATE VIRTUAL TABLE IF NOT EXISTS parcels_rtree USING rtree(id, min_lat, max_lat, min_lng, max_lng);"
+)
+
+
+def _radius_bbox(lat: float, lng: float, radius_m: float) -> Tuple[float, float, float, float]:
+    """(min_lat, min_lng, max_lat, max_lng) enclosing a circle"""
+    dlat = math.degrees(radius_m / EARTH_RADIUS_M)
+    dlng = math.degrees(radius_m / (EARTH_RADIUS_M * math.cos(math.radians(lat))))
+    return lat - dlat, lng - dlng, lat + dlat, lng + dlng
+
+
+def _haversine_m(lat: float, lng: float, lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+    phi1, phi2 = math.radians(lat), np.radians(lats)
+    dphi = phi2 - phi1
+    dlambda = np.radians(lngs) - math.radians(lng)
+    a = np.sin(dphi / 2) ** 2 + math.cos(phi1) * np.cos(phi2) * np.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
+
+
+class SiteSelector:
+    """Reverse site-selection queries over the local parcel table"""
+
+    def __init__(self, db_path: Path = DEFAULT_SITE_TABLE_PATH, rules_db=None):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._db.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._rules_db = rules_db
+
+    @property
+    def rules_db(self):
+        # The shared instance follows rules hot reloads
+        if self._rules_db is not None:
+            return self._rules_db
+        from src.database.rules_loader import get_rules_database
+        return get_rules_database()
+
+    def find_sites(
+        self,
+        use: str,
+        municipality: str,
+        bbox: Optional[Tuple[float, float, float, float]] = None,
+        center: Optional[Tuple[float, float]] = None,
+        radius_m: Optional[float] = None,
+        blocking_overlays: Sequence[str] = BLOCKING_OVERLAYS,
+        limit: Optional[int] = None
+    ) -> Dict:
+        """
+        Parcels in a municipio where a use is allowed
+
+        Args:
+            use: Use type code ("COM-RESTAURANT") or a specific use name
+                ("Alojamiento corto plazo")
+            municipality: Municipio name (accents and case ignored)
+            bbox: Optional (min_lat, min_lng, max_lat, max_lng)
+            center: Optional (lat, lng) for a radius search
+            radius_m: Radius around `center` in meters
+            blocking_overlays: Overlay types that exclude a parcel
+            limit: Maximum parcels returned (nearest first with a radius)
+
+        Returns:
+            {
+                "success": bool,
+                "use": str,
+                "zones": [district codes where the use is allowed],
+                "parcels": [{"catastro", "zoning_code", "lat", "lng",
+                             "distance_m" (radius searches)}, ...],
+                "count": int,
+                "error": str or None
+            }
+        """
+        zones = self._zones_for(use)
+        result = {"success": True, "use": use, "zones": zones, "parcels": [], "count": 0, "error": None}
+        if zones is None:
+            return {**result, "success": False, "zones": [], "error": f"Uso '{use}' no encontrado"}
+        if not zones:
+            return result
+        if (center is None) != (radius_m is None):
+            return {**result, "success": False, "error": "A radius search needs both center and radius_m"}
+
+        sql = [
+            "SELECT p.catastro, p.zoning_code, p.lat, p.lng FROM parcels p",
+            f"WHERE p.municipality = ? AND p.zoning_code IN ({','.join('?' * len(zones))})"
+        ]
+        params: List = [normalize_municipality(municipality), *zones]
+
+        if center is not None:
+            radius_bbox = _radius_bbox(center[0], center[1], radius_m)
+            bbox = radius_bbox if bbox is None else (
+                max(bbox[0], radius_bbox[0]), max(bbox[1], radius_bbox[1]),
+                min(bbox[2], radius_bbox[2]), min(bbox[3], radius_bbox[3])
+            )
+        if bbox is not None:
+            sql.append(
+                "AND p.id IN (SELECT id FROM parcels_rtree "
+                "WHERE min_lat <= ? AND max_lat >= ? AND min_lng <= ? AND max_lng >= ?)"
+            )
+            params += [bbox[2], bbox[0], bbox[3], bbox[1]]
+        if blocking_overlays:
+            sql.append(
+                "AND NOT EXISTS (SELECT 1 FROM parcel_overlays o WHERE o.parcel_id = p.id "
+                f"AND o.overlay IN ({','.join('?' * len(blocking_overlays))}))"
+            )
+            params += list(blocking_overlays)
+        if limit is not None and center is None:
+            sql.append("LIMIT ?")
+            params.append(limit)
+
+        with self._lock:
+            rows = self._db.execute(" ".join(sql), params).fetchall()
+
+        parcels = [
+            {"catastro": catastro, "zoning_code": zoning_code, "lat": lat, "lng": lng}
+            for catastro, zoning_code, lat, lng in rows
+        ]
+        if center is not None and parcels:
+            distances = _haversine_m(
+                center[0], center[1],
+                np.fromiter((p["lat"] for p in parcels), dtype=np.float64, count=len(parcels)),
+                np.fromiter((p["lng"] for p in parcels), dtype=np.float64, count=len(parcels))
+            )
+            order = [i for i in np.argsort(distances, kind="stable") if distances[i] <= radius_m]
+            parcels = [{**parcels[i], "distance_m": round(float(distances[i]), 1)} for i in order[:limit]]
+
+        result["parcels"] = parcels
+        result["count"] = len(parcels)
+        return result
+
+    def replace_municipality(self, municipality: str, parcels: Iterable[Dict]) -> int:
+        """
+        Swap in a municipio's parcels in one transaction
+
+        Args:
+            parcels: {"catastro", "zoning_code", "lat", "lng",
+                      "overlays": [overlay types]} per parcel
+
+        Returns:
+            Number of parcels stored
+        """
+        key = normalize_municipality(municipality)
+        stored = 0
+        with self._lock, self._db:
+            old_ids = [row[0] for row in self._db.execute("SELECT id FROM parcels WHERE municipality = ?", (key,))]
+            self._db.executemany("DELETE FROM parcels_rtree WHERE id = ?", [(i,) for i in old_ids])
+            self._db.executemany("DELETE FROM parcel_overlays WHERE parcel_id = ?", [(i,) for i in old_ids])
+            self._db.execute("DELETE FROM parcels WHERE municipality = ?", (key,))
+
+            for parcel in parcels:
+                # A parcel stored under another municipio moves here
+                moved = self._db.execute("SELECT id FROM parcels WHERE catastro = ?", (parcel["catastro"],)).fetchone()
+                if moved:
+                    self._db.execute("DELETE FROM parcels_rtree WHERE id = ?", moved)
+                    self._db.execute("DELETE FROM parcel_overlays WHERE parcel_id = ?", moved)
+                    self._db.execute("DELETE FROM parcels WHERE id = ?", moved)
+                cursor = self._db.execute(
+                    "INSERT INTO parcels (catastro, municipality, municipality_name, zoning_code, lat, lng) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (parcel["catastro"], key, municipality, parcel.get("zoning_code"), parcel["lat"], parcel["lng"])
+                )
+                parcel_id = cursor.lastrowid
+                self._db.execute(
+                    "INSERT INTO parcels_rtree (id, min_lat, max_lat, min_lng, max_lng) VALUES (?, ?, ?, ?, ?)",
+                    (parcel_id, parcel["lat"], parcel["lat"], parcel["lng"], parcel["lng"])
+                )
+                self._db.executemany(
+                    "INSERT OR IGNORE INTO parcel_overlays (parcel_id, overlay) VALUES (?, ?)",
+                    [(parcel_id, overlay) for overlay in parcel.get("overlays", [])]
+                )
+                stored += 1
+
+            self._db.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                (f"synced_at:{key}", datetime.now().isoformat())
+            )
+        return stored
+
+    def municipalities(self) -> Dict[str, int]:
+        """Municipio -> number of parcels stored"""
+        with self._lock:
+            return dict(self._db.execute(
+                "SELECT municipality_name, COUNT(*) FROM parcels GROUP BY municipality"
+            ).fetchall())
+
+    def close(self):
+        self._db.close()
+
+    def _zones_for(self, use: str) -> Optional[List[str]]:
+        """Districts allowing a use code or specific use name; None if unknown"""
+        rules_db = self.rules_db
+        if rules_db.get_use_type(use):
+            return rules_db.zones_for_use(use)
+        if rules_db.find_uso(use):
+            return rules_db.districts_for_uso(use)
+        return None
+
+
+_default_selector = None
+_default_selector_lock = threading.Lock()
+
+
+def get_site_selector() -> SiteSelector:
+    """Shared selector over the default table (PYXTEN_SITE_TABLE overrides the path)"""
+    global _default_selector
+    with _default_selector_lock:
+        if _default_selector is None:
+            _default_selector = SiteSelector(Path(os.getenv("PYXTEN_SITE_TABLE", str(DEFAULT_SITE_TABLE_PATH))))
+        return _default_selector
+
+
+def _raise_on_errors(layer: str, failed: List[Dict]):
+    """Abort a sync when bulk lookups failed, before anything is stored"""
+    if failed:
+        raise RuntimeError(
+            f"{len(failed)} parcel lookups on {layer} failed ({failed[0].get('error')}); "
+            "the table was not changed"
+        )
+
+
+def sync_municipality(
+    municipality: str,
+    client=None,
+    selector: Optional[SiteSelector] = None,
+    chunk_size: int = 500,
+    progress: Optional[Callable[[int, int], None]] = None
+) -> int:
+    """
+    Fetch a municipio's CRIM parcels and store them with their zoning district
+    and overlays
+
+    Parcel outlines are reduced to an interior point; zoning (from the local
+    Calificación snapshot when synced) and each overlay layer are then
+    resolved with bulk multipoint queries. Any failed lookup raises
+    RuntimeError and leaves the municipio's stored parcels untouched.
+
+    Args:
+        municipality: Municipio name as spelled in the app
+        client: ArcGISPRClient for the HTTP calls (a new one by default)
+        selector: Table to write (the shared one by default)
+        chunk_size: Parcels per CRIM request
+        progress: Optional callback(parcels_done, parcels_total)
+
+    Returns:
+        Number of parcels stored
+    """
+    from src.services.arcgis_pr_client import ArcGISPRClient
+
+    client = client or ArcGISPRClient(use_cache=False)
+    selector = selector or get_site_selector()
+
+    url = client.CRIM_PARCELAS_URL
+    fields = client._out_fields(url, client.PARCEL_FIELDS)
+    municipality_field = client._out_fields(url, {"municipality": client.PARCEL_FIELDS["municipality"]})
+    if municipality_field == "*":
+        municipality_field = client.PARCEL_FIELDS["municipality"][0]
+    municipality_field = municipality_field.split(",")[0]
+
+    # CRIM spells municipios in capitals, with or without accents
+    spellings = {municipality.upper(), normalize_municipality(municipality).upper()}
+    quoted = ",".join("'" + spelling.replace("'", "''") + "'" for spelling in sorted(spellings))
+    where = f"UPPER({municipality_field}) IN ({quoted})"
+    ids_response = client._post_json(url, {"where": where, "returnIdsOnly": "true", "f": "json"})
+    if "error" in ids_response:
+        raise RuntimeError(ids_response["error"].get("message", "Unknown API error"))
+    object_ids: List[int] = sorted(ids_response.get("objectIds") or [])
+
+    located = []
+    for start in range(0, len(object_ids), chunk_size):
+        chunk = object_ids[start:start + chunk_size]
+        data = client._post_json(url, {
+            "objectIds": ",".join(str(oid) for oid in chunk),
+            "outFields": fields,
+            "returnGeometry": "true",
+            "maxAllowableOffset": client.PARCEL_GEOMETRY_OFFSET,
+            "outSR": "3857",
+            "f": "json"
+        })
+        if "error" in data:
+            raise RuntimeError(data["error"].get("message", "Unknown API error"))
+        for feature in data.get("features", []):
+            rings = (feature.get("geometry") or {}).get("rings")
+            catastro = client._first_attribute(feature.get("attributes", {}), client.PARCEL_FIELDS["catastro"])
+            if rings and catastro:
+                lat, lng = web_mercator_to_lat_lng(*interior_point(rings))
+                located.append({"catastro": str(catastro), "lat": lat, "lng": lng, "overlays": []})
+        if progress:
+            progress(min(start + chunk_size, len(object_ids)), len(object_ids))
+
+    points = [(parcel["lat"], parcel["lng"]) for parcel in located]
+    if points:
+        # A parcel outside every Calificación polygon is stored without a
+        # district; a failed query would store a wrong answer, so it aborts
+        zonings = client.query_points_bulk(points, "zoning")
+        not_zoned = client._bulk_layer_spec("zoning")[3]
+        _raise_on_errors("zoning", [
+            zoning for zoning in zonings
+            if not zoning.get("success") and zoning.get("error") != not_zoned["error"]
+        ])
+        for parcel, zoning in zip(located, zonings):
+            parcel["zoning_code"] = zoning.get("district_code") if zoning.get("success") else None
+        for overlay_type, layer_id, _ in client._overlay_layer_list():
+            overlays = client.query_points_bulk(points, f"overlay:{layer_id}")
+            _raise_on_errors(overlay_type, [overlay for overlay in overlays if overlay.get("error")])
+            for parcel, overlay in zip(located, overlays):
+                if overlay.get("found"):
+                    parcel["overlays"].append(overlay_type)
+
+    return selector.replace_municipality(municipality, located)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the local site-selection table")
+    parser.add_argument("command", choices=["sync"])
+    parser.add_argument("municipality")
+    parser.add_argument("--db", default=str(DEFAULT_SITE_TABLE_PATH))
+    parser.add_argument("--chunk-size", type=int, default=500)
+    args = parser.parse_args()
+
+    count = sync_municipality(
+        args.municipality,
+        selector=SiteSelector(Path(args.db)),
+        chunk_size=args.chunk_size,
+        progress=lambda done, total: print(f"  {done}/{total} parcels", flush=True)
+    )
+    print(f"Stored {count} parcels for {args.municipality} in {args.db}")
@@ -5,7 +5,6 @@ Uses integrated validator with ArcGIS + POT equivalency + NL parsing
 
 import streamlit as st
 from src.validators.integrated_validator import IntegratedZoningValidator
-from src.database.rules_loader import RulesDatabase
 from src.services.session_manager import SessionManager
 
 
@@ -347,9 +346,9 @@ def render_enhanced_results(result: dict, rules_db):
 
 # For testing
 if __name__ == "__main__":
-    from src.database.rules_loader import RulesDatabase
+    from src.database.rules_loader import get_rules_database
     
     st.set_page_config(page_title="Pyxten - NL Validation", layout="wide")
     
-    rules_db = RulesDatabase()
+    rules_db = get_rules_database()
     render_enhanced_homepage(rules_db)
\ No newline at end of file
@@ -1,9 +1,13 @@
+import logging
+
 import streamlit as st
 from src.database.rules_loader import RulesDatabase
 from src.validators.zoning_validator import ZoningValidator
 from src.utils.report_generator import ReportGenerator
 from src.services.session_manager import SessionManager
 
+logger = logging.getLogger(__name__)
+
 def render_homepage(rules_db, claude_ai=None, model_router=None):
     """
     Renderiza la pagina principal con el nuevo layout simplificado.
@@ -264,8 +268,19 @@ def validate_address_with_gis(address: str, municipality: str):
     st.session_state.validation_warnings = []
     st.session_state.address_validated = False
     
+    # Step 0: Instant first guess from the local gazetteer, shown while the
+    # precise geocode is in flight
+    approx = approximate_location(address, municipality)
+    first_guess = st.empty()
+    if approx:
+        first_guess.info(
+            f"Ubicacion aproximada: {approx['matched_name']} ({approx['match_type']}). "
+            "Buscando la direccion exacta..."
+        )
+    
     # Step 1: Validate address with Google Maps to get coordinates
     coordinates = None
+    approximate = False
     
     try:
         from src.utils.address_validator import AddressValidator
@@ -297,8 +312,22 @@ def validate_address_with_gis(address: str, municipality: str):
             f"Error validando direccion: {str(e)}. Puedes ingresar los datos manualmente."
         )
     
-    # Step 2: If we have coordinates, query GIS services
-    if coordinates:
+    first_guess.empty()
+    
+    # Step 1b: Without a Google result, keep the gazetteer's approximation
+    if not coordinates and approx:
+        coordinates = (approx['latitude'], approx['longitude'])
+        approximate = True
+        st.session_state.validated_coordinates = coordinates
+        st.session_state.validation_warnings.append(
+            f"Ubicacion aproximada ({approx['match_type']}: {approx['matched_name']}), confianza baja. "
+            "Verifica el catastro y la calificacion antes de continuar."
+        )
+    
+    # Step 2: If we have coordinates, query GIS services. An approximate
+    # location may fall on a neighbouring parcel, so its catastro and
+    # calificacion are not filled in and the address stays unvalidated
+    if coordinates and not approximate:
         lat, lng = coordinates
         
         try:
@@ -342,10 +371,25 @@ def validate_address_with_gis(address: str, municipality: str):
             )
     
     # If we validated coordinates even without full GIS data, mark as validated
-    if coordinates and not st.session_state.address_validated:
+    if coordinates and not approximate and not st.session_state.address_validated:
         st.session_state.address_validated = True
 
 
+def approximate_location(address: str, municipality: str):
+    """
+    Low-confidence location from the local gazetteer, or None.
+    Never raises: the gazetteer is only a fallback for the geocoder.
+    """
+    try:
+        from src.services.gazetteer import get_gazetteer
+        
+        approx = get_gazetteer().locate(address, municipality)
+    except Exception as e:
+        logger.warning(f"Gazetteer lookup failed for '{address}, {municipality}': {e}", exc_info=True)
+        return None
+    return approx if approx.get('found') else None
+
+
 def interpret_project_type(description: str, rules_db, claude_ai=None) -> str:
     """
     Interprets project description to determine use type code.
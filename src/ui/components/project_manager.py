@@ -153,8 +153,8 @@ def render_new_project_form():
             help="Dirección completa de la propiedad"
         )
         
-        from src.database.rules_loader import RulesDatabase
-        rules_db = RulesDatabase()
+        from src.database.rules_loader import get_rules_database
+        rules_db = get_rules_database()
         
         project_municipality = st.selectbox(
             "Municipio *",
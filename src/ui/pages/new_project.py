@@ -1,6 +1,5 @@
 # Página para crear nuevo proyecto
 import streamlit as st
-from src.database.rules_loader import RulesDatabase
 from src.services.session_manager import SessionManager
 
 def render_new_project_page(rules_db):
@@ -0,0 +1,126 @@
+"""
+AddressNormalizer - Forma canónica de direcciones de Puerto Rico
+Unifica las variantes de escritura ("C. Luna" / "Calle Luna", "Urb." /
+"Urbanización", "Carr. 2" / "PR-2", acentos, mayúsculas, número de unidad)
+para que la misma propiedad produzca siempre la misma clave de caché.
+"""
+
+import re
+import unicodedata
+from typing import Optional, Tuple
+
+# Abreviaturas -> forma canónica (tokens ya sin acentos y en minúscula)
+TOKEN_ALIASES = {
+    "c": "calle", "cll": "calle", "calle": "calle",
+    "urb": "urb", "urbanizacion": "urb", "urbanizaciones": "urb",
+    "bo": "barrio", "bario": "barrio", "barrio": "barrio",
+    "bda": "barriada", "barriada": "barriada",
+    "carr": "carr", "carretera": "carr", "ctra": "carr", "road": "carr", "rd": "carr",
+    "ave": "ave", "av": "ave", "avda": "ave", "avenida": "ave",
+    "res": "res", "residencial": "res",
+    "cond": "cond", "condominio": "cond",
+    "ext": "ext", "extension": "ext",
+    "sect": "sector", "sec": "sector", "sector": "sector",
+    "parc": "parcelas", "parcelas": "parcelas",
+    "km": "km", "kilometro": "km",
+    "int": "int", "interior": "int",
+    "st": "calle", "street": "calle"
+}
+
+# Formas canónicas que anteceden un nombre ("calle", "urb", "barrio", ...)
+STREET_DESIGNATORS = set(TOKEN_ALIASES.values())
+
+# Palabras que solo introducen un número ("Núm. 123", "No. 5")
+NUMBER_PREFIXES = {"num", "numero", "no", "nro"}
+
+# Designadores de unidad; la unidad no cambia la geocodificación del edificio.
+# Solo cuentan tras el número de la casa: en "Calle Local 5" es el nombre
+UNIT_PATTERN = re.compile(
+    r"(\d[a-z0-9-]*)\s+(?:apt|apto|apartamento|apartment|unit|unidad|ste|suite|local|ofic|oficina)"
+    r"\s*([a-z0-9-]+)\s*$"
+)
+
+# Sufijos que repiten el país o el código postal
+TRAILING_PATTERN = re.compile(r"(?:\s+(?:puerto rico|pr))?(?:\s+00[679]\d{2}(?:-\d{4})?)?\s*$")
+
+
+def fold_accents(text: str) -> str:
+    """Minúsculas y sin acentos: "Bayamón" -> "bayamon" """
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def split_unit(address: str) -> Tuple[str, Optional[str]]:
+    """
+    Separa el número de unidad al final de la dirección
+
+    Returns:
+        (dirección sin unidad, unidad o None), ambas ya normalizadas
+    """
+    text = _clean(address)
+    match = UNIT_PATTERN.search(text)
+    if not match:
+        return text, None
+    return text[:match.end(1)], match.group(2)
+
+
+def normalize_address(address: str) -> str:
+    """
+    Forma canónica de una dirección, sin la unidad
+
+    "Urbanización San Patricio, C. Luna #123, Apt. 4B" y
+    "urb san patricio calle luna 123 apto 4-b" producen
+    "urb san patricio calle luna 123".
+    """
+    text, _ = split_unit(address)
+    text = TRAILING_PATTERN.sub("", text)
+
+    tokens = []
+    for token in text.split():
+        if token in NUMBER_PREFIXES:
+            continue
+        tokens.append(TOKEN_ALIASES.get(token, token))
+
+    # "pr 2" es la carretera estatal 2
+    canonical = []
+    for i, token in enumerate(tokens):
+        if token == "pr" and i + 1 < len(tokens) and tokens[i + 1][0].isdigit():
+            token = "carr"
+        if token == "carr" and canonical and canonical[-1] == "carr":
+            continue
+        canonical.append(token)
+
+    return " ".join(canonical)
+
+
+def normalize_municipality(municipality: str) -> str:
+    """ "Bayamón" / "BAYAMON" / " bayamon " -> "bayamon" """
+    return " ".join(fold_accents(municipality).split())
+
+
+def geocode_cache_key(address: str, municipality: str, country: str = "Puerto Rico") -> str:
+    """Clave de caché de geocodificación: municipio + dirección canónica"""
+    municipality = normalize_municipality(municipality)
+    address = normalize_address(address)
+    # "Calle Loíza 2000, San Juan" repite el municipio que ya está en la
+    # clave; en "Calle Loíza" (en Loíza) es el nombre de la calle
+    if municipality and address.endswith(f" {municipality}"):
+        rest = address[:-len(municipality) - 1]
+        if rest.split()[-1] not in STREET_DESIGNATORS:
+            address = rest
+    key = f"{municipality}|{address}"
+    if fold_accents(country) != "puerto rico":
+        key = f"{fold_accents(country)}|{key}"
+    return key
+
+
+def _clean(address: str) -> str:
+    """Sin acentos, en minúscula, con la puntuación reducida a espacios"""
+    text = fold_accents(address)
+    # "PR-2" / "Carr.#2" -> "pr 2" / "carr 2"
+    text = re.sub(r"\b(pr|carr|carretera)\s*[-#]\s*(\d)", r"\1 \2", text)
+    # "#" marca el número de la casa en PR, no una unidad
+    text = re.sub(r"(?<!\d)\.|\.(?!\d)|[,;:()#\"']", " ", text)
+    # Guiones entre letra y número de unidad ("4-b" -> "4b")
+    text = re.sub(r"(?<=\d)-(?=[a-z]\b)", "", text)
+    return " ".join(text.split())
@@ -3,18 +3,65 @@ AddressValidator - Valida direcciones usando Google Maps Geocoding API
 """
 
 import os
+import time
 import requests
-from typing import Dict, Optional
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from requests.adapters import HTTPAdapter
+
+from src.services.lookup_cache import LookupCache, get_default_cache
+from src.services.municipality_index import get_municipality_index
+from src.services.resilience import TokenBucket
+from src.utils.address_normalizer import geocode_cache_key
+
+# Cuota de Google Geocoding API (3,000 solicitudes por minuto por proyecto)
+GOOGLE_GEOCODING_QPS = 50
+
+# Limitador compartido para que todas las instancias respeten la misma cuota
+_google_rate_limiter = TokenBucket(rate=GOOGLE_GEOCODING_QPS)
+
+# Intentos por dirección cuando Google responde OVER_QUERY_LIMIT
+GEOCODE_ATTEMPTS = 3
+
+# Lo único de una respuesta de Google que se guarda en caché (los términos de
+# Maps Platform permiten guardar coordenadas y place_id, no el resto)
+CACHED_GEOCODE_FIELDS = ("valid", "latitude", "longitude", "place_id", "confidence")
 
 class AddressValidator:
     """Valida direcciones de Puerto Rico con Google Maps API"""
     
-    def __init__(self):
+    # Conexiones reutilizadas por la sesión HTTP (y trabajadores de geocode_many)
+    MAX_CONNECTIONS = 16
+    
+    def __init__(
+        self,
+        cache: Optional[LookupCache] = None,
+        use_cache: bool = True,
+        timeout: float = 10,
+        rate_limiter: Optional[TokenBucket] = None
+    ):
+        """
+        Args:
+            cache: Caché persistente de geocodificación (por defecto el
+                compartido del proceso, capa "geocode")
+            use_cache: False para consultar siempre a Google
+            timeout: Segundos por solicitud a Google
+            rate_limiter: Limitador de solicitudes a Google (por defecto el
+                compartido, a la cuota del proyecto)
+        """
         self.api_key = os.getenv("GOOGLE_MAPS_API_KEY")
         if not self.api_key:
             raise ValueError("GOOGLE_MAPS_API_KEY no encontrada en .env")
         
         self.geocoding_url = "https://maps.googleapis.com/maps/api/geocode/json"
+        self.cache = (cache or get_default_cache()) if use_cache else None
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter or _google_rate_limiter
+        
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_maxsize=self.MAX_CONNECTIONS))
     
     def validate_address(
         self, 
@@ -25,6 +72,12 @@ class AddressValidator:
         """
         Valida dirección usando Google Geocoding API
         
+        Las coordenadas y el place_id de las respuestas válidas se guardan
+        bajo la dirección normalizada + municipio, así que variantes como
+        "C. Luna #123" / "Calle Luna 123" no vuelven a llamar a Google. En
+        un acierto de caché la dirección y los componentes se arman con lo
+        que envió quien llama (incluida la unidad).
+        
         Args:
             address: Dirección (ej: "Calle Luna 123")
             municipality: Municipio (ej: "San Juan")
@@ -43,23 +96,71 @@ class AddressValidator:
             }
         """
         
+        if self.cache is None:
+            return self._geocode(address, municipality, country)
+        
+        fresh = []
+        
+        def fetch() -> Dict:
+            result = self._geocode(address, municipality, country)
+            fresh.append(result)
+            return self._cached_fields(result)
+        
+        cached = self.cache.get_or_fetch(
+            "geocode",
+            geocode_cache_key(address, municipality, country),
+            fetch,
+            cacheable=lambda result: result.get("valid", False)
+        )
+        if fresh:
+            return fresh[0]
+        return self._from_cached(cached, address, municipality, country)
+    
+    @staticmethod
+    def _cached_fields(result: Dict) -> Dict:
+        """Parte de un resultado que se puede guardar en caché"""
+        if not result.get("valid"):
+            return {"valid": False, "error": result.get("error")}
+        return {field: result[field] for field in CACHED_GEOCODE_FIELDS}
+    
+    def _from_cached(self, cached: Dict, address: str, municipality: str, country: str = "Puerto Rico") -> Dict:
+        """Resultado de validate_address a partir de lo guardado en caché"""
+        full_address = f"{address}, {municipality}, {country}"
+        if not cached.get("valid"):
+            return {"valid": False, "error": cached.get("error"), "formatted_address": full_address}
+        
+        result = dict(cached)
+        result["formatted_address"] = full_address
+        result["components"] = {"city": municipality, "country": country}
+        if not get_municipality_index().matches(result["latitude"], result["longitude"], municipality, full_address):
+            result["warning"] = f"Municipio '{municipality}' no coincide exactamente"
+        return result
+    
+    def _geocode(self, address: str, municipality: str, country: str) -> Dict:
+        """Llamada a Google Geocoding API para validate_address"""
+        
         # Construir dirección completa
         full_address = f"{address}, {municipality}, {country}"
         
         try:
-            # Llamar a Geocoding API
-            response = requests.get(
-                self.geocoding_url,
-                params={
-                    "address": full_address,
-                    "key": self.api_key,
-                    "region": "pr",  # Bias hacia Puerto Rico
-                    "language": "es"
-                },
-                timeout=10
-            )
-            
-            data = response.json()
+            # Llamar a Geocoding API; OVER_QUERY_LIMIT se reintenta con espera
+            for attempt in range(GEOCODE_ATTEMPTS):
+                self.rate_limiter.acquire()
+                response = self.session.get(
+                    self.geocoding_url,
+                    params={
+                        "address": full_address,
+                        "key": self.api_key,
+                        "region": "pr",  # Bias hacia Puerto Rico
+                        "language": "es"
+                    },
+                    timeout=self.timeout
+                )
+                
+                data = response.json()
+                if data["status"] != "OVER_QUERY_LIMIT" or attempt == GEOCODE_ATTEMPTS - 1:
+                    break
+                time.sleep(2 ** attempt)
             
             # Verificar status
             if data["status"] != "OK":
@@ -84,8 +185,19 @@ class AddressValidator:
                     "formatted_address": result["formatted_address"]
                 }
             
-            # Validar que municipio coincide (flexible)
-            if municipality.lower() not in result["formatted_address"].lower():
+            # Validar que las coordenadas caen en Puerto Rico
+            municipalities = get_municipality_index()
+            if not municipalities.in_puerto_rico(location["lat"], location["lng"]):
+                return {
+                    "valid": False,
+                    "error": "Coordenadas fuera de Puerto Rico",
+                    "formatted_address": result["formatted_address"]
+                }
+            
+            # Validar que municipio coincide (límites locales, o nombre sin acentos)
+            if not municipalities.matches(
+                location["lat"], location["lng"], municipality, result["formatted_address"]
+            ):
                 return {
                     "valid": True,  # Aún válido pero con advertencia
                     "warning": f"Municipio '{municipality}' no coincide exactamente",
@@ -120,6 +232,73 @@ class AddressValidator:
                 "formatted_address": full_address
             }
     
+    def geocode_many(
+        self,
+        addresses: Iterable[Tuple[str, str]],
+        max_workers: int = 8,
+        progress: Optional[Callable[[int, int], None]] = None
+    ) -> Iterator[Dict]:
+        """
+        Geocodifica muchas direcciones (ej. una hoja de cálculo) en paralelo
+        
+        Las direcciones repetidas (misma clave normalizada) se consultan una
+        sola vez y cada repetición recibe la ubicación con su propia
+        dirección; las solicitudes a Google respetan el limitador de cuota y
+        los resultados se entregan en el orden de entrada a medida que están
+        listos. La entrada se consume de forma incremental.
+        
+        Args:
+            addresses: Pares (dirección, municipio)
+            max_workers: Solicitudes simultáneas
+            progress: Callback opcional (completadas, leídas hasta ahora)
+        
+        Yields:
+            El resultado de validate_address de cada entrada, con
+            "query": {"address": str, "municipality": str}
+        """
+        max_in_flight = max_workers * 4
+        pending = deque()
+        # Clave -> [futuro, entradas pendientes que lo esperan, dirección
+        # consultada]; se descarta al entregar la última, así la memoria no
+        # crece con la entrada
+        lookups = {}
+        completed = read = 0
+        
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="geocode") as executor:
+            def emit(address: str, municipality: str, key: str, future) -> Dict:
+                lookup = lookups[key]
+                lookup[1] -= 1
+                if not lookup[1]:
+                    del lookups[key]
+                if lookup[2] == (address, municipality):
+                    result = dict(future.result())
+                else:
+                    result = self._from_cached(self._cached_fields(future.result()), address, municipality)
+                result["query"] = {"address": address, "municipality": municipality}
+                return result
+            
+            for address, municipality in addresses:
+                key = geocode_cache_key(address, municipality)
+                if key not in lookups:
+                    future = executor.submit(self.validate_address, address, municipality)
+                    lookups[key] = [future, 0, (address, municipality)]
+                lookups[key][1] += 1
+                pending.append((address, municipality, key, lookups[key][0]))
+                read += 1
+                
+                # Entregar lo que ya está listo al frente; esperar si hay demasiado en vuelo
+                while pending and (pending[0][3].done() or len(pending) >= max_in_flight):
+                    yield emit(*pending.popleft())
+                    completed += 1
+                    if progress:
+                        progress(completed, read)
+            
+            while pending:
+                yield emit(*pending.popleft())
+                completed += 1
+                if progress:
+                    progress(completed, read)
+    
     def _parse_address_components(self, components: list) -> Dict:
         """Parsea componentes de dirección de Google"""
         
@@ -0,0 +1,83 @@
+"""
+WGS84 <-> Web Mercator (EPSG:3857) projection
+Scalar helpers for single lookups and NumPy versions that project whole
+coordinate arrays in one pass for bulk queries, cache keys and local
+spatial indexes.
+"""
+
+import math
+from typing import Tuple
+
+import numpy as np
+
+# Half the circumference of the Web Mercator sphere, in meters
+ORIGIN_SHIFT = 20037508.34
+
+# Web Mercator is undefined at the poles; ArcGIS clamps to this latitude
+MAX_LATITUDE = 85.05112878
+
+
+def lat_lng_to_web_mercator(lat: float, lng: float) -> Tuple[float, float]:
+    """Project one WGS84 point to Web Mercator meters"""
+    lat = max(-MAX_LATITUDE, min(MAX_LATITUDE, lat))
+    x = lng * ORIGIN_SHIFT / 180
+    y = math.log(math.tan((90 + lat) * math.pi / 360)) / (math.pi / 180)
+    return (x, y * ORIGIN_SHIFT / 180)
+
+
+def web_mercator_to_lat_lng(x: float, y: float) -> Tuple[float, float]:
+    """Inverse of lat_lng_to_web_mercator"""
+    lng = x * 180 / ORIGIN_SHIFT
+    lat = math.atan(math.exp(y * math.pi / ORIGIN_SHIFT)) * 360 / math.pi - 90
+    return (lat, lng)
+
+
+def project_to_web_mercator(lat, lng) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Project arrays of WGS84 coordinates to Web Mercator
+
+    Args:
+        lat, lng: Array-likes of equal shape, in degrees
+
+    Returns:
+        (x, y) float64 arrays in meters
+    """
+    lat = np.clip(np.asarray(lat, dtype=np.float64), -MAX_LATITUDE, MAX_LATITUDE)
+    lng = np.asarray(lng, dtype=np.float64)
+    x = lng * (ORIGIN_SHIFT / 180)
+    y = np.log(np.tan((90 + lat) * (np.pi / 360))) * (ORIGIN_SHIFT / np.pi)
+    return x, y
+
+
+def unproject_from_web_mercator(x, y) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Inverse of project_to_web_mercator
+
+    Returns:
+        (lat, lng) float64 arrays in degrees
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    lng = x * (180 / ORIGIN_SHIFT)
+    lat = np.arctan(np.exp(y * (np.pi / ORIGIN_SHIFT))) * (360 / np.pi) - 90
+    return lat, lng
+
+
+def grid_cells(x, y, cell_size: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Integer (column, row) of the `cell_size` grid cell containing each point"""
+    return (
+        np.floor(np.asarray(x, dtype=np.float64) / cell_size).astype(np.int64),
+        np.floor(np.asarray(y, dtype=np.float64) / cell_size).astype(np.int64)
+    )
+
+
+def points_to_web_mercator(points) -> np.ndarray:
+    """
+    Project [(lat, lng), ...] pairs
+
+    Returns:
+        (n, 2) array of [x, y] rows
+    """
+    coords = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    x, y = project_to_web_mercator(coords[:, 0], coords[:, 1])
+    return np.column_stack((x, y))
@@ -0,0 +1,106 @@
+"""
+Planar geometry helpers for Esri JSON polygons
+Rings are lists of [x, y] vertices in a projected CRS (Web Mercator here)
+"""
+
+import math
+from typing import List, Sequence, Tuple
+
+Ring = Sequence[Sequence[float]]
+
+
+def rings_bbox(rings: List[Ring]) -> Tuple[float, float, float, float]:
+    """Bounding box (minx, miny, maxx, maxy) of all rings"""
+    xs = [point[0] for ring in rings for point in ring]
+    ys = [point[1] for ring in rings for point in ring]
+    return (min(xs), min(ys), max(xs), max(ys))
+
+
+def point_in_rings(x: float, y: float, rings: List[Ring]) -> bool:
+    """
+    Even-odd point-in-polygon test over every ring, so holes (inner rings)
+    in Esri polygons are excluded without needing ring orientation.
+    """
+    inside = False
+    for ring in rings:
+        j = len(ring) - 1
+        for i in range(len(ring)):
+            xi, yi = ring[i][0], ring[i][1]
+            xj, yj = ring[j][0], ring[j][1]
+            if (yi > y) != (yj > y):
+                if x < (xj - xi) * (y - yi) / (yj - yi) + xi:
+                    inside = not inside
+            j = i
+    return inside
+
+
+def distance_to_rings(x: float, y: float, rings: List[Ring]) -> float:
+    """Distance from a point to the nearest polygon edge"""
+    best = math.inf
+    for ring in rings:
+        for i in range(1, len(ring)):
+            best = min(best, _distance_to_segment(x, y, ring[i - 1], ring[i]))
+    return best
+
+
+def _distance_to_segment(x: float, y: float, a: Sequence[float], b: Sequence[float]) -> float:
+    dx, dy = b[0] - a[0], b[1] - a[1]
+    length_sq = dx * dx + dy * dy
+    if length_sq == 0:
+        return math.hypot(x - a[0], y - a[1])
+    t = max(0.0, min(1.0, ((x - a[0]) * dx + (y - a[1]) * dy) / length_sq))
+    return math.hypot(x - (a[0] + t * dx), y - (a[1] + t * dy))
+
+
+def rings_centroid(rings: List[Ring]) -> Tuple[float, float]:
+    """
+    Area-weighted centroid of a polygon. Ring orientation is ignored and
+    every ring counts as positive area, which is exact for polygons without
+    holes and close enough for lots with small ones.
+    """
+    total_area = cx = cy = 0.0
+    for ring in rings:
+        ring_area = rx = ry = 0.0
+        for i in range(len(ring) - 1):
+            x0, y0 = ring[i][0], ring[i][1]
+            x1, y1 = ring[i + 1][0], ring[i + 1][1]
+            cross = x0 * y1 - x1 * y0
+            ring_area += cross
+            rx += (x0 + x1) * cross
+            ry += (y0 + y1) * cross
+        if ring_area == 0:
+            continue
+        weight = abs(ring_area) / 2
+        total_area += weight
+        cx += rx / (3 * ring_area) * weight
+        cy += ry / (3 * ring_area) * weight
+    
+    if total_area == 0:
+        minx, miny, maxx, maxy = rings_bbox(rings)
+        return ((minx + maxx) / 2, (miny + maxy) / 2)
+    return (cx / total_area, cy / total_area)
+
+
+def interior_point(rings: List[Ring]) -> Tuple[float, float]:
+    """
+    A point guaranteed to lie inside the polygon: the centroid when it does,
+    otherwise the middle of the widest inside span on the centroid's row
+    (L- and U-shaped lots have centroids outside their own outline).
+    """
+    x, y = rings_centroid(rings)
+    if point_in_rings(x, y, rings):
+        return (x, y)
+    
+    crossings = []
+    for ring in rings:
+        for i in range(len(ring) - 1):
+            (x0, y0), (x1, y1) = ring[i][:2], ring[i + 1][:2]
+            if (y0 > y) != (y1 > y):
+                crossings.append(x0 + (y - y0) * (x1 - x0) / (y1 - y0))
+    crossings.sort()
+    
+    spans = [(crossings[i], crossings[i + 1]) for i in range(0, len(crossings) - 1, 2)]
+    if not spans:
+        return (x, y)
+    left, right = max(spans, key=lambda span: span[1] - span[0])
+    return ((left + right) / 2, y)
@@ -557,9 +557,9 @@ class IntegratedZoningValidator:
 
 # Example usage
 if __name__ == "__main__":
-    from src.database.rules_loader import RulesDatabase
+    from src.database.rules_loader import get_rules_database
     
-    rules_db = RulesDatabase()
+    rules_db = get_rules_database()
     validator = IntegratedZoningValidator(rules_db)
     
     # Test case
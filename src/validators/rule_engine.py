@@ -0,0 +1,255 @@
+# Declarative Tomo 6 rule engine
+"""
+Compiles every rule in tomo6_rules.json into a pure predicate once, keyed by
+its "validation_type". Predicates only read the immutable tables captured at
+compile time and the per-request context, so a single RuleEngine can be
+shared by every session and thread.
+
+A predicate returns None when the context lacks the inputs it needs (no lot
+area, no proposed floors, ...) and the rule is reported as skipped.
+"""
+
+import logging
+import math
+from types import MappingProxyType
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
+
+from src.database.regulation_units import parse_ratio
+
+logger = logging.getLogger(__name__)
+
+Predicate = Callable[[Mapping], Optional[Dict]]
+
+
+def make_context(zoning_district: Dict, use: Dict, **project) -> Mapping:
+    """
+    Read-only context for one validation
+
+    Project keys used by the rules (all optional):
+        lot_area_m2, floors, footprint_m2, coverage_pct, floor_area_m2,
+        seats, units, parking_spaces, setbacks_m {"front", "side", "rear"}
+    """
+    return MappingProxyType({"zoning_district": zoning_district, "use": use, **project})
+
+
+def _result(passed: bool, message: str, details: Dict) -> Dict:
+    return {"passed": passed, "message": message, "details": details}
+
+
+def _use_zone_compatibility(rules_db) -> Predicate:
+    # The matrix and code indexes, not rules_db.is_compatible: a bound method
+    # would keep the database alive for as long as the engine is cached
+    compatibility = rules_db.compatibility
+    use_index = MappingProxyType(dict(rules_db.use_index))
+    zone_index = MappingProxyType(dict(rules_db.zone_index))
+
+    def predicate(context: Mapping) -> Optional[Dict]:
+        zoning, use = context.get("zoning_district"), context.get("use")
+        if not zoning or not use:
+            return None
+        row, column = use_index.get(use["code"]), zone_index.get(zoning["code"])
+        is_compatible = row is not None and column is not None and bool(compatibility[row, column])
+        if is_compatible:
+            message = (
+                f"El uso '{use['name_es']}' ES COMPATIBLE con la zonificación "
+                f"{zoning['code']} ({zoning['name_es']})"
+            )
+        else:
+            message = (
+                f"El uso '{use['name_es']}' NO ES COMPATIBLE con la zonificación "
+                f"{zoning['code']}. Este uso solo se permite en: {', '.join(use.get('compatible_zones', []))}"
+            )
+        return _result(is_compatible, message, {
+            "zoning_category": zoning.get("category"),
+            "use_category": use.get("category"),
+            "compatible_zones": use.get("compatible_zones", [])
+        })
+    return predicate
+
+
+def _district_limit(rules_db, column: str) -> Dict[str, float]:
+    """District code -> numeric limit from the rules database, for districts that state it"""
+    values = rules_db.district_columns[column]
+    return {
+        code: float(values[i]) for i, code in enumerate(rules_db.district_codes)
+        if not math.isnan(values[i])
+    }
+
+
+def _lot_size(rules_db) -> Predicate:
+    minimums = MappingProxyType(_district_limit(rules_db, "min_lot_m2"))
+
+    def predicate(context: Mapping) -> Optional[Dict]:
+        code = context["zoning_district"]["code"]
+        area = context.get("lot_area_m2")
+        minimum = minimums.get(code)
+        if area is None or minimum is None:
+            return None
+        passed = area >= minimum
+        message = (
+            f"El lote de {area:,.0f} m² cumple con el mínimo de {minimum:,.0f} m² del distrito {code}"
+            if passed else
+            f"El lote de {area:,.0f} m² es menor que el mínimo de {minimum:,.0f} m² del distrito {code}"
+        )
+        return _result(passed, message, {"lot_area_m2": area, "min_lot_size_m2": minimum})
+    return predicate
+
+
+def _height_limit(rules_db) -> Predicate:
+    maximums = MappingProxyType(_district_limit(rules_db, "max_floors"))
+
+    def predicate(context: Mapping) -> Optional[Dict]:
+        code = context["zoning_district"]["code"]
+        floors = context.get("floors")
+        if floors is None or code not in maximums:
+            return None
+        maximum = maximums[code]
+        if math.isinf(maximum):
+            return _result(True, f"El distrito {code} no tiene límite de altura", {"floors": floors, "max_floors": None})
+        passed = floors <= maximum
+        message = (
+            f"{floors:g} pisos está dentro del máximo de {maximum:g} pisos del distrito {code}"
+            if passed else
+            f"{floors:g} pisos excede el máximo de {maximum:g} pisos del distrito {code}"
+        )
+        return _result(passed, message, {"floors": floors, "max_floors": maximum})
+    return predicate
+
+
+def _setbacks(rules_db) -> Predicate:
+    # No district in zoning_districts.json declares setbacks yet; a
+    # "setbacks_m" {"front", "side", "rear"} entry on a district enables the check
+    required_by_code = MappingProxyType({
+        district["code"]: dict(district["setbacks_m"])
+        for district in rules_db.get_zoning_districts() if "setbacks_m" in district
+    })
+
+    def predicate(context: Mapping) -> Optional[Dict]:
+        code = context["zoning_district"]["code"]
+        provided = context.get("setbacks_m")
+        required = required_by_code.get(code)
+        if not provided or not required:
+            return None
+        short = {
+            side: {"provided": provided.get(side), "required": minimum}
+            for side, minimum in required.items()
+            if provided.get(side) is not None and provided[side] < minimum
+        }
+        if short:
+            sides = ", ".join(f"{side} ({v['provided']:g} m < {v['required']:g} m)" for side, v in short.items())
+            return _result(False, f"Retiros insuficientes en el distrito {code}: {sides}", {"deficient": short})
+        return _result(True, f"Los retiros cumplen con los mínimos del distrito {code}", {"required": required})
+    return predicate
+
+
+def _coverage(rules_db) -> Predicate:
+    maximums = MappingProxyType(_district_limit(rules_db, "max_coverage_pct"))
+
+    def predicate(context: Mapping) -> Optional[Dict]:
+        code = context["zoning_district"]["code"]
+        maximum = maximums.get(code)
+        coverage = context.get("coverage_pct")
+        if coverage is None and context.get("footprint_m2") is not None and context.get("lot_area_m2"):
+            coverage = 100.0 * context["footprint_m2"] / context["lot_area_m2"]
+        if coverage is None or maximum is None:
+            return None
+        passed = coverage <= maximum
+        message = (
+            f"La cubierta de {coverage:.1f}% está dentro del máximo de {maximum:g}% del distrito {code}"
+            if passed else
+            f"La cubierta de {coverage:.1f}% excede el máximo de {maximum:g}% del distrito {code}"
+        )
+        return _result(passed, message, {"coverage_pct": round(coverage, 2), "max_coverage_pct": maximum})
+    return predicate
+
+
+def _parking(rules_db) -> Predicate:
+    use_ratios = MappingProxyType({
+        use["code"]: parse_ratio(use.get("parking_required")) for use in rules_db.get_use_types()
+    })
+    district_ratios = MappingProxyType({
+        district["code"]: parse_ratio(district.get("parking_ratio")) for district in rules_db.get_zoning_districts()
+    })
+
+    def predicate(context: Mapping) -> Optional[Dict]:
+        ratio = use_ratios.get(context["use"]["code"]) or district_ratios.get(context["zoning_district"]["code"])
+        provided = context.get("parking_spaces")
+        if ratio is None or provided is None:
+            return None
+        spaces, per, basis = ratio
+        if basis == "m2":
+            amount = context.get("floor_area_m2")
+            if amount is None and context.get("footprint_m2") is not None:
+                amount = context["footprint_m2"] * (context.get("floors") or 1)
+        else:
+            amount = context.get(basis)
+        if amount is None:
+            return None
+        required = math.ceil(amount / per * spaces)
+        passed = provided >= required
+        message = (
+            f"Provee {provided} espacios de estacionamiento; se requieren {required}"
+            if passed else
+            f"Provee {provided} espacios de estacionamiento pero se requieren {required}"
+        )
+        return _result(passed, message, {"provided": provided, "required": required, "basis": basis})
+    return predicate
+
+
+# validation_type -> factory(rules_db) returning the compiled predicate
+PREDICATE_FACTORIES: Dict[str, Callable[..., Predicate]] = {
+    "use_zone_compatibility": _use_zone_compatibility,
+    "lot_size": _lot_size,
+    "height_limit": _height_limit,
+    "setbacks": _setbacks,
+    "coverage": _coverage,
+    "parking": _parking
+}
+
+
+class RuleEngine:
+    """Compiled Tomo 6 rules for one rules version; stateless after __init__"""
+
+    def __init__(self, rules_db):
+        tomo6 = rules_db.get_tomo6_rules()
+        self.version = tomo6.get("version")
+
+        rules: List[Tuple[Mapping, Predicate]] = []
+        for rule in tomo6.get("validation_rules", []):
+            factory = PREDICATE_FACTORIES.get(rule.get("validation_type"))
+            if factory is None:
+                logger.warning(f"No predicate for {rule.get('rule_id')} ({rule.get('validation_type')})")
+                continue
+            rules.append((MappingProxyType(dict(rule)), factory(rules_db)))
+        self._rules = tuple(rules)
+
+    @property
+    def rule_ids(self) -> List[str]:
+        return [rule["rule_id"] for rule, _ in self._rules]
+
+    def evaluate(self, context: Mapping) -> Tuple[List[Dict], List[str]]:
+        """
+        Run every compiled rule against a context
+
+        Returns:
+            (results, skipped_rule_ids); each result is
+            {"rule_id", "rule_name", "article", "passed", "critical",
+             "ministerial_if_complies", "message", "details"}
+        """
+        results, skipped = [], []
+        for rule, predicate in self._rules:
+            outcome = predicate(context)
+            if outcome is None:
+                skipped.append(rule["rule_id"])
+                continue
+            results.append({
+                "rule_id": rule["rule_id"],
+                "rule_name": rule["rule_name"],
+                "article": rule["article"],
+                "passed": outcome["passed"],
+                "critical": rule.get("critical", False),
+                "ministerial_if_complies": rule.get("ministerial_if_complies", False),
+                "message": outcome["message"],
+                "details": outcome["details"]
+            })
+        return results, skipped
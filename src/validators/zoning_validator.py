@@ -1,30 +1,160 @@
 #Core Validation Logic
-from typing import Dict, List, Tuple
+import copy
+import threading
+import weakref
+from collections import OrderedDict
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 from datetime import datetime
 
+import numpy as np
+
+from src.validators.rule_engine import RuleEngine, make_context
+
+# (property_address, municipality, zoning_code, proposed_use_code)
+ValidationRecord = Union[Sequence[str], Dict[str, str]]
+
+RECORD_FIELDS = ("property_address", "municipality", "zoning_code", "proposed_use_code")
+
+
+class ValidationMemo:
+    """
+    LRU of validate_project results for one rules database instance
+    
+    Entries hold the request-independent part of a result. They are stored
+    and handed out as deep copies, so callers may mutate what they get.
+    """
+    
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Tuple) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return copy.deepcopy(entry)
+    
+    def set(self, key: Tuple, result: Dict):
+        entry = copy.deepcopy(result)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Compiled engines and result memos per rules database instance; a hot
+# reload brings a new instance and the old ones go away with it. Neither
+# may reference its key (RuleEngine keeps only plain tables), or the weak
+# keys would never be released.
+_engines = weakref.WeakKeyDictionary()
+_memos = weakref.WeakKeyDictionary()
+_engines_lock = threading.Lock()
+
+
+def get_validation_memo(rules_db) -> ValidationMemo:
+    """Memo shared by all validators of one rules database"""
+    with _engines_lock:
+        memo = _memos.get(rules_db)
+        if memo is None:
+            memo = _memos[rules_db] = ValidationMemo()
+        return memo
+
+
+def _engine_for(rules_db) -> RuleEngine:
+    with _engines_lock:
+        engine = _engines.get(rules_db)
+        if engine is None:
+            engine = _engines[rules_db] = RuleEngine(rules_db)
+        return engine
+
+
 class ZoningValidator:
-    """Validates zoning compliance according to Tomo 6"""
+    """
+    Validates zoning compliance according to Tomo 6
     
-    def __init__(self, rules_db):
+    Holds no per-request state, so one instance can serve concurrent sessions.
+    """
+    
+    def __init__(self, rules_db, engine: Optional[RuleEngine] = None, use_memo: bool = True):
+        """
+        Args:
+            rules_db: RulesDatabase to validate against
+            engine: Compiled rules (shared per rules database by default)
+            use_memo: Reuse results for repeated (zoning, use) combinations
+        """
         self.rules_db = rules_db
-        self.validation_results = []
+        self.engine = engine or _engine_for(rules_db)
+        self.memo = get_validation_memo(rules_db) if use_memo else None
     
     def validate_project(
         self,
         property_address: str,
         municipality: str,
         zoning_code: str,
-        proposed_use_code: str
+        proposed_use_code: str,
+        specific_use: Optional[str] = None,
+        project: Optional[Dict] = None
     ) -> Dict:
         """
         Main validation function - checks project against Tomo 6 rules
         
+        Args:
+            specific_use: Optional fine-grained use ("Bed and Breakfast"),
+                checked against the district's list of allowed usos
+            project: Optional project dimensions for the dimensional rules
+                (lot_area_m2, floors, footprint_m2, coverage_pct,
+                floor_area_m2, seats, parking_spaces, setbacks_m); rules
+                whose inputs are missing are listed in "skipped_rules"
+        
         Returns:
             Dict with validation results and viability assessment
         """
-        # Reset results
-        self.validation_results = []
+        # Dimensional checks depend on the project, so only bare
+        # (zoning, use) validations are memoized
+        if self.memo is None or project:
+            return self._validate(property_address, municipality, zoning_code, proposed_use_code, specific_use, project)
         
+        key = (zoning_code, proposed_use_code, specific_use)
+        template = self.memo.get(key)
+        if template is None:
+            template = self._validate(property_address, municipality, zoning_code, proposed_use_code, specific_use)
+            if "error" in template:
+                return template
+            self.memo.set(key, template)
+        
+        return {
+            **template,
+            "property_address": property_address,
+            "municipality": municipality,
+            "validated_at": datetime.now().isoformat()
+        }
+    
+    def _validate(
+        self,
+        property_address: str,
+        municipality: str,
+        zoning_code: str,
+        proposed_use_code: str,
+        specific_use: Optional[str] = None,
+        project: Optional[Dict] = None
+    ) -> Dict:
+        """Build a validate_project result from scratch"""
         # Get zoning and use data
         zoning_district = self.rules_db.get_zoning_district(zoning_code)
         proposed_use = self.rules_db.get_use_type(proposed_use_code)
@@ -42,15 +172,26 @@ class ZoningValidator:
             }
         
         # Run validations
-        self._validate_use_compatibility(zoning_district, proposed_use)
+        context = make_context(zoning_district, proposed_use, **(project or {}))
+        validation_results, skipped_rules = self.engine.evaluate(context)
+        if specific_use:
+            specific_result = self._validate_specific_use(zoning_district, specific_use)
+            if specific_result:
+                validation_results.insert(1, specific_result)
         
         # Compile results
-        all_critical_passed = all(
-            r["passed"] for r in self.validation_results 
-            if r.get("critical", False)
-        )
+        failed_critical = [
+            r for r in validation_results
+            if r.get("critical", False) and not r["passed"]
+        ]
+        all_critical_passed = not failed_critical
         
-        is_ministerial = all_critical_passed and proposed_use.get("ministerial", False)
+        # A failed rule marked ministerial_if_complies moves the project to the discretionary path
+        is_ministerial = (
+            all_critical_passed
+            and proposed_use.get("ministerial", False)
+            and all(r["passed"] for r in validation_results if r.get("ministerial_if_complies"))
+        )
         
         return {
             "viable": all_critical_passed,
@@ -65,69 +206,138 @@ class ZoningValidator:
                 "code": proposed_use["code"],
                 "name": proposed_use["name_es"]
             },
-            "validation_results": self.validation_results,
-            "summary": self._generate_summary(all_critical_passed, is_ministerial),
+            "validation_results": validation_results,
+            "skipped_rules": skipped_rules,
+            "summary": self._generate_summary(all_critical_passed, is_ministerial, failed_critical),
             "next_steps": self._generate_next_steps(all_critical_passed, is_ministerial),
             "validated_at": datetime.now().isoformat()
         }
     
-    def _validate_use_compatibility(
+    def validate_many(
         self,
-        zoning_district: Dict,
-        proposed_use: Dict
-    ):
-        """Rule T6-001: Validate use is compatible with zoning"""
+        records: Iterable[ValidationRecord],
+        chunk_size: int = 10000
+    ) -> Iterator[Dict]:
+        """
+        Screen many (address, municipality, zoning, use) records
         
-        compatible_zones = proposed_use.get("compatible_zones", [])
-        is_compatible = zoning_district["code"] in compatible_zones
+        Compatibility is looked up for a whole chunk at once in the rules
+        database's use x zone matrix; no messages are built. Pass a result
+        to explain() for the full validate_project() report.
         
-        result = {
-            "rule_id": "T6-001",
-            "rule_name": "Compatibilidad de Uso y Zonificación",
-            "article": "Reglamento Conjunto, Tomo 6, Artículo 6.1",
-            "passed": is_compatible,
-            "critical": True,
-            "message": self._get_compatibility_message(
-                is_compatible,
-                zoning_district,
-                proposed_use
-            ),
-            "details": {
-                "zoning_category": zoning_district.get("category"),
-                "use_category": proposed_use.get("category"),
-                "compatible_zones": compatible_zones
+        Args:
+            records: (property_address, municipality, zoning_code,
+                proposed_use_code) tuples, or dicts with those keys
+            chunk_size: Records evaluated per vectorized pass
+        
+        Yields:
+            In input order:
+            {
+                "index": int,
+                "property_address": str,
+                "municipality": str,
+                "zoning_code": str,
+                "proposed_use_code": str,
+                "viable": bool,
+                "is_ministerial": bool,
+                "error": str  # only for unknown zoning or use codes
             }
-        }
+        """
+        rules_db = self.rules_db
+        ministerial = np.array(
+            [bool(rules_db.get_use_type(code).get("ministerial", False)) for code in rules_db.use_codes],
+            dtype=bool
+        )
         
-        self.validation_results.append(result)
+        records = iter(records)
+        offset = 0
+        while True:
+            chunk = [_record_fields(record) for record in islice(records, chunk_size)]
+            if not chunk:
+                return
+            
+            zones = np.fromiter(
+                (rules_db.zone_index[record[2]] if rules_db.get_zoning_district(record[2]) else -1
+                 for record in chunk),
+                dtype=np.int64, count=len(chunk)
+            )
+            uses = np.fromiter(
+                (rules_db.use_index.get(record[3], -1) for record in chunk),
+                dtype=np.int64, count=len(chunk)
+            )
+            known = (zones >= 0) & (uses >= 0)
+            viable = np.zeros(len(chunk), dtype=bool)
+            viable[known] = rules_db.compatibility[uses[known], zones[known]]
+            is_ministerial = viable & ministerial[np.where(uses >= 0, uses, 0)]
+            
+            for i, record in enumerate(chunk):
+                result = dict(zip(RECORD_FIELDS, record))
+                result["index"] = offset + i
+                result["viable"] = bool(viable[i])
+                result["is_ministerial"] = bool(is_ministerial[i])
+                if zones[i] < 0:
+                    result["error"] = f"Distrito de zonificación '{record[2]}' no encontrado"
+                elif uses[i] < 0:
+                    result["error"] = f"Tipo de uso '{record[3]}' no encontrado"
+                yield result
+            offset += len(chunk)
     
-    def _get_compatibility_message(
-        self,
-        is_compatible: bool,
-        zoning: Dict,
-        use: Dict
-    ) -> str:
-        """Generate compatibility validation message"""
+    def explain(self, result: Dict) -> Dict:
+        """Full validate_project() report for a validate_many() result"""
+        return self.validate_project(**{field: result[field] for field in RECORD_FIELDS})
+    
+    def _validate_specific_use(self, zoning_district: Dict, specific_use: str) -> Optional[Dict]:
+        """
+        Rule T6-001 for a specific use from the per-district usos lists
         
-        if is_compatible:
-            return (
-                f"El uso '{use['name_es']}' ES COMPATIBLE con la zonificación "
-                f"{zoning['code']} ({zoning['name_es']})"
-            )
+        The lists are not exhaustive, so a use missing from the district's
+        list is a warning for the planner, never a critical failure over the
+        use x zone matrix.
+        """
+        usos = self.rules_db.matching_usos(specific_use)
+        if not usos:
+            return None
+        
+        code = zoning_district["code"]
+        allowed = [uso for uso in usos if self.rules_db.is_uso_allowed(uso, code)]
+        uso = allowed[0] if allowed else usos[0]
+        allowed_in = self.rules_db.districts_for_uso(uso)
+        
+        if allowed:
+            message = f"El uso específico '{uso}' está permitido en el distrito {code}"
         else:
-            compatible_list = ", ".join(use.get("compatible_zones", []))
-            return (
-                f"El uso '{use['name_es']}' NO ES COMPATIBLE con la zonificación "
-                f"{zoning['code']}. Este uso solo se permite en: {compatible_list}"
+            message = (
+                f"El uso específico '{uso}' no aparece entre los usos del distrito {code} "
+                f"(se lista en: {', '.join(allowed_in)}). Verifique con la Oficina de Permisos."
             )
+        
+        return {
+            "rule_id": "T6-001",
+            "rule_name": "Compatibilidad de Uso Específico",
+            "article": "Reglamento Conjunto, Tomo 6, Artículo 6.1",
+            "passed": bool(allowed),
+            "critical": False,
+            "message": message,
+            "details": {
+                "specific_use": uso,
+                "matched_usos": usos,
+                "allowed_districts": allowed_in
+            }
+        }
     
-    def _generate_summary(self, viable: bool, ministerial: bool) -> str:
+    def _generate_summary(self, viable: bool, ministerial: bool, failed_critical: List[Dict] = ()) -> str:
         """Generate validation summary"""
         
         if not viable:
+            if all(r["rule_id"] == "T6-001" for r in failed_critical):
+                return (
+                    "PROYECTO NO VIABLE - El uso propuesto no es compatible con "
+                    "la zonificación. Se requieren cambios significativos."
+                )
+            failed = ", ".join(f"{r['rule_id']} ({r['rule_name']})" for r in failed_critical)
             return (
-                "PROYECTO NO VIABLE - El uso propuesto no es compatible con "
-                "la zonificación. Se requieren cambios significativos."
+                f"PROYECTO NO VIABLE - El proyecto no cumple con requisitos "
+                f"críticos de Tomo 6: {failed}."
             )
         
         if ministerial:
@@ -165,3 +375,9 @@ class ZoningValidator:
                 "3. Coordinar con agencias concernidas",
                 "4. Anticipar proceso de 4-8 meses para aprobación"
             ]
+
+
+def _record_fields(record: ValidationRecord) -> Tuple[str, str, str, str]:
+    if isinstance(record, dict):
+        return tuple(record.get(field) for field in RECORD_FIELDS)
+    return tuple(record)
@@ -20,7 +20,7 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # Import modules
-from src.database.rules_loader import RulesDatabase
+from src.database.rules_loader import get_rules_database
 from src.validators.zoning_validator import ZoningValidator
 from src.services.session_manager import SessionManager
 
@@ -143,9 +143,9 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Initialize
-@st.cache_resource
+# Not cache_resource: the shared instance is swapped when the rules version changes
 def load_database():
-    return RulesDatabase()
+    return get_rules_database()
 
 @st.cache_resource
 def load_model_router():
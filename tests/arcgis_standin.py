@@ -0,0 +1,436 @@
+"""
+Local ArcGIS REST stand-in for the MIPR/CRIM services
+Serves synthetic Calificación, CRIM parcel and Reglamentario layers with
+configurable latency and error injection, or records/replays real responses
+as fixtures, so the lookup path can be tested and benchmarked offline.
+
+Usage:
+    python tests/arcgis_standin.py --port 8765 --latency 0.2 --error-rate 0.05
+    python tests/arcgis_standin.py --mode record --fixtures tests/fixtures/arcgis
+    python tests/arcgis_standin.py --mode replay --fixtures tests/fixtures/arcgis
+
+In code:
+    with ArcGISStandIn(latency=0.1) as standin:
+        client = standin.client_class()(use_cache=False, use_offline_zoning=False)
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+import requests
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+CALIFICACION_PATH = "/server/rest/services/MIPR/Calificacion/MapServer/0"
+REGLAMENTARIO_PATH = "/server/rest/services/MIPR/Reglamentario/MapServer"
+CRIM_PATH = "/server/rest/services/crim/crim_parcelas/MapServer/0"
+
+UPSTREAM_HOSTS = {
+    "/server/rest/services/crim/": "https://sigejp.pr.gov",
+    "/server/rest/services/": "https://sige.pr.gov"
+}
+
+# Synthetic world: 1 km zoning squares and 50 m parcels on a Web Mercator
+# grid. Zoning features are enumerable inside ZONING_EXTENT (around San
+# Juan); parcels and overlays are generated for any point on request.
+ZONING_CELL = 1000.0
+PARCEL_CELL = 50.0
+ZONING_EXTENT = (-7370000.0, 2070000.0, -7350000.0, 2090000.0)
+ZONING_CODES = ["R-B", "R-I", "R-U", "R-C", "C-L", "C-I", "C-C", "C-T", "I-L", "I-P"]
+MAX_RECORD_COUNT = 1000
+
+OVERLAY_LAYERS = {
+    10: "Zonas Históricas",
+    20: "Zona Costanera",
+    32: "FEMA Flood Zones"
+}
+
+
+def _square(minx: float, miny: float, size: float) -> List[List[List[float]]]:
+    return [[[minx, miny], [minx, miny + size], [minx + size, miny + size], [minx + size, miny], [minx, miny]]]
+
+
+def _cell_hash(*values) -> int:
+    return int(hashlib.md5(repr(values).encode()).hexdigest()[:8], 16)
+
+
+def _zoning_feature(ix: int, iy: int) -> Dict:
+    code = ZONING_CODES[_cell_hash("zoning", ix, iy) % len(ZONING_CODES)]
+    return {
+        "attributes": {
+            "OBJECTID": _zoning_object_id(ix, iy),
+            "CALIFICACION": code,
+            "DESCRIPCION": f"Distrito {code}"
+        },
+        "rings": _square(ix * ZONING_CELL, iy * ZONING_CELL, ZONING_CELL)
+    }
+
+
+def _zoning_object_id(ix: int, iy: int) -> int:
+    columns = int((ZONING_EXTENT[2] - ZONING_EXTENT[0]) / ZONING_CELL)
+    return (iy - int(ZONING_EXTENT[1] // ZONING_CELL)) * columns + (ix - int(ZONING_EXTENT[0] // ZONING_CELL)) + 1
+
+
+def _zoning_cells_in_extent() -> Iterable[Tuple[int, int]]:
+    for iy in range(int(ZONING_EXTENT[1] // ZONING_CELL), int(ZONING_EXTENT[3] // ZONING_CELL)):
+        for ix in range(int(ZONING_EXTENT[0] // ZONING_CELL), int(ZONING_EXTENT[2] // ZONING_CELL)):
+            yield ix, iy
+
+
+def _parcel_feature(ix: int, iy: int) -> Dict:
+    return {
+        "attributes": {
+            "OBJECTID": _cell_hash("parcel", ix, iy),
+            "NUM_CATASTRO": f"SYN-{ix}-{iy}",
+            "MUNICIPIO": "San Juan",
+            "BARRIO": f"Barrio {_cell_hash('barrio', ix // 40, iy // 40) % 20 + 1}"
+        },
+        "rings": _square(ix * PARCEL_CELL, iy * PARCEL_CELL, PARCEL_CELL)
+    }
+
+
+def _overlay_feature(layer_id: int, ix: int, iy: int) -> Optional[Dict]:
+    """Overlays reuse the zoning grid; a cell is covered for a fixed subset of cells"""
+    share = {10: 12, 20: 6, 32: 4}[layer_id]
+    if _cell_hash("overlay", layer_id, ix, iy) % share:
+        return None
+    return {
+        "attributes": {
+            "OBJECTID": _cell_hash("overlay", layer_id, ix, iy),
+            "NOMBRE": f"{OVERLAY_LAYERS[layer_id]} {ix}:{iy}",
+            "FLD_ZONE": "AE" if layer_id == 32 else None
+        },
+        "rings": _square(ix * ZONING_CELL, iy * ZONING_CELL, ZONING_CELL)
+    }
+
+
+def _query_points(params: Dict) -> List[Tuple[float, float]]:
+    """Points to search around, from point, multipoint or envelope geometry"""
+    geometry = params.get("geometry", "")
+    geometry_type = params.get("geometryType", "esriGeometryPoint")
+    parsed = json.loads(geometry) if geometry.startswith("{") else None
+
+    if geometry_type == "esriGeometryMultipoint":
+        return [tuple(point) for point in parsed["points"]]
+    if geometry_type == "esriGeometryEnvelope":
+        if parsed:
+            xmin, ymin, xmax, ymax = parsed["xmin"], parsed["ymin"], parsed["xmax"], parsed["ymax"]
+        else:
+            xmin, ymin, xmax, ymax = (float(v) for v in geometry.split(","))
+        return [(xmin, ymin), (xmax, ymax), (xmin, ymax), (xmax, ymin)]
+    if parsed:
+        return [(parsed["x"], parsed["y"])]
+    x, y = geometry.split(",")
+    return [(float(x), float(y))]
+
+
+def _cells_near(points: List[Tuple[float, float]], cell: float, distance: float, envelope: bool) -> List[Tuple[int, int]]:
+    if envelope:
+        xs = [p[0] for p in points]
+        ys = [p[1] for p in points]
+        boxes = [(min(xs), min(ys), max(xs), max(ys))]
+    else:
+        boxes = [(x - distance, y - distance, x + distance, y + distance) for x, y in points]
+
+    cells = []
+    seen = set()
+    for minx, miny, maxx, maxy in boxes:
+        for ix in range(math.floor(minx / cell), math.floor(maxx / cell) + 1):
+            for iy in range(math.floor(miny / cell), math.floor(maxy / cell) + 1):
+                if (ix, iy) not in seen:
+                    seen.add((ix, iy))
+                    cells.append((ix, iy))
+    return cells
+
+
+class ArcGISStandIn:
+    """Threaded local server imitating the MIPR/CRIM ArcGIS REST endpoints"""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 500,
+        mode: str = "synthetic",
+        fixtures_dir: Optional[Path] = None,
+        seed: Optional[int] = None,
+        path_latency: Optional[Dict[str, float]] = None,
+        upstream: Optional[str] = None
+    ):
+        """
+        Args:
+            port: 0 picks a free port
+            latency: Seconds added to every response
+            jitter: Extra random latency, uniform in [0, jitter] seconds
+            error_rate: Fraction of requests answered with `error_status`
+            mode: "synthetic", "record" (proxy upstream and save fixtures)
+                or "replay" (serve saved fixtures only)
+            fixtures_dir: Where record/replay fixtures live
+            path_latency: Extra seconds for requests whose path starts with
+                a prefix, e.g. {CRIM_PATH + "/query": 2.0} for a slow layer
+            upstream: Base URL to record from instead of the real MIPR/CRIM
+                hosts, e.g. another stand-in
+        """
+        if mode not in ("synthetic", "record", "replay"):
+            raise ValueError(f"Unknown mode '{mode}'")
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.path_latency = dict(path_latency or {})
+        self.upstream = upstream.rstrip("/") if upstream else None
+        self.mode = mode
+        self.fixtures_dir = Path(fixtures_dir or Path(__file__).parent / "fixtures" / "arcgis")
+        self.random = random.Random(seed)
+        self.request_count = 0
+        self._count_lock = threading.Lock()
+
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                standin._handle(self, dict(parse_qsl(urlparse(self.path).query)))
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = self.rfile.read(length).decode("utf-8")
+                params = dict(parse_qsl(urlparse(self.path).query))
+                params.update(parse_qsl(body))
+                standin._handle(self, params)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "ArcGISStandIn":
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> "ArcGISStandIn":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def client_class(self, client_class=None):
+        """
+        Subclass of client_class (ArcGISPRClient by default, or
+        AsyncArcGISPRClient) whose endpoints point at this server
+        """
+        if client_class is None:
+            from src.services.arcgis_pr_client import ArcGISPRClient as client_class
+
+        base = self.url
+
+        class StandInClient(client_class):
+            CALIFICACION_URL = f"{base}{CALIFICACION_PATH}/query"
+            REGLAMENTARIO_URL = f"{base}{REGLAMENTARIO_PATH}"
+            CRIM_PARCELAS_URL = f"{base}{CRIM_PATH}/query"
+            # Keep the stand-in's layers out of data/cache
+            LAYER_CATALOG_PATH = None
+
+        return StandInClient
+
+    # ------------------------------------------------------------------
+    # Request handling
+    # ------------------------------------------------------------------
+
+    def _handle(self, handler: BaseHTTPRequestHandler, params: Dict):
+        with self._count_lock:
+            self.request_count += 1
+
+        path = urlparse(handler.path).path.rstrip("/")
+        delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0)
+        delay += sum(extra for prefix, extra in self.path_latency.items() if path.startswith(prefix))
+        if delay:
+            time.sleep(delay)
+
+        if self.error_rate and self.random.random() < self.error_rate:
+            self._send(handler, self.error_status, {"error": {"code": self.error_status, "message": "Injected error"}})
+            return
+
+        try:
+            if self.mode == "synthetic":
+                status, body = 200, self._synthetic(path, params)
+            elif self.mode == "record":
+                status, body = self._record(path, params)
+            else:
+                status, body = self._replay(path, params)
+        except Exception as e:
+            status, body = 200, {"error": {"code": 400, "message": str(e)}}
+
+        self._send(handler, status, body)
+
+    @staticmethod
+    def _send(handler: BaseHTTPRequestHandler, status: int, body: Dict):
+        payload = json.dumps(body).encode("utf-8")
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(payload)))
+        handler.end_headers()
+        handler.wfile.write(payload)
+
+    def _fixture_path(self, path: str, params: Dict) -> Path:
+        key = json.dumps([path, sorted(params.items())])
+        return self.fixtures_dir / f"{hashlib.sha1(key.encode()).hexdigest()}.json"
+
+    def _record(self, path: str, params: Dict) -> Tuple[int, Dict]:
+        upstream = self.upstream or next(host for prefix, host in UPSTREAM_HOSTS.items() if path.startswith(prefix))
+        response = requests.post(f"{upstream}{path}", data=params, timeout=60)
+        body = response.json()
+        self.fixtures_dir.mkdir(parents=True, exist_ok=True)
+        with open(self._fixture_path(path, params), "w", encoding="utf-8") as f:
+            json.dump({"path": path, "params": params, "status": response.status_code, "response": body}, f)
+        return response.status_code, body
+
+    def _replay(self, path: str, params: Dict) -> Tuple[int, Dict]:
+        fixture = self._fixture_path(path, params)
+        if not fixture.exists():
+            return 404, {"error": {"code": 404, "message": f"No recorded fixture for {path}?{urlencode(params)}"}}
+        with open(fixture, "r", encoding="utf-8") as f:
+            recorded = json.load(f)
+        return recorded["status"], recorded["response"]
+
+    # ------------------------------------------------------------------
+    # Synthetic layers
+    # ------------------------------------------------------------------
+
+    def _synthetic(self, path: str, params: Dict) -> Dict:
+        if path == REGLAMENTARIO_PATH:
+            return {
+                "layers": [{"id": layer_id, "name": name, "subLayerIds": None} for layer_id, name in OVERLAY_LAYERS.items()]
+            }
+        if path == CALIFICACION_PATH:
+            return {"fields": [{"name": n} for n in ("OBJECTID", "CALIFICACION", "DESCRIPCION", "SHAPE")]}
+        if path == CRIM_PATH:
+            return {"fields": [{"name": n} for n in ("OBJECTID", "NUM_CATASTRO", "MUNICIPIO", "BARRIO", "SHAPE")]}
+        if path.startswith(REGLAMENTARIO_PATH + "/") and not path.endswith("/query"):
+            return {"fields": [{"name": n} for n in ("OBJECTID", "NOMBRE", "FLD_ZONE", "SHAPE")]}
+
+        if path == CALIFICACION_PATH + "/query":
+            return self._query(params, self._zoning_features(params))
+        if path == CRIM_PATH + "/query":
+            return self._query(params, self._parcel_features(params))
+        if path.startswith(REGLAMENTARIO_PATH + "/") and path.endswith("/query"):
+            layer_id = int(path.split("/")[-2])
+            if layer_id not in OVERLAY_LAYERS:
+                return {"error": {"code": 400, "message": "Invalid layer"}}
+            return self._query(params, self._overlay_features(layer_id, params))
+
+        return {"error": {"code": 404, "message": f"Unknown path {path}"}}
+
+    def _zoning_features(self, params: Dict) -> List[Dict]:
+        if params.get("objectIds"):
+            wanted = {int(oid) for oid in params["objectIds"].split(",")}
+            return [_zoning_feature(ix, iy) for ix, iy in _zoning_cells_in_extent() if _zoning_object_id(ix, iy) in wanted]
+        if not params.get("geometry"):
+            return [_zoning_feature(ix, iy) for ix, iy in _zoning_cells_in_extent()]
+        return [_zoning_feature(ix, iy) for ix, iy in self._cells(params, ZONING_CELL)]
+
+    def _parcel_features(self, params: Dict) -> List[Dict]:
+        where = params.get("where", "1=1")
+        if "=" in where and where.strip() != "1=1":
+            value = where.split("=", 1)[1].strip().strip("'")
+            match = re.fullmatch(r"SYN-(-?\d+)-(-?\d+)", value)
+            if not match:
+                return []
+            return [_parcel_feature(int(match.group(1)), int(match.group(2)))]
+        return [_parcel_feature(ix, iy) for ix, iy in self._cells(params, PARCEL_CELL)]
+
+    def _overlay_features(self, layer_id: int, params: Dict) -> List[Dict]:
+        features = (_overlay_feature(layer_id, ix, iy) for ix, iy in self._cells(params, ZONING_CELL))
+        return [feature for feature in features if feature]
+
+    @staticmethod
+    def _cells(params: Dict, cell: float) -> List[Tuple[int, int]]:
+        if not params.get("geometry"):
+            return []
+        points = _query_points(params)
+        distance = float(params.get("distance") or 0)
+        envelope = params.get("geometryType") == "esriGeometryEnvelope"
+        return _cells_near(points, cell, distance, envelope)
+
+    @staticmethod
+    def _query(params: Dict, features: List[Dict]) -> Dict:
+        if params.get("returnIdsOnly") == "true":
+            return {"objectIdFieldName": "OBJECTID", "objectIds": [f["attributes"]["OBJECTID"] for f in features]}
+
+        exceeded = len(features) > MAX_RECORD_COUNT
+        features = features[:MAX_RECORD_COUNT]
+
+        out_fields = params.get("outFields", "*")
+        wanted = None if out_fields == "*" else set(out_fields.split(","))
+        return_geometry = params.get("returnGeometry", "true") == "true"
+
+        response = {"features": []}
+        for feature in features:
+            attributes = {
+                name: value for name, value in feature["attributes"].items()
+                if wanted is None or name in wanted
+            }
+            item = {"attributes": attributes}
+            if return_geometry:
+                item["geometry"] = {"rings": feature["rings"]}
+            response["features"].append(item)
+        if exceeded:
+            response["exceededTransferLimit"] = True
+        return response
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local ArcGIS REST stand-in for MIPR/CRIM")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--mode", choices=["synthetic", "record", "replay"], default="synthetic")
+    parser.add_argument("--fixtures", default=None)
+    parser.add_argument("--upstream", default=None, help="Record from this base URL instead of MIPR/CRIM")
+    args = parser.parse_args()
+
+    standin = ArcGISStandIn(
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        mode=args.mode,
+        fixtures_dir=Path(args.fixtures) if args.fixtures else None,
+        upstream=args.upstream
+    )
+    print(f"ArcGIS stand-in ({args.mode}) listening on {standin.url}")
+    try:
+        standin.server.serve_forever()
+    except KeyboardInterrupt:
+        standin.stop()
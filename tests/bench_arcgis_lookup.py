@@ -0,0 +1,140 @@
+"""
+Benchmark for the ArcGIS lookup path
+Runs validate_location against the local stand-in (or recorded fixtures)
+and reports p50/p95/p99 latency and throughput, so changes to the client
+can be compared without depending on sige.pr.gov.
+
+Usage:
+    python tests/bench_arcgis_lookup.py --requests 200 --latency 0.15 --jitter 0.1
+    python tests/bench_arcgis_lookup.py --mode replay --fixtures tests/fixtures/arcgis
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from arcgis_standin import ArcGISStandIn
+from src.services.lookup_cache import LookupCache
+from src.services.resilience import ResiliencePolicy
+
+# Roughly the San Juan metro area
+LAT_RANGE = (18.38, 18.47)
+LNG_RANGE = (-66.12, -65.98)
+
+
+def percentile(samples: List[float], p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+def sample_points(count: int, repeat_share: float, seed: int) -> List[Tuple[float, float]]:
+    """Random points, with `repeat_share` of them revisiting earlier points"""
+    rng = random.Random(seed)
+    points = []
+    for _ in range(count):
+        if points and rng.random() < repeat_share:
+            points.append(rng.choice(points))
+        else:
+            points.append((rng.uniform(*LAT_RANGE), rng.uniform(*LNG_RANGE)))
+    return points
+
+
+def run_scenario(name: str, lookup: Callable, points: List[Tuple[float, float]], concurrency: int) -> Dict:
+    latencies = []
+    failures = 0
+
+    def timed(point):
+        started = time.perf_counter()
+        result = lookup(*point)
+        return time.perf_counter() - started, result
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for elapsed, result in executor.map(timed, points):
+            latencies.append(elapsed)
+            if not result.get("success"):
+                failures += 1
+    wall = time.perf_counter() - started
+
+    stats = {
+        "scenario": name,
+        "requests": len(points),
+        "failures": failures,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "throughput_rps": len(points) / wall
+    }
+    print(
+        f"{name:<28} p50 {stats['p50_ms']:8.1f} ms   p95 {stats['p95_ms']:8.1f} ms   "
+        f"p99 {stats['p99_ms']:8.1f} ms   {stats['throughput_rps']:7.1f} req/s   "
+        f"failures {failures}/{len(points)}"
+    )
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark validate_location against the ArcGIS stand-in")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=4, help="Simultaneous validate_location calls")
+    parser.add_argument("--latency", type=float, default=0.1, help="Stand-in base latency (s)")
+    parser.add_argument("--jitter", type=float, default=0.1, help="Stand-in random extra latency (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--repeat-share", type=float, default=0.3, help="Share of repeated points")
+    parser.add_argument("--mode", choices=["synthetic", "replay"], default="synthetic")
+    parser.add_argument("--fixtures", default=None)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    points = sample_points(args.requests, args.repeat_share, args.seed)
+
+    with ArcGISStandIn(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        mode=args.mode,
+        fixtures_dir=Path(args.fixtures) if args.fixtures else None,
+        seed=args.seed
+    ) as standin, tempfile.TemporaryDirectory() as tmp:
+        client_class = standin.client_class()
+        print(f"Stand-in at {standin.url} ({args.mode}), {args.requests} lookups, concurrency {args.concurrency}\n")
+
+        def make_client(cache=None):
+            return client_class(
+                cache=cache,
+                use_cache=cache is not None,
+                use_offline_zoning=False,
+                resilience=ResiliencePolicy(base_delay=0.05)
+            )
+
+        sequential = make_client()
+        run_scenario("sequential layers", lambda lat, lng: sequential.validate_location(lat, lng, concurrent=False),
+                     points, args.concurrency)
+
+        concurrent = make_client()
+        run_scenario("concurrent layers", concurrent.validate_location, points, args.concurrency)
+
+        cached = make_client(LookupCache(db_path=Path(tmp) / "bench_cache.sqlite3"))
+        run_scenario("concurrent layers + cache", cached.validate_location, points, args.concurrency)
+
+        bulk = make_client()
+        started = time.perf_counter()
+        results = bulk.query_points_bulk(points, "zoning")
+        elapsed = time.perf_counter() - started
+        found = sum(1 for r in results if r.get("success"))
+        print(f"{'bulk zoning (multipoint)':<28} {elapsed * 1000:8.1f} ms total   "
+              f"{len(points) / elapsed:7.1f} points/s   found {found}/{len(points)}")
+
+        print(f"\nStand-in served {standin.request_count} HTTP requests")
+
+
+if __name__ == "__main__":
+    main()
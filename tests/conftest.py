@@ -0,0 +1,28 @@
+"""
+Shared pytest fixtures
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add project root to Python path so "src.*" imports work
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from arcgis_standin import ArcGISStandIn
+from src.database.rules_loader import RulesDatabase
+
+
+@pytest.fixture(scope="session")
+def rules_db() -> RulesDatabase:
+    """Rules database built from the JSON sources, shared by the whole run"""
+    return RulesDatabase()
+
+
+@pytest.fixture(scope="session")
+def standin():
+    """Synthetic MIPR/CRIM stand-in server on a free local port, shared by the run"""
+    with ArcGISStandIn() as server:
+        yield server
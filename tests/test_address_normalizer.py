@@ -0,0 +1,39 @@
+"""
+Normalización de direcciones y claves de caché de geocodificación
+"""
+
+import pytest
+
+from src.utils.address_normalizer import geocode_cache_key, normalize_address, split_unit
+
+
+@pytest.mark.parametrize("address, expected", [
+    ("Calle Luna 123 Local 5", ("calle luna 123", "5")),
+    ("Calle Luna 123, Apt. 4B", ("calle luna 123", "4b")),
+    # Sin número de casa antes, "Local" es parte del nombre de la calle
+    ("Calle Local 5", ("calle local 5", None)),
+    ("Calle Luna 123", ("calle luna 123", None))
+])
+def test_split_unit(address, expected):
+    assert split_unit(address) == expected
+
+
+def test_normalize_address_variants():
+    expected = "urb san patricio calle luna 123"
+
+    assert normalize_address("Urbanización San Patricio, C. Luna #123, Apt. 4B") == expected
+    assert normalize_address("urb san patricio calle luna 123 apto 4-b") == expected
+
+
+def test_normalize_address_highway_alias():
+    assert normalize_address("PR 2 km 5") == normalize_address("Carretera 2 km 5")
+    assert normalize_address("pr 2").startswith("carr")
+
+
+def test_geocode_cache_key_keeps_street_named_after_municipio():
+    assert geocode_cache_key("Calle Loíza", "Loíza") == "loiza|calle loiza"
+
+
+def test_geocode_cache_key_drops_repeated_municipio():
+    assert geocode_cache_key("Calle Luna 5 Loíza", "Loíza") == "loiza|calle luna 5"
+    assert geocode_cache_key("Calle Luna 5", "Loíza") == "loiza|calle luna 5"
@@ -0,0 +1,170 @@
+"""
+AddressValidator: reintentos por cuota y geocodificación en lote
+"""
+
+import threading
+import time
+
+import pytest
+
+from src.services.lookup_cache import LookupCache
+from src.services.resilience import TokenBucket
+from src.utils import address_validator
+from src.utils.address_normalizer import geocode_cache_key
+from src.utils.address_validator import CACHED_GEOCODE_FIELDS, GEOCODE_ATTEMPTS, AddressValidator
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+    def json(self):
+        return self.data
+
+
+class FakeGoogle:
+    """Sesión que contesta como Geocoding API y cuenta las solicitudes por dirección"""
+
+    def __init__(self, status="OK", delay=0.0):
+        self.status = status
+        self.delay = delay
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def get(self, url, params, timeout):
+        with self._lock:
+            self.calls.append(params["address"])
+        if self.delay:
+            time.sleep(self.delay)
+        if self.status != "OK":
+            return FakeResponse({"status": self.status, "results": []})
+        street = params["address"].split(",")[0]
+        return FakeResponse({"status": "OK", "results": [{
+            "formatted_address": f"{street}, San Juan, 00901, Puerto Rico",
+            "place_id": f"place-{street}",
+            "geometry": {"location": {"lat": 18.4655, "lng": -66.1057}, "location_type": "ROOFTOP"},
+            "address_components": [{"long_name": "Puerto Rico", "types": ["country"]}]
+        }]})
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def validator(monkeypatch):
+    monkeypatch.setenv("GOOGLE_MAPS_API_KEY", "test-key")
+
+    def make(google, **options):
+        validator = AddressValidator(rate_limiter=TokenBucket(rate=10000), **options)
+        validator.session = google
+        return validator
+    return make
+
+
+def test_over_query_limit_does_not_sleep_after_the_last_attempt(validator, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(address_validator.time, "sleep", sleeps.append)
+    google = FakeGoogle(status="OVER_QUERY_LIMIT")
+
+    result = validator(google, use_cache=False).validate_address("Calle Luna 123", "San Juan")
+
+    assert result["valid"] is False
+    assert "OVER_QUERY_LIMIT" in result["error"]
+    assert len(google.calls) == GEOCODE_ATTEMPTS
+    assert sleeps == [2 ** attempt for attempt in range(GEOCODE_ATTEMPTS - 1)]
+
+
+def test_geocode_many_keeps_input_order(validator):
+    google = FakeGoogle(delay=0.01)
+    addresses = [(f"Calle Luna {n}", "San Juan") for n in range(40)]
+
+    results = list(validator(google, use_cache=False).geocode_many(addresses, max_workers=4))
+
+    assert [result["query"]["address"] for result in results] == [address for address, _ in addresses]
+    assert all(result["valid"] for result in results)
+    assert [result["place_id"] for result in results] == [f"place-{address}" for address, _ in addresses]
+
+
+def test_geocode_many_dedupes_normalized_addresses(validator):
+    google = FakeGoogle(delay=0.05)
+    addresses = [
+        ("Calle Luna 123", "San Juan"),
+        ("C. Luna #123", "san juan"),
+        ("CALLE LUNA 123", "San Juan"),
+        ("Calle Sol 5", "San Juan")
+    ]
+    progress = []
+
+    results = list(validator(google, use_cache=False).geocode_many(
+        addresses, progress=lambda done, read: progress.append((done, read))
+    ))
+
+    assert len(google.calls) == 2
+    assert [result["query"]["address"] for result in results] == [address for address, _ in addresses]
+    assert results[0]["place_id"] == results[1]["place_id"] == results[2]["place_id"]
+    assert results[0] is not results[1]
+    assert [done for done, _ in progress] == [1, 2, 3, 4]
+    assert progress[-1] == (4, 4)
+
+
+def test_geocode_many_forgets_lookups_once_yielded(validator):
+    google = FakeGoogle()
+    # One worker keeps at most 4 entries in flight, so the first address is
+    # yielded before it comes round again
+    addresses = [("Calle Luna 1", "San Juan")] + [(f"Calle Sol {n}", "San Juan") for n in range(8)]
+    addresses.append(("Calle Luna 1", "San Juan"))
+
+    results = list(validator(google, use_cache=False).geocode_many(addresses, max_workers=1))
+
+    assert len(results) == len(addresses)
+    assert google.calls.count("Calle Luna 1, San Juan, Puerto Rico") == 2
+
+
+def test_geocode_many_reuses_the_cache(validator):
+    google = FakeGoogle()
+    client = validator(google, cache=LookupCache(db_path=None))
+    addresses = [("Calle Luna 1", "San Juan")] + [(f"Calle Sol {n}", "San Juan") for n in range(8)]
+    addresses.append(("Calle Luna 1", "San Juan"))
+
+    list(client.geocode_many(addresses, max_workers=1))
+
+    assert google.calls.count("Calle Luna 1, San Juan, Puerto Rico") == 1
+
+
+def test_cache_keeps_only_coordinates_and_place_id(validator):
+    cache = LookupCache(db_path=None)
+    client = validator(FakeGoogle(), cache=cache)
+
+    fresh = client.validate_address("Calle Luna 123", "San Juan")
+
+    assert fresh["formatted_address"] == "Calle Luna 123, San Juan, 00901, Puerto Rico"
+    cached = cache.get("geocode", geocode_cache_key("Calle Luna 123", "San Juan"))
+    assert set(cached) == set(CACHED_GEOCODE_FIELDS)
+    assert cached["place_id"] == "place-Calle Luna 123"
+
+
+def test_cache_hit_keeps_the_callers_unit(validator):
+    google = FakeGoogle()
+    client = validator(google, cache=LookupCache(db_path=None))
+
+    first = client.validate_address("Calle Sol 10 Apt 4B", "San Juan")
+    second = client.validate_address("Calle Sol 10 Apt 5C", "san juan")
+
+    assert len(google.calls) == 1
+    assert (second["latitude"], second["longitude"], second["place_id"]) == \
+        (first["latitude"], first["longitude"], first["place_id"])
+    assert second["formatted_address"] == "Calle Sol 10 Apt 5C, san juan, Puerto Rico"
+    assert second["components"] == {"city": "san juan", "country": "Puerto Rico"}
+    assert "warning" not in second
+
+
+def test_geocode_many_repeats_get_their_own_address(validator):
+    google = FakeGoogle(delay=0.05)
+    addresses = [("Calle Sol 10 Apt 4B", "San Juan"), ("Calle Sol 10 Apt 5C", "San Juan")]
+
+    results = list(validator(google, use_cache=False).geocode_many(addresses))
+
+    assert len(google.calls) == 1
+    assert results[0]["formatted_address"] == "Calle Sol 10 Apt 4B, San Juan, 00901, Puerto Rico"
+    assert results[1]["formatted_address"] == "Calle Sol 10 Apt 5C, San Juan, Puerto Rico"
+    assert results[0]["place_id"] == results[1]["place_id"]
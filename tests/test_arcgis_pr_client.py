@@ -0,0 +1,261 @@
+"""
+ArcGISPRClient: bulk queries, caching and the combined location lookup
+"""
+
+import math
+import random
+import time
+
+import arcgis_standin
+from arcgis_standin import CRIM_PATH, ArcGISStandIn, _overlay_feature
+from src.services.arcgis_pr_client import ArcGISPRClient
+from src.services.lookup_cache import LookupCache, ParcelIndex
+from src.services.resilience import ResiliencePolicy
+from src.utils.geo_projection import lat_lng_to_web_mercator, unproject_from_web_mercator, web_mercator_to_lat_lng
+
+# Inside the stand-in's enumerable zoning extent (around San Juan)
+POINT = web_mercator_to_lat_lng(-7360020.0, 2080030.0)
+
+
+def policy():
+    return ResiliencePolicy(hedge=False, base_delay=0.01)
+
+
+class BatchRecorder(ArcGISPRClient):
+    """Records the multipoint batches query_points_bulk would send"""
+
+    def __init__(self):
+        super().__init__(use_cache=False, use_offline_zoning=False)
+        self.batches = []
+
+    def _out_fields(self, query_url, fields):
+        return "*"
+
+    def _query_batch(self, url, batch, coords, out_fields, from_attributes, failure, not_found, search_distance=10.0):
+        self.batches.append([coords[i] for i in batch])
+        return {i: dict(not_found) for i in batch}
+
+
+def test_bulk_batches_follow_1km_rows():
+    # 10 rows 1 km apart, 5 points per row spread 80 km east-west
+    xy = [(-7400000.0 + column * 20000 + 500, 2070000.0 + row * 1000 + 500) for row in range(10) for column in range(5)]
+    random.Random(7).shuffle(xy)
+    lat, lng = unproject_from_web_mercator([x for x, _ in xy], [y for _, y in xy])
+    client = BatchRecorder()
+
+    results = client.query_points_bulk(list(zip(lat.tolist(), lng.tolist())), "parcel", batch_size=5)
+
+    assert len(results) == 50
+    assert len(client.batches) == 10
+    for batch in client.batches:
+        assert len({y // 1000 for _, y in batch}) == 1
+        assert [x for x, _ in batch] == sorted(x for x, _ in batch)
+    assert [batch[0][1] for batch in client.batches] == sorted(batch[0][1] for batch in client.batches)
+
+
+def test_slow_layer_is_reported_at_the_deadline():
+    with ArcGISStandIn(path_latency={CRIM_PATH + "/query": 3.0}) as slow:
+        client = slow.client_class()(use_cache=False, use_offline_zoning=False, resilience=policy())
+        started = time.monotonic()
+        result = client.validate_location(*POINT, deadline=1.0)
+        elapsed = time.monotonic() - started
+        client.close()
+
+    assert elapsed < 2.0
+    assert result["success"] is True
+    assert result["zoning"]["code"]
+    assert result["catastro"] is None
+    assert "Catastro lookup failed: No response within 1.0s deadline" in result["warnings"]
+    assert not any(warning.startswith(("Zoning", "Overlay")) for warning in result["warnings"])
+
+
+def test_recorded_lookups_replay_without_the_upstream(tmp_path):
+    fixtures = tmp_path / "arcgis"
+
+    def lookup(standin):
+        client = standin.client_class()(use_cache=False, use_offline_zoning=False, resilience=policy())
+        result = client.validate_location(*POINT, concurrent=False)
+        client.close()
+        return result
+
+    with ArcGISStandIn() as upstream:
+        with ArcGISStandIn(mode="record", fixtures_dir=fixtures, upstream=upstream.url) as recorder:
+            recorded = lookup(recorder)
+    # The upstream is stopped; only the fixtures are left
+    with ArcGISStandIn(mode="replay", fixtures_dir=fixtures) as replayer:
+        replayed = lookup(replayer)
+
+    assert recorded["success"] and recorded["catastro"] and recorded["zoning"]
+    assert recorded["warnings"] == recorded["errors"] == []
+    assert replayed == recorded
+    assert replayer.request_count == len(list(fixtures.glob("*.json")))
+
+
+def test_keep_raw_data_requests_every_field(standin):
+    def lookups(keep_raw_data):
+        client = standin.client_class()(
+            use_cache=False, use_offline_zoning=False, resilience=policy(), keep_raw_data=keep_raw_data
+        )
+        zoning, parcel = client.get_zoning_district(*POINT), client.get_parcel_info(*POINT)
+        client.close()
+        return zoning, parcel
+
+    zoning, parcel = lookups(keep_raw_data=True)
+    lean_zoning, lean_parcel = lookups(keep_raw_data=False)
+
+    assert {"OBJECTID", "CALIFICACION", "DESCRIPCION"} <= set(zoning["raw_data"])
+    assert {"OBJECTID", "NUM_CATASTRO", "MUNICIPIO", "BARRIO"} <= set(parcel["raw_data"])
+    assert lean_zoning["raw_data"] is lean_parcel["raw_data"] is None
+    assert (lean_zoning["district_code"], lean_parcel["catastro"]) == (zoning["district_code"], parcel["catastro"])
+
+
+def parcel_centres(count, seed=3):
+    """Web Mercator centres of distinct 50 m stand-in parcels, shuffled"""
+    rng = random.Random(seed)
+    cells = rng.sample([(ix, iy) for ix in range(-147230, -147190) for iy in range(41600, 41640)], count)
+    return [(ix * 50 + 25.0, iy * 50 + 25.0) for ix, iy in cells]
+
+
+def to_lat_lng(xy):
+    lat, lng = unproject_from_web_mercator([x for x, _ in xy], [y for _, y in xy])
+    return list(zip(lat.tolist(), lng.tolist()))
+
+
+def test_bulk_maps_each_point_to_its_own_parcel(standin):
+    xy = parcel_centres(60)
+    points = to_lat_lng(xy)
+    # A repeated point gets the same answer at both positions
+    points.append(points[0])
+    xy.append(xy[0])
+    client = standin.client_class()(use_cache=False, use_offline_zoning=False, resilience=policy())
+    before = standin.request_count
+
+    results = client.query_points_bulk(points, "parcel", batch_size=25)
+    requests_made = standin.request_count - before
+    expected = [client.get_parcel_info(lat, lng) for lat, lng in points[:5]]
+    client.close()
+
+    assert [result["catastro"] for result in results] == [
+        f"SYN-{math.floor(x / 50)}-{math.floor(y / 50)}" for x, y in xy
+    ]
+    assert all(result["success"] for result in results)
+    assert results[:5] == expected
+    assert requests_made <= 4
+
+
+def test_bulk_splits_batches_the_server_truncates(standin, monkeypatch):
+    monkeypatch.setattr(arcgis_standin, "MAX_RECORD_COUNT", 4)
+    xy = parcel_centres(20, seed=5)
+    client = standin.client_class()(use_cache=False, use_offline_zoning=False, resilience=policy())
+    client.get_parcel_info(*to_lat_lng(xy[:1])[0])
+    before = standin.request_count
+
+    results = client.query_points_bulk(to_lat_lng(xy), "parcel", batch_size=20)
+    requests_made = standin.request_count - before
+    client.close()
+
+    assert [result["catastro"] for result in results] == [
+        f"SYN-{math.floor(x / 50)}-{math.floor(y / 50)}" for x, y in xy
+    ]
+    # 20 -> 10 -> 5 -> 2 + 3 points per request: 1 + 2 + 4 + 8
+    assert requests_made == 15
+
+
+def test_bulk_points_without_a_feature(standin):
+    # Centres of 1 km cells, only some of them inside the overlay
+    cells = [(ix, iy) for ix in range(-7370, -7350) for iy in range(2070, 2075)]
+    xy = [(ix * 1000 + 500.0, iy * 1000 + 500.0) for ix, iy in cells]
+    points = to_lat_lng(xy) + [(40.7, -74.0)]
+    client = standin.client_class()(use_cache=False, use_offline_zoning=False, resilience=policy())
+
+    results = client.query_points_bulk(points, "overlay:32", batch_size=30)
+    client.close()
+
+    covered = [_overlay_feature(32, ix, iy) is not None for ix, iy in cells]
+    assert any(covered) and not all(covered)
+    assert [result["found"] for result in results[:-1]] == covered
+    for result, (ix, iy), found in zip(results, cells, covered):
+        if found:
+            assert result["attributes"]["NOMBRE"] == f"FEMA Flood Zones {ix}:{iy}"
+        else:
+            assert result == {"found": False, "attributes": {}}
+    assert results[-1]["found"] is False
+    assert "outside Puerto Rico" in results[-1]["error"]
+
+
+def test_bulk_answers_cached_points_without_a_request(standin):
+    points = to_lat_lng(parcel_centres(10, seed=9))
+    client = standin.client_class()(
+        cache=LookupCache(db_path=None), use_offline_zoning=False, resilience=policy()
+    )
+    first = client.query_points_bulk(points, "zoning")
+    before = standin.request_count
+
+    second = client.query_points_bulk(points, "zoning")
+    client.close()
+
+    assert standin.request_count == before
+    assert second == first
+
+
+def test_nearby_point_in_a_cached_parcel_needs_no_request(standin):
+    cache, parcels = LookupCache(db_path=None), ParcelIndex()
+    client = standin.client_class()(
+        cache=cache, parcel_index=parcels, use_offline_zoning=False, resilience=policy()
+    )
+    x, y = -7361045.0, 2081005.0
+    first, second = web_mercator_to_lat_lng(x, y), web_mercator_to_lat_lng(x + 30, y + 30)
+    outside = web_mercator_to_lat_lng(x - 30, y)
+
+    warm = client.validate_location(*first)
+    before = standin.request_count
+    reused = client.validate_location(*second)
+    requests_made = standin.request_count - before
+    neighbour = client.get_parcel_info(*outside)
+    client.close()
+
+    # 30 m away is another 10 m cache cell but the same 50 m parcel
+    assert cache.cell_key(x, y) != cache.cell_key(x + 30, y + 30)
+    assert requests_made == 0
+    assert (reused["zoning"], reused["catastro"], reused["overlays"]) == (warm["zoning"], warm["catastro"], warm["overlays"])
+    assert reused["catastro"]["number"] == "SYN--147221-41620"
+    # 30 m west is the next parcel, which is looked up
+    assert neighbour["catastro"] == "SYN--147222-41620"
+    assert standin.request_count > before
+
+
+def test_lookup_by_catastro(standin):
+    parcels = ParcelIndex()
+    client = standin.client_class()(
+        cache=LookupCache(db_path=None), parcel_index=parcels, use_offline_zoning=False, resilience=policy()
+    )
+
+    result = client.lookup_by_catastro(" syn--147221-41620 ")
+    before = standin.request_count
+    again = client.validate_location(result["coordinates"]["lat"], result["coordinates"]["lng"])
+    requests_made = standin.request_count - before
+    client.close()
+
+    assert result["success"] is True
+    assert result["catastro"]["number"] == "SYN--147221-41620"
+    assert result["zoning"]["code"]
+    lat, lng = result["coordinates"]["lat"], result["coordinates"]["lng"]
+    x, y = lat_lng_to_web_mercator(lat, lng)
+    assert (math.floor(x / 50), math.floor(y / 50)) == (-147221, 41620)
+    assert parcels.locate(x, y) == "SYN--147221-41620"
+    assert requests_made == 0
+    assert again["catastro"] == result["catastro"]
+
+
+def test_lookup_by_catastro_not_found(standin):
+    client = standin.client_class()(use_cache=False, use_offline_zoning=False, resilience=policy())
+    before = standin.request_count
+
+    result = client.lookup_by_catastro("06307728312")
+    client.close()
+
+    assert result["success"] is False
+    assert result["coordinates"] is None
+    assert result["errors"] == ["Catastro 063-077-283-12 not found in CRIM"]
+    # Only the CRIM attribute query (and at most its schema read)
+    assert standin.request_count - before <= 2
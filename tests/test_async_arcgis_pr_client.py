@@ -0,0 +1,157 @@
+"""
+AsyncArcGISPRClient: same answers and local shortcuts as ArcGISPRClient
+"""
+
+import asyncio
+import threading
+import time
+
+from arcgis_standin import CRIM_PATH, ArcGISStandIn
+from src.services.async_arcgis_pr_client import AsyncArcGISPRClient
+from src.services.lookup_cache import LookupCache, ParcelIndex
+from src.services.offline_zoning import OfflineZoningIndex, sync_calificacion_snapshot
+from src.services.resilience import ResiliencePolicy
+from src.utils.geo_projection import web_mercator_to_lat_lng
+
+# Inside the stand-in's enumerable zoning extent (around San Juan)
+POINTS = [web_mercator_to_lat_lng(x, y) for x, y in (
+    (-7360020.0, 2080030.0), (-7355510.0, 2075260.0), (-7364980.0, 2086740.0)
+)]
+
+
+def policy():
+    return ResiliencePolicy(hedge=False, base_delay=0.01)
+
+
+def run(standin, check, **options):
+    async def main():
+        client_class = standin.client_class(AsyncArcGISPRClient)
+        async with client_class(resilience=policy(), **options) as client:
+            return await check(client)
+    return asyncio.run(main())
+
+
+def summary(result):
+    return (result["success"], result["zoning"], result["catastro"], result["overlays"], result["errors"])
+
+
+def test_async_matches_sync(standin):
+    sync_client = standin.client_class()(use_cache=False, use_offline_zoning=False, resilience=policy())
+    expected = [summary(sync_client.validate_location(lat, lng)) for lat, lng in POINTS]
+    sync_client.close()
+
+    async def check(client):
+        return await asyncio.gather(*(client.validate_location(lat, lng) for lat, lng in POINTS))
+
+    results = run(standin, check, use_cache=False, use_offline_zoning=False)
+
+    assert [summary(result) for result in results] == expected
+    assert all(result["success"] for result in results)
+
+
+def test_async_accepts_the_sync_concurrent_argument(standin):
+    async def check(client):
+        return await client.validate_location(*POINTS[0], concurrent=False, deadline=10)
+
+    result = run(standin, check, use_cache=False, use_offline_zoning=False)
+
+    assert result["success"] is True
+
+
+def test_async_slow_layer_is_reported_at_the_deadline():
+    async def check(client):
+        started = time.monotonic()
+        result = await client.validate_location(*POINTS[0], deadline=1.0)
+        return result, time.monotonic() - started
+
+    with ArcGISStandIn(path_latency={CRIM_PATH + "/query": 3.0}) as slow:
+        result, elapsed = run(slow, check, use_cache=False, use_offline_zoning=False)
+
+    assert elapsed < 2.0
+    assert result["zoning"]["code"]
+    assert result["catastro"] is None
+    assert "Catastro lookup failed: No response within 1.0s deadline" in result["warnings"]
+    assert not any(warning.startswith(("Zoning", "Overlay")) for warning in result["warnings"])
+
+
+class ThreadRecordingCache(LookupCache):
+    """Records the thread of every cache read and write"""
+
+    def __init__(self):
+        super().__init__(db_path=None)
+        self.threads = set()
+
+    def get(self, *args, **kwargs):
+        self.threads.add(threading.current_thread())
+        return super().get(*args, **kwargs)
+
+    def set(self, *args, **kwargs):
+        self.threads.add(threading.current_thread())
+        return super().set(*args, **kwargs)
+
+
+def test_async_cache_io_runs_off_the_event_loop(standin):
+    cache = ThreadRecordingCache()
+
+    async def check(client):
+        await client.validate_location(*POINTS[1])
+        return threading.current_thread()
+
+    loop_thread = run(standin, check, cache=cache, parcel_index=ParcelIndex(), use_offline_zoning=False)
+
+    assert cache.threads
+    assert loop_thread not in cache.threads
+
+
+def test_async_rejects_points_outside_puerto_rico(standin):
+    before = standin.request_count
+
+    async def check(client):
+        return await client.validate_location(40.7, -74.0)
+
+    result = run(standin, check, use_cache=False, use_offline_zoning=False)
+
+    assert result["success"] is False
+    assert "outside Puerto Rico" in result["errors"][0]
+    assert standin.request_count == before
+
+
+def test_async_reuses_cached_parcel_lookups(standin):
+    cache, parcels = LookupCache(db_path=None), ParcelIndex()
+    x, y = -7361045.0, 2081005.0
+    first, second = web_mercator_to_lat_lng(x, y), web_mercator_to_lat_lng(x + 30, y + 30)
+
+    async def check(client):
+        warm = await client.validate_location(*first)
+        before = standin.request_count
+        reused = await client.validate_location(*second)
+        return warm, reused, standin.request_count - before
+
+    warm, reused, requests_made = run(
+        standin, check, cache=cache, parcel_index=parcels, use_offline_zoning=False
+    )
+
+    # 30 m away is another 10 m cache cell but the same 50 m parcel
+    assert cache.cell_key(x, y) != cache.cell_key(x + 30, y + 30)
+    assert requests_made == 0
+    assert summary(reused) == summary(warm)
+    assert len(parcels) == 1
+
+
+def test_async_answers_zoning_from_the_snapshot(standin, tmp_path):
+    sync_client = standin.client_class()(use_cache=False, use_offline_zoning=False, resilience=policy())
+    sync_calificacion_snapshot(sync_client, tmp_path / "calificacion.sqlite3")
+    expected = sync_client.get_zoning_district(*POINTS[0])
+    sync_client.close()
+    snapshot = OfflineZoningIndex(tmp_path / "calificacion.sqlite3")
+    before = standin.request_count
+
+    async def check(client):
+        return await client.get_zoning_district(*POINTS[0])
+
+    result = run(standin, check, use_cache=False, offline_zoning=snapshot)
+    snapshot.close()
+
+    assert standin.request_count == before
+    assert result["source"] == "MIPR Calificacion (local snapshot)"
+    assert result["district_code"] == expected["district_code"]
@@ -0,0 +1,71 @@
+"""
+Gazetteer: approximate locations from the bundled place names
+"""
+
+import json
+
+from src.services.gazetteer import Gazetteer, get_gazetteer
+
+
+def test_locate_prefers_the_most_specific_place():
+    result = get_gazetteer().locate("Calle Loíza 1950, Ocean Park", "San Juan")
+
+    assert result["found"] is True
+    assert (result["matched_name"], result["match_type"]) == ("Ocean Park", "barrio")
+    assert (result["latitude"], result["longitude"]) == (18.454, -66.05)
+    assert result["low_confidence"] is True
+    assert result["confidence"] == "APPROXIMATE"
+
+
+def test_locate_ignores_accents_and_case():
+    result = get_gazetteer().locate("AVE PONCE DE LEON, RIO PIEDRAS", "san juan")
+
+    assert result["matched_name"] == "Río Piedras"
+
+
+def test_locate_only_matches_places_in_the_municipio():
+    # Isla Verde is in Carolina, so in San Juan only the pueblo is known
+    result = get_gazetteer().locate("Calle Tartak, Isla Verde", "San Juan")
+
+    assert (result["matched_name"], result["match_type"], result["score"]) == ("San Juan", "municipio", 0.0)
+    assert get_gazetteer().locate("Calle Tartak, Isla Verde", "Carolina")["matched_name"] == "Isla Verde"
+
+
+def test_locate_falls_back_to_the_pueblo():
+    result = get_gazetteer().locate("Carr. 2 Km 5.1", "BAYAMON")
+
+    assert result["found"] is True
+    assert (result["matched_name"], result["match_type"]) == ("Bayamón", "municipio")
+    assert (result["latitude"], result["longitude"]) == (18.399, -66.156)
+
+
+def test_locate_unknown_municipio():
+    result = get_gazetteer().locate("Calle Luna 123", "Springfield")
+
+    assert result["found"] is False
+    assert result["low_confidence"] is True
+    assert "Springfield" in result["error"]
+
+
+def test_search_ranks_by_similarity():
+    matches = get_gazetteer().search("Condado")
+
+    assert matches[0]["place"]["name"] == "Condado"
+    assert matches[0]["score"] == 1.0
+    scores = [match["score"] for match in matches]
+    assert scores == sorted(scores, reverse=True)
+    assert "Santurce" not in [match["place"]["name"] for match in get_gazetteer().search("Santurce", municipality="Ponce")]
+
+
+def test_gazetteer_from_another_file(tmp_path):
+    path = tmp_path / "gazetteer.json"
+    path.write_text(json.dumps({"version": "test", "places": [
+        {"name": "Ponce", "type": "municipio", "municipality": "Ponce", "lat": 18.011, "lng": -66.614},
+        {"name": "Urb. Alhambra", "type": "urbanizacion", "municipality": "Ponce", "lat": 18.02, "lng": -66.6}
+    ]}), encoding="utf-8")
+
+    gazetteer = Gazetteer(path)
+
+    assert gazetteer.version == "test"
+    assert gazetteer.locate("Calle Granada A-5, Urb. Alhambra", "Ponce")["match_type"] == "urbanizacion"
+    assert gazetteer.locate("Calle Granada A-5", "Ponce")["match_type"] == "municipio"
@@ -0,0 +1,93 @@
+"""
+WGS84 <-> Web Mercator projection: reference point, round trips and the
+NumPy versions against the scalar ones
+"""
+
+import math
+
+import numpy as np
+import pytest
+
+from src.utils.geo_projection import (
+    MAX_LATITUDE, grid_cells, lat_lng_to_web_mercator, points_to_web_mercator, project_to_web_mercator,
+    unproject_from_web_mercator, web_mercator_to_lat_lng
+)
+
+# WGS84 semi-major axis, the radius of the Web Mercator sphere
+EARTH_RADIUS = 6378137.0
+
+SAN_JUAN = (18.4655, -66.1057)
+SAN_JUAN_3857 = (-7358852.86, 2092107.14)
+
+
+def spherical_mercator(lat, lng):
+    """EPSG:3857 straight from its definition"""
+    return (
+        EARTH_RADIUS * math.radians(lng),
+        EARTH_RADIUS * math.log(math.tan(math.pi / 4 + math.radians(lat) / 2))
+    )
+
+
+def sample_points(count=500, seed=7):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(-80, 80, count), rng.uniform(-180, 180, count)
+
+
+def test_san_juan_in_epsg_3857():
+    x, y = lat_lng_to_web_mercator(*SAN_JUAN)
+
+    assert x == pytest.approx(SAN_JUAN_3857[0], abs=0.01)
+    assert y == pytest.approx(SAN_JUAN_3857[1], abs=0.01)
+    assert (x, y) == pytest.approx(spherical_mercator(*SAN_JUAN), abs=0.01)
+
+
+@pytest.mark.parametrize("lat, lng", [
+    SAN_JUAN,
+    (17.9, -67.2),
+    (0.0, 0.0),
+    (-33.87, 151.21),
+    (60.0, -179.9)
+])
+def test_scalar_round_trip(lat, lng):
+    assert web_mercator_to_lat_lng(*lat_lng_to_web_mercator(lat, lng)) == pytest.approx((lat, lng), abs=1e-9)
+
+
+def test_vectorized_round_trip():
+    lat, lng = sample_points()
+
+    back_lat, back_lng = unproject_from_web_mercator(*project_to_web_mercator(lat, lng))
+
+    np.testing.assert_allclose(back_lat, lat, atol=1e-9)
+    np.testing.assert_allclose(back_lng, lng, atol=1e-9)
+
+
+def test_vectorized_matches_scalar():
+    lat, lng = sample_points()
+
+    x, y = project_to_web_mercator(lat, lng)
+    expected = np.array([lat_lng_to_web_mercator(a, b) for a, b in zip(lat.tolist(), lng.tolist())])
+    np.testing.assert_allclose(x, expected[:, 0], rtol=0, atol=1e-6)
+    np.testing.assert_allclose(y, expected[:, 1], rtol=0, atol=1e-6)
+    np.testing.assert_allclose(points_to_web_mercator(np.column_stack((lat, lng))), expected, rtol=0, atol=1e-6)
+
+    back_lat, back_lng = unproject_from_web_mercator(x, y)
+    expected = np.array([web_mercator_to_lat_lng(a, b) for a, b in zip(x.tolist(), y.tolist())])
+    np.testing.assert_allclose(back_lat, expected[:, 0], rtol=0, atol=1e-12)
+    np.testing.assert_allclose(back_lng, expected[:, 1], rtol=0, atol=1e-12)
+
+
+def test_latitude_is_clamped_at_the_poles():
+    top = lat_lng_to_web_mercator(MAX_LATITUDE, 0.0)
+
+    assert lat_lng_to_web_mercator(90.0, 0.0) == top
+    # The clamp latitude maps to the top of the square world
+    assert top[1] == pytest.approx(20037508.34, abs=0.01)
+    _, y = project_to_web_mercator([90.0, -90.0], [0.0, 0.0])
+    np.testing.assert_allclose(y, [top[1], -top[1]], rtol=0, atol=1e-6)
+
+
+def test_grid_cells_floor_negative_coordinates():
+    columns, rows = grid_cells([-0.1, 0.0, 49.9, 50.0], [-50.0, -49.9, 99.9, 100.0], 50.0)
+
+    assert columns.tolist() == [-1, 0, 0, 1]
+    assert rows.tolist() == [-1, -1, 1, 2]
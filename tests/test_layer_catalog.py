@@ -0,0 +1,170 @@
+"""
+Reglamentario layer catalog and layer schema resolution
+"""
+
+import threading
+import time
+
+import requests
+
+from src.services import layer_catalog
+from src.services.layer_catalog import LayerSchemaResolver, ReglamentarioLayerCatalog
+from src.services.resilience import ResiliencePolicy, deadline_scope
+
+FALLBACK = {"area_inundacion": [{"id": 32, "name": "FEMA Flood Zone"}]}
+
+
+def quick_policy():
+    return ResiliencePolicy(max_attempts=1, hedge=False)
+
+
+def test_catalog_discovers_overlay_layers(standin, tmp_path):
+    service_url = standin.client_class().REGLAMENTARIO_URL
+    catalog = ReglamentarioLayerCatalog(service_url, FALLBACK, tmp_path / "layers.json", resilience=quick_policy())
+
+    layers = catalog.overlay_layers()
+
+    assert {t: [layer["id"] for layer in found] for t, found in layers.items()} == {
+        "zona_historica": [10], "zona_costanera": [20], "area_inundacion": [32]
+    }
+    # A new catalog over the same file does not read the metadata again
+    requests_before = standin.request_count
+    reloaded = ReglamentarioLayerCatalog(service_url, FALLBACK, tmp_path / "layers.json", resilience=quick_policy())
+    assert reloaded.overlay_layers() == layers
+    assert standin.request_count == requests_before
+
+
+def test_catalog_falls_back_when_metadata_fails(standin, tmp_path):
+    catalog = ReglamentarioLayerCatalog(
+        f"{standin.url}/server/rest/services/MIPR/Missing/MapServer", FALLBACK,
+        tmp_path / "layers.json", resilience=quick_policy()
+    )
+
+    assert catalog.overlay_layers() == FALLBACK
+    assert not (tmp_path / "layers.json").exists()
+
+
+def test_client_queries_fallback_layers_when_catalog_is_down(tmp_path):
+    from arcgis_standin import ArcGISStandIn
+
+    with ArcGISStandIn(error_rate=1.0) as standin:
+        client = standin.client_class()(
+            timeout=2, use_cache=False, use_offline_zoning=False, resilience=quick_policy()
+        )
+        layers = client._overlay_layer_list()
+        result = client.get_overlay_zones(18.40, -66.06)
+        client.close()
+
+    assert layers == [("area_inundacion", 32, "FEMA Flood Zone")]
+    assert result["success"] is False
+    assert "FEMA Flood Zone query failed" in result["error"]
+
+
+def slow_metadata(calls, delay, metadata):
+    def fetch(url, timeout=15):
+        calls.append(url)
+        time.sleep(delay)
+        return metadata
+    return fetch
+
+
+def test_catalog_reads_metadata_once_for_concurrent_callers(monkeypatch):
+    calls = []
+    metadata = {"layers": [{"id": 7, "name": "Zonas Históricas", "subLayerIds": None}]}
+    monkeypatch.setattr(layer_catalog, "fetch_service_metadata", slow_metadata(calls, 0.2, metadata))
+    catalog = ReglamentarioLayerCatalog("https://gis.example.pr/MapServer", FALLBACK, None, resilience=quick_policy())
+    results = []
+
+    threads = [threading.Thread(target=lambda: results.append(catalog.overlay_layers())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert all(result["zona_historica"] == [{"id": 7, "name": "Zonas Históricas"}] for result in results)
+
+
+def test_cold_catalog_does_not_outlast_the_callers_deadline(monkeypatch):
+    calls = []
+    monkeypatch.setattr(layer_catalog, "fetch_service_metadata", slow_metadata(calls, 1.0, {"layers": []}))
+    catalog = ReglamentarioLayerCatalog("https://gis.example.pr/MapServer", FALLBACK, None, resilience=quick_policy())
+    owner = threading.Thread(target=catalog.overlay_layers)
+    owner.start()
+    while not calls:
+        time.sleep(0.01)
+
+    started = time.monotonic()
+    with deadline_scope(0.1):
+        layers = catalog.overlay_layers()
+    waited = time.monotonic() - started
+    owner.join()
+
+    assert layers == FALLBACK
+    assert waited < 0.5
+
+
+def test_catalog_metadata_read_stops_at_the_deadline(monkeypatch):
+    def hang(url, timeout=15):
+        time.sleep(timeout)
+        raise requests.exceptions.Timeout("slow")
+
+    monkeypatch.setattr(layer_catalog, "fetch_service_metadata", hang)
+    catalog = ReglamentarioLayerCatalog("https://gis.example.pr/MapServer", FALLBACK, None, resilience=quick_policy())
+
+    started = time.monotonic()
+    with deadline_scope(0.2):
+        layers = catalog.overlay_layers()
+
+    assert layers == FALLBACK
+    assert time.monotonic() - started < 1.0
+
+
+def test_schema_resolver_projects_known_fields(standin):
+    resolver = LayerSchemaResolver(resilience=quick_policy())
+    url = standin.client_class().CALIFICACION_URL
+
+    assert resolver.out_fields(url, ["calificacion", "Descripcion", "NOMBRE"]) == "CALIFICACION,DESCRIPCION"
+    assert resolver.out_fields(url, ["NOPE"]) == "*"
+
+
+def test_cold_schema_does_not_outlast_the_callers_deadline(monkeypatch):
+    calls = []
+    metadata = {"fields": [{"name": "CALIFICACION"}]}
+    monkeypatch.setattr(layer_catalog, "fetch_service_metadata", slow_metadata(calls, 1.0, metadata))
+    resolver = LayerSchemaResolver(resilience=quick_policy())
+    url = "https://gis.example.pr/MapServer/0/query"
+    owner = threading.Thread(target=resolver.out_fields, args=(url, ["CALIFICACION"]))
+    owner.start()
+    while not calls:
+        time.sleep(0.01)
+
+    started = time.monotonic()
+    with deadline_scope(0.1):
+        out_fields = resolver.out_fields(url, ["CALIFICACION"])
+    waited = time.monotonic() - started
+    owner.join()
+
+    assert out_fields == "*"
+    assert waited < 0.5
+    assert resolver.out_fields(url, ["CALIFICACION"]) == "CALIFICACION"
+
+
+def test_schema_read_stops_at_the_deadline(monkeypatch):
+    timeouts = []
+
+    def hang(url, timeout=15):
+        timeouts.append(timeout)
+        time.sleep(timeout)
+        raise requests.exceptions.Timeout("slow")
+
+    monkeypatch.setattr(layer_catalog, "fetch_service_metadata", hang)
+    resolver = LayerSchemaResolver(resilience=quick_policy())
+
+    started = time.monotonic()
+    with deadline_scope(0.2):
+        out_fields = resolver.out_fields("https://gis.example.pr/MapServer/0/query", ["CALIFICACION"])
+
+    assert out_fields == "*"
+    assert time.monotonic() - started < 1.0
+    assert timeouts[0] <= 0.2
@@ -0,0 +1,164 @@
+"""
+LookupCache: per-layer TTLs, stale fallback, persistence and single-flight fetches
+"""
+
+import threading
+import time
+
+import numpy as np
+
+from src.services.lookup_cache import LookupCache, ParcelIndex
+
+
+def test_each_layer_family_has_its_own_ttl():
+    cache = LookupCache(db_path=None, ttls={"zoning": 0.05})
+    cache.set("zoning", "1:1", {"district_code": "R-B"})
+    cache.set("overlay:32", "1:1", {"found": True})
+
+    time.sleep(0.1)
+
+    assert cache.get("zoning", "1:1") is None
+    assert cache.get("overlay:32", "1:1") == {"found": True}
+    assert cache.ttl_for("overlay:32") == LookupCache.DEFAULT_TTLS["overlay"]
+    assert cache.ttl_for("unknown") == LookupCache.DEFAULT_TTL
+
+
+def test_expired_entries_are_served_only_when_stale_is_allowed():
+    cache = LookupCache(db_path=None, ttls={"zoning": 0.05})
+    cache.set("zoning", "1:1", {"district_code": "R-B"})
+    time.sleep(0.1)
+
+    assert cache.get("zoning", "1:1") is None
+    assert cache.get("zoning", "1:1", allow_stale=True) == {"district_code": "R-B"}
+    assert cache.stats()["zoning"]["stale_hits"] == 1
+
+
+def test_reads_are_copies():
+    cache = LookupCache(db_path=None)
+    cache.set("parcel", "1:1", {"catastro": "063-077-283-12"})
+
+    cache.get("parcel", "1:1")["catastro"] = None
+
+    assert cache.get("parcel", "1:1") == {"catastro": "063-077-283-12"}
+
+
+def test_sqlite_tier_persists_across_instances(tmp_path):
+    path = tmp_path / "gis_cache.sqlite3"
+    LookupCache(db_path=path).set("zoning", "1:1", {"district_code": "C-L"})
+
+    reopened = LookupCache(db_path=path)
+
+    assert reopened.get("zoning", "1:1") == {"district_code": "C-L"}
+    assert reopened.get("zoning", "1:1") == {"district_code": "C-L"}
+    stats = reopened.stats()["zoning"]
+    assert (stats["disk_hits"], stats["memory_hits"]) == (1, 1)
+
+    reopened.clear("zoning")
+    assert LookupCache(db_path=path).get("zoning", "1:1") is None
+
+
+def test_memory_tier_evicts_least_recently_used(tmp_path):
+    cache = LookupCache(db_path=tmp_path / "gis_cache.sqlite3", max_memory_entries=2)
+    for key in ("a", "b", "c"):
+        cache.set("zoning", key, {"key": key})
+
+    # Evicted from memory, still on disk
+    assert cache.get("zoning", "a") == {"key": "a"}
+    assert cache.stats()["zoning"]["disk_hits"] == 1
+
+
+def test_get_or_fetch_caches_only_successful_results():
+    cache = LookupCache(db_path=None)
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return {"success": False, "error": "down"}
+
+    cache.get_or_fetch("zoning", "1:1", fetch)
+    cache.get_or_fetch("zoning", "1:1", fetch)
+    assert len(calls) == 2
+
+    assert cache.get_or_fetch("zoning", "1:1", lambda: {"success": True}) == {"success": True}
+    assert cache.get_or_fetch("zoning", "1:1", fetch) == {"success": True}
+    assert len(calls) == 2
+
+
+def test_concurrent_misses_share_one_fetch():
+    cache = LookupCache(db_path=None)
+    calls = []
+    release = threading.Event()
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return {"success": True, "district_code": "R-B"}
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_fetch("zoning", "1:1", fetch)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [{"success": True, "district_code": "R-B"}] * 8
+    # Every caller got its own copy
+    assert len({id(result) for result in results}) == 8
+
+
+def test_concurrent_misses_share_the_fetch_error():
+    cache = LookupCache(db_path=None)
+    release = threading.Event()
+
+    def fetch():
+        release.wait(5)
+        raise ConnectionError("MIPR down")
+
+    errors = []
+
+    def lookup():
+        try:
+            cache.get_or_fetch("zoning", "1:1", fetch)
+        except ConnectionError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=lookup) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert errors == ["MIPR down"] * 4
+    assert cache.get_or_fetch("zoning", "1:1", lambda: {"success": True}) == {"success": True}
+
+
+def test_cell_keys_match_cell_key():
+    cache = LookupCache(db_path=None, cell_size_m=10.0)
+    xs = np.array([-7360020.0, -7360011.0, -7360009.9, 5.0, -0.1])
+    ys = np.array([2080030.0, 2080039.9, 2080040.0, 9.99, -0.1])
+
+    keys = cache.cell_keys(xs, ys)
+
+    assert keys == [cache.cell_key(x, y) for x, y in zip(xs.tolist(), ys.tolist())]
+    assert keys[0] == keys[1] != keys[2]
+    assert keys[3:] == ["0:0", "-1:-1"]
+
+
+def test_parcel_index_locates_points_inside_known_parcels():
+    parcels = ParcelIndex(max_parcels=1)
+    parcels.add("A", [[[0, 0], [0, 50], [50, 50], [50, 0], [0, 0]]])
+
+    assert parcels.locate(25, 25) == "A"
+    assert parcels.locate(75, 25) is None
+
+    parcels.add("B", [[[100, 0], [100, 50], [150, 50], [150, 0], [100, 0]]])
+    assert parcels.locate(25, 25) is None
+    assert parcels.locate(125, 25) == "B"
@@ -0,0 +1,89 @@
+"""
+MunicipalityIndex: Puerto Rico bounds, name matching and the boundary file
+"""
+
+import pytest
+
+from src.services import municipality_index
+from src.services.municipality_index import MunicipalityIndex, build_municipality_boundaries
+
+
+@pytest.mark.parametrize("lat, lng", [
+    (18.085, -67.935),   # Isla de Mona, west cliffs
+    (18.386, -67.485),   # Desecheo
+    (18.320, -65.230),   # Culebrita, east of Culebra
+    (18.330, -65.300),   # Culebra
+    (18.125, -65.275),   # Punta Este, Vieques
+    (18.090, -65.490),   # south coast of Vieques
+    (17.890, -66.520),   # Caja de Muertos
+    (18.466, -66.106)    # Viejo San Juan
+])
+def test_in_puerto_rico_at_the_island_edges(lat, lng):
+    assert MunicipalityIndex.in_puerto_rico(lat, lng)
+
+
+@pytest.mark.parametrize("lat, lng", [
+    (18.340, -64.930),   # St. Thomas, USVI
+    (18.500, -68.400),   # Punta Cana, Dominican Republic
+    (17.700, -66.100),   # Caribbean south of Ponce
+    (18.700, -66.100),   # Atlantic north of San Juan
+    (40.700, -74.000)
+])
+def test_outside_puerto_rico(lat, lng):
+    assert not MunicipalityIndex.in_puerto_rico(lat, lng)
+
+
+def test_name_matching_without_a_boundary_file(tmp_path):
+    index = MunicipalityIndex(tmp_path / "missing.npz")
+
+    assert index.available is False
+    assert index.canonical_name("BAYAMÓN") == "Bayamón"
+    assert index.canonical_name("  bayamon ") == "Bayamón"
+    assert index.canonical_name("Loiza") == "Loíza"
+    assert index.canonical_name("Springfield") is None
+    assert index.municipality_at(18.399, -66.156) is None
+
+    assert index.matches(18.399, -66.156, "Bayamon", "Calle 1, Bayamón, 00956, Puerto Rico")
+    assert not index.matches(18.399, -66.156, "Cataño", "Calle 1, Bayamón, 00956, Puerto Rico")
+    assert not index.matches(18.399, -66.156, "Bayamón", None)
+
+
+def square(lng: float, lat: float, size: float):
+    return [[lng, lat], [lng, lat + size], [lng + size, lat + size], [lng + size, lat], [lng, lat]]
+
+
+class FakeTigerweb:
+    """TIGERweb county response: 0.05° squares, Culebra with a second ring"""
+
+    def __init__(self, names):
+        self.features = []
+        for n, name in enumerate(sorted(names)):
+            rings = [square(-67.0 + (n % 20) * 0.1, 18.0 + (n // 20) * 0.1, 0.05)]
+            if name == "Culebra":
+                rings.append(square(-65.25, 18.30, 0.02))
+            self.features.append({"attributes": {"BASENAME": name.upper()}, "geometry": {"rings": rings}})
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"features": self.features}
+
+
+def test_boundary_file_round_trip(tmp_path, monkeypatch):
+    names = MunicipalityIndex._known_names()
+    response = FakeTigerweb(names)
+    monkeypatch.setattr(municipality_index.requests, "get", lambda *args, **kwargs: response)
+    path = tmp_path / "municipality_boundaries.npz"
+
+    assert build_municipality_boundaries(path) == len(names)
+    index = MunicipalityIndex(path)
+
+    assert index.available
+    first = sorted(names)[0]
+    assert index.municipality_at(18.025, -66.975) == first
+    assert index.municipality_at(18.31, -65.24) == "Culebra"
+    # Between the squares
+    assert index.municipality_at(18.075, -66.975) is None
+    assert index.matches(18.025, -66.975, first.upper())
+    assert not index.matches(18.025, -66.975, "Culebra", f"Calle 1, {first}, Culebra")
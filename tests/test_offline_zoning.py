@@ -0,0 +1,121 @@
+"""
+OfflineZoningIndex and the Calificación snapshot sync
+"""
+
+import pytest
+
+from src.services.arcgis_pr_client import ArcGISPRBase
+from src.services.offline_zoning import OfflineZoningIndex, sync_calificacion_snapshot
+
+
+def square(minx, miny, maxx, maxy):
+    return [[[minx, miny], [minx, maxy], [maxx, maxy], [maxx, miny], [minx, miny]]]
+
+
+# Listed neighbour first, so the containing polygon is not simply the first candidate
+ZONES = [
+    (2, "C-L", square(104, 0, 200, 100)),
+    (1, "R-B", square(0, 0, 100, 100)),
+    (3, "C-I", square(100, 0, 104, 2))
+]
+
+
+class FakeCalificacion(ArcGISPRBase):
+    """Answers the snapshot sync's ID and feature requests from ZONES"""
+
+    CALIFICACION_URL = "https://gis.example.pr/Calificacion/MapServer/0/query"
+
+    def __init__(self, zones=ZONES, fail_on_chunk=None):
+        self.zones = {oid: (code, rings) for oid, code, rings in zones}
+        self.fail_on_chunk = fail_on_chunk
+        self.chunks = 0
+
+    def _out_fields(self, query_url, fields):
+        return "*"
+
+    def _post_json(self, url, data):
+        if data.get("returnIdsOnly") == "true":
+            return {"objectIds": list(self.zones)}
+        self.chunks += 1
+        if self.chunks == self.fail_on_chunk:
+            return {"error": {"code": 500, "message": "Injected error"}}
+        features = []
+        for oid in (int(value) for value in data["objectIds"].split(",")):
+            code, rings = self.zones[oid]
+            features.append({
+                "attributes": {"OBJECTID": oid, "CALIFICACION": code, "DESCRIPCION": f"Distrito {code}"},
+                "geometry": {"rings": rings}
+            })
+        return {"features": features}
+
+
+@pytest.fixture
+def snapshot_path(tmp_path):
+    path = tmp_path / "calificacion.sqlite3"
+    assert sync_calificacion_snapshot(FakeCalificacion(), path, chunk_size=1) == len(ZONES)
+    return path
+
+
+def code_at(index, x, y):
+    result = index.lookup(x, y)
+    return result["district_code"] if result else None
+
+
+def test_point_inside_a_polygon_beats_a_nearer_neighbour(snapshot_path):
+    index = OfflineZoningIndex(snapshot_path)
+
+    # Inside R-B, 5 m from C-L; inside C-L, 5 m from R-B
+    assert code_at(index, 99, 50) == "R-B"
+    assert code_at(index, 105, 50) == "C-L"
+    assert index.lookup(50, 50) == {"district_code": "R-B", "district_name": "Distrito R-B"}
+    index.close()
+
+
+def test_nearest_polygon_within_the_search_distance(snapshot_path):
+    index = OfflineZoningIndex(snapshot_path)
+
+    # In the 4 m gap between R-B and C-L, above C-I
+    assert code_at(index, 100.5, 50) == "R-B"
+    assert code_at(index, 103.5, 50) == "C-L"
+    assert code_at(index, 102, 3) == "C-I"
+    # 8 m and 20 m outside R-B
+    assert code_at(index, 50, -8) == "R-B"
+    assert code_at(index, 50, -20) is None
+    index.close()
+
+
+def test_search_distance_is_configurable(snapshot_path):
+    near = OfflineZoningIndex(snapshot_path, search_distance=1.0)
+    far = OfflineZoningIndex(snapshot_path, search_distance=30.0)
+
+    assert code_at(near, 50, -8) is None
+    assert code_at(far, 50, -20) == "R-B"
+    assert far.metadata["feature_count"] == str(len(ZONES))
+    near.close()
+    far.close()
+
+
+def test_failed_sync_keeps_the_old_snapshot(snapshot_path):
+    before = snapshot_path.read_bytes()
+    changed = [(1, "I-L", square(0, 0, 100, 100))] + ZONES[:1]
+
+    with pytest.raises(RuntimeError, match="Injected error"):
+        sync_calificacion_snapshot(FakeCalificacion(changed, fail_on_chunk=2), snapshot_path, chunk_size=1)
+
+    assert snapshot_path.read_bytes() == before
+    assert list(snapshot_path.parent.glob("*.tmp")) == []
+    index = OfflineZoningIndex(snapshot_path)
+    assert code_at(index, 50, 50) == "R-B"
+    index.close()
+
+
+def test_sync_replaces_a_stale_temporary_file(snapshot_path):
+    stale = snapshot_path.with_suffix(".tmp")
+    stale.write_bytes(b"left over from an interrupted sync")
+
+    assert sync_calificacion_snapshot(FakeCalificacion(ZONES[:2]), snapshot_path, chunk_size=5) == 2
+
+    assert not stale.exists()
+    index = OfflineZoningIndex(snapshot_path)
+    assert code_at(index, 101, 3) == "R-B"
+    index.close()
@@ -0,0 +1,210 @@
+"""
+ResiliencePolicy: deadlines, retries and the circuit breaker
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+import requests
+
+from src.services.resilience import (
+    CircuitOpenError, DeadlineExceededError, ResiliencePolicy, deadline_scope, remaining_time
+)
+
+URL = "https://gis.example.pr/arcgis/rest/services/layer/0/query"
+
+
+def slow_timeout(timeout):
+    time.sleep(timeout)
+    raise requests.exceptions.Timeout("slow")
+
+
+def test_deadline_scope_bounds_all_attempts():
+    policy = ResiliencePolicy(max_attempts=5, base_delay=0.01, hedge=False)
+    timeouts = []
+
+    started = time.monotonic()
+    with deadline_scope(0.3):
+        with pytest.raises(requests.exceptions.Timeout):
+            policy.call(URL, lambda timeout: timeouts.append(timeout) or slow_timeout(timeout), timeout=15)
+    elapsed = time.monotonic() - started
+
+    assert elapsed < 1.0
+    assert all(timeout <= 0.3 for timeout in timeouts)
+
+
+def test_attempt_cut_short_by_the_deadline_does_not_count_against_the_host():
+    policy = ResiliencePolicy(max_attempts=3, failure_threshold=1, hedge=False)
+
+    with deadline_scope(0.1):
+        with pytest.raises(DeadlineExceededError):
+            policy.call(URL, slow_timeout, timeout=15)
+    # Without a deadline_scope the same timeout is the host's
+    with pytest.raises(requests.exceptions.Timeout) as raised:
+        policy.call(URL, slow_timeout, timeout=0.05)
+
+    assert not isinstance(raised.value, DeadlineExceededError)
+    assert policy.breaker(URL).state == "open"
+
+
+def test_nested_deadline_scope_only_shortens():
+    with deadline_scope(10):
+        with deadline_scope(60):
+            assert remaining_time(30) <= 10
+        assert remaining_time(1) == 1
+    assert remaining_time(5) == 5
+    assert remaining_time() is None
+
+
+def test_retries_transient_errors():
+    policy = ResiliencePolicy(max_attempts=3, base_delay=0.01, hedge=False)
+    attempts = []
+
+    def flaky(timeout):
+        attempts.append(timeout)
+        if len(attempts) < 3:
+            raise requests.exceptions.ConnectionError("reset")
+        return "ok"
+
+    assert policy.call(URL, flaky, timeout=2) == "ok"
+    assert len(attempts) == 3
+    assert policy.breaker(URL).state == "closed"
+
+
+def test_bad_requests_do_not_open_the_circuit():
+    policy = ResiliencePolicy(max_attempts=3, failure_threshold=2, hedge=False)
+    response = requests.Response()
+    response.status_code = 400
+    attempts = []
+
+    def bad_request(timeout):
+        attempts.append(timeout)
+        raise requests.exceptions.HTTPError("400 Client Error", response=response)
+
+    for _ in range(5):
+        with pytest.raises(requests.exceptions.HTTPError):
+            policy.call(URL, bad_request, timeout=2)
+
+    assert len(attempts) == 5
+    assert policy.breaker(URL).state == "closed"
+
+
+def connection_reset(timeout):
+    raise requests.exceptions.ConnectionError("reset")
+
+
+def test_hedging_is_opt_in():
+    assert ResiliencePolicy().hedge_delay(URL) is None
+    assert ResiliencePolicy(hedge=True, hedge_after=0.1).hedge_delay(URL) == 0.1
+
+
+def test_circuit_opens_after_repeated_failures_and_fails_fast():
+    policy = ResiliencePolicy(max_attempts=1, failure_threshold=3, reset_timeout=60)
+    attempts = []
+
+    for _ in range(3):
+        with pytest.raises(requests.exceptions.ConnectionError):
+            policy.call(URL, lambda timeout: attempts.append(timeout) or connection_reset(timeout), timeout=2)
+    assert policy.breaker(URL).state == "open"
+
+    with pytest.raises(CircuitOpenError):
+        policy.call(URL, lambda timeout: attempts.append(timeout), timeout=2)
+    assert len(attempts) == 3
+    # Other hosts have their own breaker
+    assert policy.call("https://other.example.pr/query", lambda timeout: "ok", timeout=2) == "ok"
+
+
+def test_circuit_half_opens_for_one_trial_after_the_cooldown():
+    policy = ResiliencePolicy(max_attempts=1, failure_threshold=1, reset_timeout=0.1)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        policy.call(URL, connection_reset, timeout=2)
+
+    time.sleep(0.15)
+    breaker = policy.breaker(URL)
+    assert breaker.state == "half_open"
+    # A failed trial re-opens the circuit for another cooldown
+    with pytest.raises(requests.exceptions.ConnectionError):
+        policy.call(URL, connection_reset, timeout=2)
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        policy.call(URL, lambda timeout: "ok", timeout=2)
+
+    time.sleep(0.15)
+    assert policy.call(URL, lambda timeout: "ok", timeout=2) == "ok"
+    assert breaker.state == "closed"
+
+
+def test_half_open_circuit_lets_one_trial_through():
+    policy = ResiliencePolicy(max_attempts=1, failure_threshold=1, reset_timeout=0.05)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        policy.call(URL, connection_reset, timeout=2)
+    time.sleep(0.1)
+    trial_started = threading.Event()
+    release = threading.Event()
+
+    def trial(timeout):
+        trial_started.set()
+        release.wait(5)
+        return "ok"
+
+    thread = threading.Thread(target=policy.call, args=(URL, trial, 2))
+    thread.start()
+    trial_started.wait(5)
+    with pytest.raises(CircuitOpenError):
+        policy.call(URL, lambda timeout: "ok", timeout=2)
+    release.set()
+    thread.join()
+
+    assert policy.breaker(URL).state == "closed"
+
+
+def slow_then_fast():
+    """Request function whose first call is slow and later calls answer at once"""
+    calls = []
+    lock = threading.Lock()
+
+    def request(timeout):
+        with lock:
+            calls.append(timeout)
+            first = len(calls) == 1
+        if first:
+            time.sleep(0.5)
+            return "primary"
+        return "hedge"
+    return request, calls
+
+
+def test_slow_request_is_hedged_and_the_first_answer_wins():
+    policy = ResiliencePolicy(hedge=True, hedge_after=0.05)
+    request, calls = slow_then_fast()
+
+    started = time.monotonic()
+    assert policy.call(URL, request, timeout=2) == "hedge"
+
+    assert time.monotonic() - started < 0.4
+    assert len(calls) == 2
+
+
+def test_fast_request_is_not_hedged():
+    policy = ResiliencePolicy(hedge=True, hedge_after=0.2)
+    calls = []
+
+    assert policy.call(URL, lambda timeout: calls.append(timeout) or "ok", timeout=2) == "ok"
+    assert len(calls) == 1
+
+
+def test_async_slow_request_is_hedged_and_the_first_answer_wins():
+    policy = ResiliencePolicy(hedge=True, hedge_after=0.05)
+    calls = []
+
+    async def request(timeout):
+        calls.append(timeout)
+        if len(calls) == 1:
+            await asyncio.sleep(0.5)
+            return "primary"
+        return "hedge"
+
+    assert asyncio.run(policy.acall(URL, request, timeout=2)) == "hedge"
+    assert len(calls) == 2
@@ -0,0 +1,103 @@
+"""
+RuleEngine: the dimensional Tomo 6 predicates (T6-002..T6-006)
+"""
+
+import pytest
+
+from src.validators.rule_engine import PREDICATE_FACTORIES, make_context
+from src.validators.zoning_validator import ZoningValidator
+
+
+def outcome(rules_db, rule_id, zoning_code, use_code, **project):
+    """passed (True/False) for a rule, or None when it was skipped"""
+    result = ZoningValidator(rules_db, use_memo=False).validate_project(
+        "Calle Luna 1", "San Juan", zoning_code, use_code, project=project or None
+    )
+    if rule_id in result["skipped_rules"]:
+        return None
+    [rule] = [r for r in result["validation_results"] if r["rule_id"] == rule_id]
+    return rule["passed"]
+
+
+@pytest.mark.parametrize("project, expected", [
+    ({"lot_area_m2": 1000}, True),
+    ({"lot_area_m2": 800}, True),
+    ({"lot_area_m2": 500}, False),
+    ({"floors": 1}, None)
+])
+def test_lot_size(rules_db, project, expected):
+    # R-B requires 800 m²
+    assert outcome(rules_db, "T6-002", "R-B", "RES-SF", **project) is expected
+
+
+def test_lot_size_skipped_without_a_stated_minimum(rules_db):
+    assert outcome(rules_db, "T6-002", "C-L", "COM-OFFICE", lot_area_m2=10) is None
+
+
+@pytest.mark.parametrize("zoning_code, project, expected", [
+    ("R-B", {"floors": 2}, True),
+    ("R-B", {"floors": 3}, False),
+    ("C-C", {"floors": 40}, True),
+    ("R-B", {"floors": None, "lot_area_m2": 1000}, None),
+    ("R-B", {"lot_area_m2": 1000}, None)
+])
+def test_height_limit(rules_db, zoning_code, project, expected):
+    assert outcome(rules_db, "T6-003", zoning_code, "RES-SF", **project) is expected
+
+
+class SetbackDistricts:
+    """Minimal rules database with one district declaring setbacks"""
+
+    def get_zoning_districts(self):
+        return [{"code": "R-B", "setbacks_m": {"front": 5, "side": 2, "rear": 3}}, {"code": "C-L"}]
+
+
+@pytest.mark.parametrize("zoning_code, setbacks, expected", [
+    ("R-B", {"front": 6, "side": 2, "rear": 3}, True),
+    ("R-B", {"front": 4, "side": 2, "rear": 3}, False),
+    ("R-B", None, None),
+    ("C-L", {"front": 0, "side": 0, "rear": 0}, None)
+])
+def test_setbacks(zoning_code, setbacks, expected):
+    predicate = PREDICATE_FACTORIES["setbacks"](SetbackDistricts())
+    context = make_context({"code": zoning_code}, {"code": "RES-SF"}, setbacks_m=setbacks)
+
+    result = predicate(context)
+
+    assert (None if result is None else result["passed"]) is expected
+
+
+def test_setbacks_skipped_for_bundled_districts(rules_db):
+    assert outcome(rules_db, "T6-004", "R-B", "RES-SF", setbacks_m={"front": 0, "side": 0, "rear": 0}) is None
+
+
+@pytest.mark.parametrize("project, expected", [
+    ({"coverage_pct": 40}, True),
+    ({"footprint_m2": 300, "lot_area_m2": 1000}, True),
+    ({"footprint_m2": 500, "lot_area_m2": 1000}, False),
+    ({"coverage_pct": 55}, False),
+    ({"footprint_m2": 300}, None)
+])
+def test_coverage(rules_db, project, expected):
+    # R-B allows 40 %
+    assert outcome(rules_db, "T6-005", "R-B", "RES-SF", **project) is expected
+
+
+@pytest.mark.parametrize("project, expected", [
+    ({"floor_area_m2": 300, "parking_spaces": 10}, True),
+    ({"floor_area_m2": 300, "parking_spaces": 9}, False),
+    ({"footprint_m2": 300, "floors": 2, "parking_spaces": 10}, False),
+    ({"footprint_m2": 300, "floors": None, "parking_spaces": 10}, True),
+    ({"footprint_m2": 300, "floors": None, "parking_spaces": 5}, False),
+    ({"floor_area_m2": 300}, None),
+    ({"parking_spaces": 10}, None)
+])
+def test_parking(rules_db, project, expected):
+    # COM-OFFICE needs 1 space per 30 m²
+    assert outcome(rules_db, "T6-006", "C-L", "COM-OFFICE", **project) is expected
+
+
+def test_parking_per_seat(rules_db):
+    assert outcome(rules_db, "T6-006", "C-L", "COM-RESTAURANT", seats=40, parking_spaces=4) is True
+    assert outcome(rules_db, "T6-006", "C-L", "COM-RESTAURANT", seats=41, parking_spaces=4) is False
+    assert outcome(rules_db, "T6-006", "C-L", "COM-RESTAURANT", floor_area_m2=300, parking_spaces=4) is None
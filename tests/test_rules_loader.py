@@ -0,0 +1,162 @@
+"""
+RulesDatabase: district envelopes, specific-use bitsets and the compiled snapshot
+"""
+
+import json
+import math
+import re
+
+from src.database.rules_loader import RulesDatabase, load_rules_database
+from src.database.rules_snapshot import FORMAT_VERSION, MAGIC, PREAMBLE
+
+
+def test_envelope_sweep_reports_unstated_limits_as_unknown(rules_db):
+    results = {r["code"]: r for r in rules_db.envelope_sweep(1000, floors=2, footprint_m2=300)}
+
+    for code in ("P-R", "A-B", "P-P"):
+        assert results[code]["status"] == "unknown"
+        assert {"max_floors", "max_coverage_pct"} <= set(results[code]["unknown_limits"])
+        assert results[code]["max_footprint_m2"] is None
+        assert results[code]["max_floor_area_m2"] is None
+
+    # Every limit stated and met
+    assert results["R-B"]["status"] == "compliant"
+    assert results["R-B"]["unknown_limits"] == []
+    assert results["R-B"]["max_footprint_m2"] == 400.0
+    assert results["R-B"]["max_floors"] == 2.0
+
+
+def test_envelope_sweep_never_passes_an_unknown_district(rules_db):
+    for result in rules_db.envelope_sweep(5000, floors=1, footprint_m2=100):
+        limits = rules_db.district_limits(result["code"])
+        unstated = [name for name in ("min_lot_m2", "max_floors", "max_coverage_pct") if math.isnan(limits[name])]
+        assert (result["status"] == "compliant") == (not unstated)
+
+
+def test_envelope_sweep_rules_out_stated_failures(rules_db):
+    codes = {r["code"] for r in rules_db.envelope_sweep(500, floors=3)}
+
+    # R-B needs 800 m² and allows 2 floors
+    assert "R-B" not in codes
+    assert "R-U" in codes
+
+
+def test_envelope_sweep_unlimited_height(rules_db):
+    [central] = [r for r in rules_db.envelope_sweep(1000, floors=40) if r["code"] == "C-C"]
+
+    assert central["max_floors"] is None
+    assert "max_floors" not in central["unknown_limits"]
+
+
+def test_envelope_sweep_filters_by_use(rules_db):
+    codes = {r["code"] for r in rules_db.envelope_sweep(1000, use_code="COM-RESTAURANT")}
+
+    assert codes == {code for code in rules_db.zones_for_use("COM-RESTAURANT") if code in rules_db.district_index}
+    assert rules_db.envelope_sweep(1000, use_code="NO-SUCH-USE") == []
+
+
+def scanned_usos(rules_db, code, seen=()):
+    """A district's usos by scanning uso_types_comprehensive.json, following references"""
+    usos = set()
+    for uso in rules_db.uso_types["distritos"].get(code, {}).get("usos", []):
+        reference = re.match(r"todos los usos del? (.+)", uso, re.I)
+        if reference is None:
+            usos.add(uso)
+            continue
+        for referenced in re.split(r",\s*|\s+y\s+", reference.group(1)):
+            if referenced not in seen:
+                usos |= scanned_usos(rules_db, referenced.strip(), (*seen, code))
+    return usos
+
+
+def test_compatibility_matrix_matches_the_use_list_scan(rules_db):
+    zones = {d["code"] for d in rules_db.get_zoning_districts()} | {"X-X"}
+    for use in rules_db.get_use_types():
+        zones |= set(use.get("compatible_zones", []))
+
+    for use in rules_db.get_use_types() + [{"code": "NO-SUCH-USE", "compatible_zones": []}]:
+        expected = set(use.get("compatible_zones", []))
+        for zone in zones:
+            assert rules_db.is_compatible(use["code"], zone) == (zone in expected), (use["code"], zone)
+        if use["code"] in rules_db.use_index:
+            assert set(rules_db.zones_for_use(use["code"])) == expected
+
+    for zone in zones:
+        expected = {use["code"] for use in rules_db.get_use_types() if zone in use.get("compatible_zones", [])}
+        assert set(rules_db.uses_for_zone(zone)) == expected
+
+
+def test_uso_bitsets_match_the_district_list_scan(rules_db):
+    codes = list(rules_db.uso_types["distritos"]) + ["X-X"]
+    by_zone = {code: scanned_usos(rules_db, code) for code in codes}
+    names = set().union(*by_zone.values())
+
+    # C-C adds its own usos to those of C-L and C-I, which it references
+    assert by_zone["C-C"] >= by_zone["C-L"] | by_zone["C-I"]
+    for name in names:
+        for code in codes:
+            assert rules_db.is_uso_allowed(name, code) == (name in by_zone[code]), (name, code)
+        assert set(rules_db.districts_for_uso(name)) == {code for code in codes if name in by_zone[code]}
+    for code in codes:
+        assert set(rules_db.usos_for_zone(code)) == by_zone[code]
+
+
+def test_uso_references_are_expanded(rules_db):
+    central = set(rules_db.usos_for_zone("C-C"))
+
+    assert set(rules_db.usos_for_zone("C-L")) <= central
+    assert set(rules_db.usos_for_zone("C-I")) <= central
+    assert not any(uso.lower().startswith("todos los usos") for uso in central)
+
+
+def test_matching_usos_most_specific_first(rules_db):
+    assert rules_db.matching_usos("Oficina profesional de abogados") == ["Oficinas profesionales", "Oficinas"]
+    assert rules_db.find_uso("vivienda unifamiliar principal") == "Vivienda unifamiliar"
+    assert rules_db.matching_usos("nave espacial") == []
+
+
+def test_snapshot_round_trip(rules_db, tmp_path):
+    path = tmp_path / "rules.snapshot"
+    load_rules_database(path)
+    loaded = load_rules_database(path)
+
+    assert path.exists()
+    assert loaded.version == rules_db.version
+    assert (loaded.compatibility == rules_db.compatibility).all()
+    assert loaded._uso_masks == rules_db._uso_masks
+    for query in ("restaurante", "restaurnte", "oficina abogados", "rest", "Alojamiento corto plazo"):
+        expected = [(r["document"]["name"], r["score"]) for r in rules_db.search_uses(query)]
+        assert [(r["document"]["name"], r["score"]) for r in loaded.search_uses(query)] == expected
+    assert loaded.get_use_by_name("restaurante")["code"] == rules_db.get_use_by_name("restaurante")["code"]
+
+
+def test_snapshot_rebuilt_when_corrupt(tmp_path):
+    path = tmp_path / "rules.snapshot"
+    path.write_bytes(b"not a snapshot")
+
+    db = load_rules_database(path)
+
+    assert isinstance(db, RulesDatabase)
+    assert path.read_bytes()[:8] == b"PYXRULES"
+
+
+def test_snapshot_rebuilt_when_header_is_malformed(tmp_path):
+    path = tmp_path / "rules.snapshot"
+    header = json.dumps({"rules_version": "old", "sources": {}}).encode("utf-8")
+    path.write_bytes(PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header)) + header)
+
+    db = load_rules_database(path)
+
+    assert isinstance(db, RulesDatabase)
+    assert load_rules_database(path).version == db.version
+
+
+def test_snapshot_rebuilt_when_truncated(tmp_path):
+    path = tmp_path / "rules.snapshot"
+    load_rules_database(path)
+    data = path.read_bytes()
+
+    for size in (PREAMBLE.size + 40, len(data) // 2):
+        path.write_bytes(data[:size])
+        assert isinstance(load_rules_database(path), RulesDatabase)
+        assert path.read_bytes() != data[:size]
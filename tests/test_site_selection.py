@@ -0,0 +1,151 @@
+"""
+SiteSelector: reverse site-selection queries and municipio syncs
+"""
+
+import pytest
+
+from src.services.arcgis_pr_client import ArcGISPRClient
+from src.services.site_selection import SiteSelector, sync_municipality
+
+PARCELS = [
+    {"catastro": "001-001-001-01", "zoning_code": "C-L", "lat": 18.400, "lng": -66.150, "overlays": []},
+    {"catastro": "001-001-001-02", "zoning_code": "C-L", "lat": 18.401, "lng": -66.151, "overlays": ["area_inundacion"]},
+    {"catastro": "001-001-001-03", "zoning_code": "C-C", "lat": 18.420, "lng": -66.170, "overlays": ["zona_historica"]},
+    {"catastro": "001-001-001-04", "zoning_code": "R-B", "lat": 18.402, "lng": -66.152, "overlays": []},
+    {"catastro": "001-001-001-05", "zoning_code": None, "lat": 18.403, "lng": -66.153, "overlays": []}
+]
+
+
+@pytest.fixture
+def selector(tmp_path, rules_db):
+    selector = SiteSelector(tmp_path / "sites.sqlite3", rules_db=rules_db)
+    selector.replace_municipality("Bayamón", PARCELS)
+    selector.replace_municipality("Cataño", [
+        {"catastro": "002-001-001-01", "zoning_code": "C-L", "lat": 18.440, "lng": -66.120, "overlays": []}
+    ])
+    yield selector
+    selector.close()
+
+
+def catastros(result):
+    return sorted(parcel["catastro"] for parcel in result["parcels"])
+
+
+def test_find_sites_by_use_and_municipio(selector):
+    result = selector.find_sites("COM-RESTAURANT", "bayamon")
+
+    assert result["success"]
+    assert {"C-L", "C-C"} <= set(result["zones"])
+    # Flood zone parcel excluded by default; R-B and unzoned parcels never match
+    assert catastros(result) == ["001-001-001-01", "001-001-001-03"]
+    assert result["count"] == 2
+
+
+def test_find_sites_blocking_overlays(selector):
+    everything = selector.find_sites("COM-RESTAURANT", "Bayamón", blocking_overlays=())
+    historic = selector.find_sites("COM-RESTAURANT", "Bayamón", blocking_overlays=("zona_historica",))
+
+    assert catastros(everything) == ["001-001-001-01", "001-001-001-02", "001-001-001-03"]
+    assert catastros(historic) == ["001-001-001-01", "001-001-001-02"]
+
+
+def test_find_sites_bbox(selector):
+    result = selector.find_sites("COM-RESTAURANT", "Bayamón", bbox=(18.41, -66.18, 18.43, -66.16))
+
+    assert catastros(result) == ["001-001-001-03"]
+
+
+def test_find_sites_radius_nearest_first(selector):
+    result = selector.find_sites(
+        "COM-RESTAURANT", "Bayamón", center=(18.4205, -66.1705), radius_m=5000, blocking_overlays=()
+    )
+
+    assert [parcel["catastro"] for parcel in result["parcels"]][0] == "001-001-001-03"
+    assert all(parcel["distance_m"] <= 5000 for parcel in result["parcels"])
+    distances = [parcel["distance_m"] for parcel in result["parcels"]]
+    assert distances == sorted(distances)
+
+    limited = selector.find_sites(
+        "COM-RESTAURANT", "Bayamón", center=(18.4205, -66.1705), radius_m=5000, limit=1
+    )
+    assert catastros(limited) == ["001-001-001-03"]
+
+    tight = selector.find_sites("COM-RESTAURANT", "Bayamón", center=(18.4205, -66.1705), radius_m=200)
+    assert catastros(tight) == ["001-001-001-03"]
+
+
+def test_find_sites_specific_use_name(selector):
+    result = selector.find_sites("Restaurantes", "Bayamón")
+
+    assert "C-C" in result["zones"]
+    assert "001-001-001-03" in catastros(result)
+
+
+def test_find_sites_errors(selector):
+    assert selector.find_sites("nave espacial", "Bayamón")["success"] is False
+    assert selector.find_sites("COM-RESTAURANT", "Bayamón", center=(18.4, -66.15))["success"] is False
+
+
+def test_replace_municipality_swaps_parcels(selector):
+    selector.replace_municipality("Bayamón", PARCELS[:1])
+
+    assert selector.municipalities() == {"Bayamón": 1, "Cataño": 1}
+    assert catastros(selector.find_sites("COM-RESTAURANT", "Bayamón")) == ["001-001-001-01"]
+
+
+class FakeClient(ArcGISPRClient):
+    """Two CRIM parcels; zoning and overlay answers are set per test"""
+
+    def __init__(self, zoning, overlay):
+        super().__init__(use_cache=False, use_offline_zoning=False)
+        self.zoning, self.overlay = zoning, overlay
+
+    def _out_fields(self, query_url, fields):
+        return ",".join(names[0] for names in fields.values())
+
+    def _post_json(self, url, data):
+        if data.get("returnIdsOnly"):
+            return {"objectIds": [1, 2]}
+        square = [[-7363000, 2085000], [-7363000, 2085100], [-7362900, 2085100], [-7362900, 2085000], [-7363000, 2085000]]
+        return {"features": [
+            {"attributes": {"NUM_CATASTRO": f"001-001-001-0{i}"}, "geometry": {"rings": [square]}}
+            for i in (1, 2)
+        ]}
+
+    def _overlay_layer_list(self):
+        return [("area_inundacion", 32, "FEMA")]
+
+    def query_points_bulk(self, points, layer, batch_size=100):
+        answer = self.zoning if layer == "zoning" else self.overlay
+        return [dict(answer) for _ in points]
+
+
+def test_sync_municipality_stores_parcels(tmp_path, rules_db):
+    selector = SiteSelector(tmp_path / "sites.sqlite3", rules_db=rules_db)
+    client = FakeClient({"success": True, "district_code": "C-L"}, {"found": True, "attributes": {}})
+
+    assert sync_municipality("Bayamón", client, selector) == 2
+    assert selector.find_sites("COM-RESTAURANT", "Bayamón", blocking_overlays=())["count"] == 2
+    assert selector.find_sites("COM-RESTAURANT", "Bayamón")["count"] == 0
+
+
+@pytest.mark.parametrize("zoning, overlay", [
+    ({"success": True, "district_code": "C-L"}, {"found": False, "attributes": {}, "error": "timeout"}),
+    ({"success": False, "district_code": None, "error": "Connection error"}, {"found": False, "attributes": {}})
+])
+def test_sync_municipality_aborts_on_lookup_errors(tmp_path, rules_db, zoning, overlay):
+    selector = SiteSelector(tmp_path / "sites.sqlite3", rules_db=rules_db)
+    selector.replace_municipality("Bayamón", PARCELS)
+
+    with pytest.raises(RuntimeError):
+        sync_municipality("Bayamón", FakeClient(zoning, overlay), selector)
+    assert selector.municipalities() == {"Bayamón": len(PARCELS)}
+
+
+def test_sync_municipality_keeps_parcels_outside_every_district(tmp_path, rules_db):
+    selector = SiteSelector(tmp_path / "sites.sqlite3", rules_db=rules_db)
+    client = FakeClient({}, {"found": False, "attributes": {}})
+    client.zoning = client._bulk_layer_spec("zoning")[3]
+
+    assert sync_municipality("Bayamón", client, selector) == 2
+    assert selector.find_sites("COM-RESTAURANT", "Bayamón")["count"] == 0
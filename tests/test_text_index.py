@@ -0,0 +1,91 @@
+"""
+TextIndex: accent-folded, stemmed and ranked use search
+"""
+
+from src.database.text_index import TextIndex, normalize_use_name, stem_es, tokenize
+
+
+def small_index() -> TextIndex:
+    index = TextIndex()
+    for name, description in (
+        ("Panadería", "Elaboración y venta de pan"),
+        ("Restaurante", "Servicio de comidas"),
+        ("Oficinas profesionales", "Oficinas de abogados, contables e ingenieros"),
+        ("Almacén", "Depósito de mercancías y panaderías industriales")
+    ):
+        index.add({"name": name}, {name: 3.0, description: 1.0})
+    return index
+
+
+def names(results):
+    return [result["document"]["name"] for result in results]
+
+
+def test_search_ignores_accents_and_case():
+    index = small_index()
+
+    for query in ("panaderia", "PANADERÍA", "Panadería"):
+        assert names(index.search(query))[0] == "Panadería"
+
+
+def test_plurals_and_stems_match():
+    index = small_index()
+
+    assert stem_es("panaderias") == stem_es("panaderia")
+    assert stem_es("oficinas") == stem_es("oficina")
+    assert stem_es("establecimientos") == stem_es("establecimiento") == "establec"
+    assert tokenize("Las Panaderías") == tokenize("panaderia")
+    assert names(index.search("panaderías"))[0] == "Panadería"
+    assert names(index.search("restaurantes")) == ["Restaurante"]
+    assert names(index.search("oficina profesional"))[0] == "Oficinas profesionales"
+
+
+def test_results_are_ranked():
+    index = small_index()
+
+    results = index.search("panaderia")
+
+    # A name match outweighs a description match
+    assert names(results) == ["Panadería", "Almacén"]
+    assert results[0]["score"] > results[1]["score"]
+    scores = [result["score"] for result in index.search("oficinas abogados pan")]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_documents_matching_more_words_rank_first():
+    index = small_index()
+
+    assert names(index.search("oficinas abogados"))[0] == "Oficinas profesionales"
+    assert names(index.search("deposito panaderias"))[0] == "Almacén"
+
+
+def test_prefixes_and_typos_match():
+    index = small_index()
+
+    assert names(index.search("rest")) == ["Restaurante"]
+    assert names(index.search("restaurnte")) == ["Restaurante"]
+    assert index.search("nave espacial") == []
+    assert index.search("de la") == []
+
+
+def test_search_filters_by_kind():
+    index = TextIndex()
+    index.add({"kind": "use_type", "name": "Restaurante"}, {"Restaurante": 3.0})
+    index.add({"kind": "uso", "name": "Restaurantes"}, {"Restaurantes": 3.0})
+
+    assert [r["document"]["kind"] for r in index.search("restaurante", kind="uso")] == ["uso"]
+
+
+def test_array_round_trip_keeps_ranking():
+    index = small_index()
+    stems, arrays = index.to_arrays()
+
+    loaded = TextIndex.from_arrays(index.documents, stems, arrays["offsets"], arrays["doc_ids"], arrays["weights"])
+
+    for query in ("panaderia", "rest", "restaurnte", "oficinas abogados"):
+        assert loaded.search(query) == index.search(query)
+
+
+def test_rules_database_use_search(rules_db):
+    assert rules_db.get_use_by_name("RESTAURANTES")["code"] == rules_db.get_use_by_name("restaurante")["code"]
+    assert normalize_use_name("Micro Casas (tiny houses)") == "micro casas tiny houses"
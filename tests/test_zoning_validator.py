@@ -0,0 +1,126 @@
+"""
+ZoningValidator: batch screening, memoized results and specific uses
+"""
+
+import gc
+import weakref
+
+from src.database.rules_loader import RulesDatabase
+from src.validators import zoning_validator
+from src.validators.zoning_validator import RECORD_FIELDS, ZoningValidator
+
+
+def test_validate_many_matches_validate_project(rules_db):
+    validator = ZoningValidator(rules_db, use_memo=False)
+    records = [
+        ("Calle Luna 123", "San Juan", zone, use)
+        for zone in rules_db.district_codes + ["X-X"]
+        for use in rules_db.use_codes + ["NO-SUCH-USE"]
+    ]
+
+    screened = list(validator.validate_many(records, chunk_size=37))
+
+    assert [result["index"] for result in screened] == list(range(len(records)))
+    for record, result in zip(records, screened):
+        full = validator.validate_project(*record)
+        assert dict(zip(RECORD_FIELDS, record)) == {field: result[field] for field in RECORD_FIELDS}
+        assert result["viable"] == full["viable"]
+        assert ("error" in result) == ("error" in full)
+        if "error" not in full:
+            assert result["is_ministerial"] == full["is_ministerial"]
+
+
+def test_validate_many_accepts_dicts(rules_db):
+    validator = ZoningValidator(rules_db)
+    record = dict(zip(RECORD_FIELDS, ("Calle Luna 123", "San Juan", "C-L", "COM-OFFICE")))
+
+    [result] = validator.validate_many([record])
+
+    assert result["viable"] is True
+    assert validator.explain(result)["viable"] is True
+
+
+def test_memo_hits_do_not_share_nested_results(rules_db):
+    validator = ZoningValidator(rules_db)
+    validator.memo.clear()
+
+    first = validator.validate_project("Calle Luna 1", "San Juan", "C-L", "COM-OFFICE")
+    first["validation_results"][0]["details"]["tampered"] = True
+    first["validation_results"].clear()
+    second = validator.validate_project("Calle Sol 2", "Ponce", "C-L", "COM-OFFICE")
+    third = validator.validate_project("Calle Sol 3", "Ponce", "C-L", "COM-OFFICE")
+
+    assert second["validation_results"]
+    assert "tampered" not in second["validation_results"][0]["details"]
+    assert second["validation_results"] is not third["validation_results"]
+    assert (second["property_address"], second["municipality"]) == ("Calle Sol 2", "Ponce")
+    assert validator.memo.hits >= 2
+
+
+def test_memo_is_per_rules_database(rules_db):
+    other = RulesDatabase()
+    assert other.version == rules_db.version
+
+    assert ZoningValidator(rules_db).memo is ZoningValidator(rules_db).memo
+    assert ZoningValidator(other).memo is not ZoningValidator(rules_db).memo
+
+
+def test_engine_and_memo_released_with_rules_database(rules_db):
+    engines, memos = len(zoning_validator._engines), len(zoning_validator._memos)
+    db = RulesDatabase()
+    validator = ZoningValidator(db)
+    validator.validate_project("Calle Luna 1", "San Juan", "C-L", "COM-OFFICE")
+    assert len(zoning_validator._engines) == engines + 1
+    assert len(zoning_validator._memos) == memos + 1
+
+    released = weakref.ref(db)
+    del db, validator
+    gc.collect()
+
+    assert released() is None
+    assert len(zoning_validator._engines) == engines
+    assert len(zoning_validator._memos) == memos
+
+
+def test_memoized_result_equals_fresh_result(rules_db):
+    memoized = ZoningValidator(rules_db)
+    fresh = ZoningValidator(rules_db, use_memo=False)
+
+    for _ in range(2):
+        a = memoized.validate_project("Calle Luna 1", "San Juan", "R-B", "COM-RESTAURANT")
+        b = fresh.validate_project("Calle Luna 1", "San Juan", "R-B", "COM-RESTAURANT")
+        a.pop("validated_at"), b.pop("validated_at")
+        assert a == b
+
+
+def test_specific_use_from_referenced_district(rules_db):
+    result = ZoningValidator(rules_db).validate_project(
+        "Calle Luna 1", "San Juan", "C-C", "COM-RESTAURANT", specific_use="Restaurante"
+    )
+
+    [specific] = [r for r in result["validation_results"] if r["rule_id"] == "T6-001" and "specific_use" in r["details"]]
+    assert result["viable"] is True
+    assert specific["passed"] is True
+
+
+def test_specific_use_matches_the_listed_general_use(rules_db):
+    result = ZoningValidator(rules_db).validate_project(
+        "Calle Luna 1", "San Juan", "C-L", "COM-OFFICE", specific_use="Oficina profesional de abogados"
+    )
+
+    [specific] = [r for r in result["validation_results"] if "specific_use" in r["details"]]
+    assert result["viable"] is True
+    assert specific["passed"] is True
+    assert specific["details"]["specific_use"] == "Oficinas"
+
+
+def test_specific_use_miss_is_a_warning(rules_db):
+    # "Vivienda unifamiliar" is not in the C-L list, but the use x zone matrix decides
+    result = ZoningValidator(rules_db).validate_project(
+        "Calle Luna 1", "San Juan", "C-L", "COM-OFFICE", specific_use="Vivienda unifamiliar"
+    )
+
+    [specific] = [r for r in result["validation_results"] if "specific_use" in r["details"]]
+    assert specific["passed"] is False
+    assert specific["critical"] is False
+    assert result["viable"] is True
@@ -1,9 +1,15 @@
 """
 Quick Test Script for MIPR Integration
 Tests ArcGIS PR Client with known coordinates
+
+Usage:
+    python tests/tests_mipr_integration.py            # live MIPR/CRIM services
+    python tests/tests_mipr_integration.py --standin  # local synthetic stand-in
 """
 
+import argparse
 import sys
+import tempfile
 from pathlib import Path
 import json
 
@@ -11,16 +17,16 @@ import json
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(PROJECT_ROOT))
 
-from src.utils.arcgis_pr_client import ArcGISPRClient
+from src.services.arcgis_pr_client import ArcGISPRClient
 from src.utils.pot_equivalency import POTEquivalencyTable
 
 
-def test_mipr_integration():
+def test_mipr_integration(client: ArcGISPRClient = None, output_file: Path = None):
     print("=" * 80)
     print("TESTING MIPR INTEGRATION")
     print("=" * 80)
 
-    client = ArcGISPRClient()
+    client = client or ArcGISPRClient()
     pot_table = POTEquivalencyTable()
 
     test_cases = [
@@ -75,18 +81,14 @@ def test_mipr_integration():
         print()
 
         try:
-            info = client.get_complete_property_info(test["lat"], test["lon"])
-
-            zoning = info.get("zoning", {})
-            overlays = info.get("overlays", [])
-            pot = info.get("municipal_pot", {})
+            zoning = client.get_zoning_district(test["lat"], test["lon"])
+            overlays = client.get_overlay_zones(test["lat"], test["lon"]).get("overlays", [])
+            pot = {}
 
             print("RESULTS:")
             print(f"  District Code: {zoning.get('district_code', 'NOT FOUND')}")
             print(f"  District Name: {zoning.get('district_name', 'NOT FOUND')}")
             print(f"  Source: {zoning.get('source', 'N/A')}")
-            print(f"  Last Updated: {zoning.get('last_updated', 'N/A')}")
-            print(f"  Confidence: {zoning.get('confidence', 'N/A')}")
 
             if zoning.get("error"):
                 print(f"  ⚠️ ERROR: {zoning['error']}")
@@ -103,7 +105,7 @@ def test_mipr_integration():
 
             print(f"\n  Overlays Detected: {len(overlays)}")
             for overlay in overlays:
-                print(f"    - {overlay.get('overlay_type', 'UNKNOWN')}: {overlay.get('description', 'N/A')}")
+                print(f"    - {overlay.get('type', 'UNKNOWN')}: {overlay.get('name', 'N/A')}")
 
             results.append(
                 {
@@ -136,9 +138,8 @@ def test_mipr_integration():
             print(f"   → {z['district_code']} - {z.get('district_name', '')}")
 
     # Save detailed results
-    output_dir = PROJECT_ROOT / "outputs"
-    output_dir.mkdir(exist_ok=True)
-    output_file = output_dir / "mipr_test_results.json"
+    output_file = output_file or PROJECT_ROOT / "outputs" / "mipr_test_results.json"
+    output_file.parent.mkdir(exist_ok=True)
 
     with open(output_file, "w", encoding="utf-8") as f:
         json.dump(results, f, indent=2, ensure_ascii=False)
@@ -147,4 +148,18 @@ def test_mipr_integration():
 
 
 if __name__ == "__main__":
-    test_mipr_integration()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="MIPR integration check")
+    parser.add_argument("--standin", action="store_true", help="Query the local ArcGIS stand-in instead of MIPR")
+    args = parser.parse_args()
+
+    if args.standin:
+        from arcgis_standin import ArcGISStandIn
+
+        # Synthetic results must not replace the recorded live ones in outputs/
+        with ArcGISStandIn() as standin, tempfile.TemporaryDirectory() as tmp:
+            test_mipr_integration(
+                standin.client_class()(use_cache=False, use_offline_zoning=False),
+                Path(tmp) / "mipr_test_results.json"
+            )
+    else:
+        test_mipr_integration()